@@ -0,0 +1,178 @@
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from cache_paths import get_cache_dir, file_fingerprint
+from ffmpeg_tools import ffmpeg_binary
+from time_remap import stretch_audio
+
+# Every track is decoded (and resampled if needed) to this format once, then mixed as float32.
+PROJECT_SAMPLE_RATE = 44100
+PROJECT_CHANNELS = 2
+
+# Tracks longer than this are memory-mapped from the cache file instead of loaded into RAM.
+MEMMAP_THRESHOLD_SECONDS = 120
+# Budgets for the decoded tracks kept in RAM for this session and on disk across sessions; the least
+# recently used ones are dropped first. Memory-mapped tracks do not count against the RAM budget.
+AUDIO_MEMORY_MB = 512
+AUDIO_CACHE_MB = 4096
+# Memory-mapped tracks cost no RAM but each holds a file mapping, so only this many are kept open.
+MAX_MEMMAP_TRACKS = 16
+
+# Decoded tracks by cache path, least recently used first.
+_buffers = OrderedDict()
+_buffers_lock = threading.Lock()
+# One lock per cache path, held while that track is decoded and loaded, so the same track is decoded
+# once while other tracks are still served from _buffers. They are never removed, which keeps a waiting
+# thread and a new caller on the same lock.
+_load_locks = {}
+
+
+def load_track_buffer(path, sample_rate=PROJECT_SAMPLE_RATE, channels=PROJECT_CHANNELS):
+    """
+    Returns a (samples, channels) float32 array holding the whole decoded track.
+    The decode is cached on disk under the file's content hash, and in memory for this session,
+    so each source is decoded at most once while it stays within the caches' budgets.
+    """
+    cache_path = os.path.join(get_cache_dir("audio"),
+                              f"{file_fingerprint(path)}_{sample_rate}_{channels}.f32")
+    with _buffers_lock:
+        if cache_path in _buffers:
+            _buffers.move_to_end(cache_path)
+            return _buffers[cache_path]
+        load_lock = _load_locks.setdefault(cache_path, threading.Lock())
+
+    with load_lock:
+        # Another caller may have loaded the track while this one waited.
+        with _buffers_lock:
+            if cache_path in _buffers:
+                _buffers.move_to_end(cache_path)
+                return _buffers[cache_path]
+
+        if os.path.exists(cache_path):
+            # Marks the file as recently used for _trim_disk_cache.
+            os.utime(cache_path)
+        else:
+            partial_path = cache_path + ".part"
+            # ffmpeg decodes and resamples straight into the cache file.
+            cmd = [ffmpeg_binary(), "-y", "-loglevel", "error", "-i", path, "-vn",
+                   "-f", "f32le", "-ac", str(channels), "-ar", str(sample_rate), partial_path]
+            result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                    universal_newlines=True)
+            if result.returncode != 0:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+                raise IOError(f"Could not decode audio from {path}: {result.stderr.strip()}")
+            os.replace(partial_path, cache_path)
+            with _buffers_lock:
+                _trim_disk_cache(os.path.dirname(cache_path), keep=cache_path)
+
+        frame_count = os.path.getsize(cache_path) // (4 * channels)
+        if frame_count > MEMMAP_THRESHOLD_SECONDS * sample_rate:
+            samples = np.memmap(cache_path, dtype=np.float32, mode="r", shape=(frame_count, channels))
+        else:
+            samples = np.fromfile(cache_path, dtype=np.float32).reshape(frame_count, channels)
+        with _buffers_lock:
+            _buffers[cache_path] = samples
+            _trim_buffers()
+        return samples
+
+
+def _trim_buffers():
+    """
+    Drops the least recently used in-memory tracks until they fit AUDIO_MEMORY_MB, and memory-mapped
+    ones beyond MAX_MEMMAP_TRACKS. Needs _buffers_lock.
+    """
+    in_memory = [key for key, samples in _buffers.items() if not isinstance(samples, np.memmap)]
+    mapped = [key for key, samples in _buffers.items() if isinstance(samples, np.memmap)]
+    total = sum(_buffers[key].nbytes for key in in_memory)
+    # The newest track stays, even on its own over budget: its caller is about to use it.
+    for key in in_memory[:-1]:
+        if total <= AUDIO_MEMORY_MB * 1024 * 1024: break
+        total -= _buffers.pop(key).nbytes
+    for key in mapped[:max(0, len(mapped) - MAX_MEMMAP_TRACKS)]:
+        del _buffers[key]
+
+
+def _trim_disk_cache(directory, keep):
+    """Deletes the least recently used decoded tracks until the folder fits AUDIO_CACHE_MB. Needs _buffers_lock."""
+    entries = []
+    for name in os.listdir(directory):
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, os.path.join(directory, name)))
+    total = sum(size for _mtime, size, _path in entries)
+    for _mtime, size, path in sorted(entries):
+        if total <= AUDIO_CACHE_MB * 1024 * 1024: break
+        # Tracks that are in use this session (some memory-mapped) or being decoded or loaded are kept.
+        if path == keep or path in _buffers or path.endswith(".part"): continue
+        if path in _load_locks and _load_locks[path].locked(): continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError as e:
+            print(f"Warning: could not remove cached audio {path}: {e}")
+
+
+class AudioMixer:
+    """
+    Mixes any number of audio tracks from cached float32 buffers with numpy, in chunks.
+    Each track is a window of a source file (offset and duration in seconds) with its own gain.
+    """
+
+    def __init__(self, sample_rate=PROJECT_SAMPLE_RATE, channels=PROJECT_CHANNELS):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.tracks = []
+
+    def add_track(self, path, offset=0.0, duration=None, gain=1.0, speed=1.0):
+        """
+        Adds source[offset:offset + duration] to the mix, starting at time 0 of the output.
+        At a `speed` other than 1 the window covers duration * speed seconds of the source, time-stretched
+        to `duration` output seconds with the pitch kept.
+        """
+        samples = load_track_buffer(path, self.sample_rate, self.channels)
+        first = int(round(offset * self.sample_rate))
+        last = len(samples) if duration is None else min(len(samples),
+                                                         first + int(round(duration * speed * self.sample_rate)))
+        if speed != 1.0:
+            # Stretched once, up front; mix() then reads it like any other buffer.
+            samples = stretch_audio(samples[first:max(last, first)], speed)
+            first, last = 0, len(samples)
+        self.tracks.append((samples, first, max(last, first), np.float32(gain)))
+
+    def mix(self, first_sample, sample_count):
+        """Returns output samples [first_sample, first_sample + sample_count) as float32, clipped to [-1, 1]."""
+        out = np.zeros((sample_count, self.channels), dtype=np.float32)
+        scratch = np.empty_like(out)
+        for samples, track_first, track_last, gain in self.tracks:
+            start = track_first + first_sample
+            stop = min(start + sample_count, track_last)
+            if stop <= start: continue
+            length = stop - start
+            # Scale into a reused scratch buffer, then accumulate, so no per-track arrays are allocated.
+            np.multiply(samples[start:stop], gain, out=scratch[:length])
+            out[:length] += scratch[:length]
+        return np.clip(out, -1.0, 1.0, out=out)
+
+    def write_audiofile(self, output_path, duration, chunk_seconds=10.0, codec="aac"):
+        """Streams the mix of the first `duration` seconds to ffmpeg in chunks and encodes it."""
+        total = int(round(duration * self.sample_rate))
+        chunk = max(1, int(chunk_seconds * self.sample_rate))
+        cmd = [ffmpeg_binary(), "-y", "-loglevel", "error",
+               "-f", "f32le", "-ar", str(self.sample_rate), "-ac", str(self.channels), "-i", "-",
+               "-c:a", codec, output_path]
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            for first_sample in range(0, total, chunk):
+                process.stdin.write(self.mix(first_sample, min(chunk, total - first_sample)).tobytes())
+        finally:
+            process.stdin.close()
+            error = process.stderr.read()
+            if process.wait() != 0:
+                raise IOError(f"Could not encode mixed audio: {error.decode(errors='replace').strip()}")
@@ -1,9 +1,63 @@
+import copy
+import math
+import os
+import threading
+
 import numpy as np
-from moviepy.editor import VideoFileClip, AudioFileClip, vfx, afx, CompositeAudioClip
+from PIL import Image
+from audio_mixer import AudioMixer
+from color_engine import ColorLUT
+from edit_list import EditDecisionList
+from export_pipeline import ExportCancelled, export_pipelined
+from export_queue import ExportQueue
+from frame_cache import FrameCache
+from proxy_manager import ProxyGenerator, PROXY_HEIGHT
+from parallel_export import export_parallel, DEFAULT_EXPORT_WORKERS
+from profiler import profiler
+from render_cache import DEFAULT_RENDER_CACHE_MB, RenderCache, export_chunked
+from smart_trim import export_trim_only
+from tiled_effects import DEFAULT_EFFECT_THREADS
+
+# Memory budget for rendered preview frames (roughly 40 frames at 1080p).
+DEFAULT_FRAME_CACHE_MB = 256
+
+# Adjustment values that leave a frame and its audio unchanged.
+DEFAULT_ADJUSTMENTS = {
+    "brightness": 0.0, "contrast": 0.0, "gamma": 1.0,
+    "r": 1.0, "g": 1.0, "b": 1.0,
+    "volume": 1.0, "speed": 1.0
+}
 
 
 class FioraBackend:
-    def __init__(self):
+    def __init__(self, frame_cache_mb=DEFAULT_FRAME_CACHE_MB, use_proxy=True, export_workers=DEFAULT_EXPORT_WORKERS,
+                 effect_threads=DEFAULT_EFFECT_THREADS, render_cache_mb=DEFAULT_RENDER_CACHE_MB):
+        # Settings that survive loading a new video
+        self.frame_cache_mb = frame_cache_mb
+        self.use_proxy = use_proxy
+        self.export_workers = export_workers
+        # Threads for the frame effects during export, shared out between the export workers.
+        self.effect_threads = effect_threads
+        # Encoded chunks of earlier exports, so a re-export only renders what changed. 0 turns it off.
+        self.render_cache = RenderCache(render_cache_mb) if render_cache_mb else None
+
+        # Serialises frame decoding, which runs on the playback and preview-render threads.
+        self.render_lock = threading.RLock()
+        # Held while the edits and adjustments change and the clips are rebuilt from them. The Tk thread
+        # edits; the render threads rebuild when the proxy is attached (see _attach_proxy).
+        self.state_lock = threading.RLock()
+
+        # Shared, reference-counted audio decoders, created with the first media file (see media).
+        self._media = None
+
+        # Background exports, run one after another while editing goes on.
+        self.exports = ExportQueue()
+
+        self._reset_state()
+        print("Fiora Backend Processor is ready.")
+
+    def _reset_state(self):
+        """Puts every per-video attribute back to its empty state."""
         # Current, actively displayed clips that have effects applied
         self.clip = None
         self.main_audio_clip = None
@@ -12,22 +66,35 @@ class FioraBackend:
         self.original_clip = None
         self.original_main_audio = None
 
-        # Base clips that hold the trimmed state, but no other visual/audio effects
-        # All effects are applied to these base clips to avoid compounding issues.
-        self.base_clip = None
+        # The main audio cut to the edited range, before the volume adjustment
         self.base_main_audio = None
 
         # Lists for additional audio tracks
         self.additional_audio_clips = []
         self.original_additional_audio_clips = []
+        # Where each additional track comes from, for the export mixer: {"path", "offset", "gain"}
+        self.additional_audio_tracks = []
 
         # Dictionary to hold all adjustment states (e.g., brightness, contrast)
-        self.adjustments = {
-            "brightness": 0.0, "contrast": 0.0, "gamma": 1.0,
-            "r": 1.0, "g": 1.0, "b": 1.0,
-            "volume": 1.0, "speed": 1.0
-        }
-        print("Fiora Backend Processor is ready.")
+        self.adjustments = dict(DEFAULT_ADJUSTMENTS)
+
+        # The trims and filters, flattened into one source range and a filter list.
+        # Together with the adjustments it identifies what a rendered frame looks like.
+        self.edits = EditDecisionList()
+
+        # Rendered frames for preview scrubbing, keyed on (frame index, effect state).
+        self.frame_cache = FrameCache(self.frame_cache_mb)
+
+        # Low-resolution proxy used for preview and playback. Until the proxy is ready
+        # the preview falls back to the full-resolution clip.
+        self.source_path = None
+        self.proxy = None
+        self.proxy_source_clip = None
+        self.preview_clip = None
+
+        # (preview clip, preview clip without effects, effect function, effect state key), swapped as
+        # one tuple so that a render thread never pairs a new clip with an old cache key or the other way round.
+        self._render_state = (None, None, None, None)
 
     def close(self):
         """
@@ -36,20 +103,45 @@ class FioraBackend:
         when loading a new video.
         """
         print("Closing existing video/audio resources...")
-        clips_to_close = [
-            self.clip, self.original_clip, self.base_clip,
-            self.main_audio_clip, self.original_main_audio, self.base_main_audio
-        ]
-        clips_to_close.extend(self.additional_audio_clips)
-        clips_to_close.extend(self.original_additional_audio_clips)
-
-        for clip in clips_to_close:
+        if self.proxy:
+            self.proxy.cancel()
+        # Every other clip is a view on one of these two readers, or on an audio source in the registry.
+        for clip in (self.original_clip, self.proxy_source_clip):
             if clip:
                 try:
                     # moviepy clips have a close() method to terminate their ffmpeg subprocess
                     clip.close()
                 except Exception as e:
                     print(f"Error closing a clip: {e}")
+        self._release_audio(self.original_main_audio)
+        for original in self.original_additional_audio_clips:
+            self._release_audio(original)
+
+    @property
+    def media(self):
+        """The shared, reference-counted audio decoders. Every audio clip of the backend is a view on one of these."""
+        if self._media is None:
+            # Imported here, like moviepy below, so the editor window can open before the media libraries load.
+            from media_registry import MediaRegistry
+            self._media = MediaRegistry()
+        return self._media
+
+    @staticmethod
+    def _open_video(path):
+        """
+        Opens a video without its audio, decoding into a ring of reused buffers instead of a new array per frame,
+        with a few decoders at different positions (guided by a keyframe index) for random-access seeks.
+        """
+        # Imported here so the editor window can open before moviepy has loaded.
+        from moviepy.video.io.VideoFileClip import VideoFileClip
+        from frame_buffers import use_frame_pool
+        from seek_index import use_decoder_pool
+        return use_decoder_pool(use_frame_pool(VideoFileClip(path, audio=False)))
+
+    def _release_audio(self, clip):
+        """Gives an audio clip's source back to the registry."""
+        if clip:
+            self.media.release(clip.source)
 
     def load_video(self, video_path):
         try:
@@ -57,17 +149,28 @@ class FioraBackend:
             self.close()
 
             # Now, re-initialize the state for the new video.
-            self.__init__()
+            self._reset_state()
 
-            clip = VideoFileClip(video_path)
+            # The audio is not opened with the video: it comes from the registry, whose decoder starts
+            # only when samples are read (the export mixes straight from the file).
+            clip = self._open_video(video_path)
+            self.source_path = video_path
             self.original_clip = clip
-            self.base_clip = clip
             self.clip = clip
-
-            if clip.audio:
-                self.original_main_audio = clip.audio
-                self.base_main_audio = clip.audio
-                self.main_audio_clip = clip.audio
+            self.edits = EditDecisionList(0.0, clip.duration)
+            self.preview_clip = clip
+            self._render_state = (clip, clip, None, self._effect_state_key())
+
+            # Start building a preview proxy for large sources; export keeps using the original.
+            if self.use_proxy and clip.h > PROXY_HEIGHT:
+                self.proxy = ProxyGenerator(video_path, clip.duration)
+                self.proxy.start()
+
+            if clip.reader.infos.get("audio_found"):
+                audio = self.media.acquire_audio(video_path, clip.reader.infos)
+                self.original_main_audio = audio
+                self.base_main_audio = audio
+                self.main_audio_clip = audio
             return True
         except Exception as e:
             print(f"ERROR: Could not load video. Reason: {e}")
@@ -76,15 +179,20 @@ class FioraBackend:
     def load_audio(self, audio_path):
         """Adds a new audio track, trimmed to match the current video clip's duration."""
         try:
-            new_clip = AudioFileClip(audio_path)
+            # One shared source per file: the original and the trimmed clip are two views on it.
+            original = self.media.acquire_audio(audio_path)
+            new_clip = original
 
-            # If a video is loaded, trim the new audio to fit the video's current length.
+            # If a video is loaded, trim the new audio to fit the video's current length. Audio clips keep
+            # source seconds (the speed stage stretches them at mix time), so this is the edited source range.
             if self.clip:
-                if new_clip.duration > self.clip.duration:
-                    new_clip = new_clip.subclip(0, self.clip.duration)
+                source_length = self.edits.duration(self.original_clip.duration)
+                if new_clip.duration > source_length:
+                    new_clip = new_clip.subclip(0, source_length)
 
             self.additional_audio_clips.append(new_clip)
-            self.original_additional_audio_clips.append(AudioFileClip(audio_path))
+            self.original_additional_audio_clips.append(original)
+            self.additional_audio_tracks.append({"path": audio_path, "offset": 0.0, "gain": 1.0})
             return len(self.additional_audio_clips)
         except Exception as e:
             print(f"ERROR: Could not load audio. Reason: {e}")
@@ -92,146 +200,369 @@ class FioraBackend:
 
     def apply_all_effects(self):
         """
-        Applies all adjustments from the self.adjustments dictionary
-        to the base (trimmed) clip. This prevents compounding effects and performance issues.
+        Rebuilds the edited clip from the original clip, the edit list and the adjustments.
+        Starting from the original every time prevents compounding effects and performance issues.
         """
-        if not self.base_clip: return
+        if not self.original_clip: return
 
-        # Always start from the clean, trimmed base clip to apply effects.
-        temp_clip = self.base_clip
+        # Always start from the clean original clip: one subclip for the trims, one image stage.
+        temp_clip = self.build_video_clip(self.original_clip, self.edits, self.adjustments)
         temp_main_audio = self.base_main_audio
 
-        # Get all current adjustment values.
-        lum = self.adjustments.get("brightness", 0.0)
-        con = self.adjustments.get("contrast", 0.0)
-        gamma = self.adjustments.get("gamma", 1.0)
-        r, g, b = self.adjustments.get("r", 1.0), self.adjustments.get("g", 1.0), self.adjustments.get("b", 1.0)
-
-        # Apply visual effects one by one.
-        if lum != 0.0 or con != 0.0: temp_clip = temp_clip.fx(vfx.lum_contrast, lum=lum, contrast=con)
-        if gamma != 1.0: temp_clip = temp_clip.fx(vfx.gamma_corr, gamma=gamma)
-        if r != 1.0 or g != 1.0 or b != 1.0:
-            temp_clip = temp_clip.fl_image(lambda frame: self._rgb_manipulator(frame, r, g, b))
-
         # Update the active clip that is shown in the UI.
         self.clip = temp_clip
 
+        # The preview replays the same edits on the proxy (if it is ready), so it matches the export.
+        preview_source = self.proxy_source_clip or self.original_clip
+        if self.proxy_source_clip:
+            self.preview_clip = self.build_video_clip(self.proxy_source_clip, self.edits, self.adjustments)
+        else:
+            self.preview_clip = temp_clip
+        # Scaled previews cut the source, shrink it, and only then run the effects on the small frame.
+        speed = self.adjustments.get("speed", 1.0)
+        self._render_state = (self.preview_clip, self.edits.render(preview_source, effects=False, speed=speed),
+                              self.edits.frame_function(ColorLUT.from_adjustments(self.adjustments)),
+                              self._effect_state_key())
+
         # Apply audio effects.
         if temp_main_audio:
             volume = self.adjustments.get("volume", 1.0)
             if volume != 1.0:
-                self.main_audio_clip = temp_main_audio.fx(afx.volumex, volume)
+                from moviepy.audio.fx.volumex import volumex
+                self.main_audio_clip = temp_main_audio.fx(volumex, volume)
             else:
                 self.main_audio_clip = temp_main_audio
 
     @staticmethod
-    def _rgb_manipulator(frame, r, g, b):
-        """A helper function to change the Red, Green, and Blue values of a video frame."""
-        new_frame = frame.astype('float64')
-        new_frame[:, :, 0] *= r
-        new_frame[:, :, 1] *= g
-        new_frame[:, :, 2] *= b
-        return np.clip(new_frame, 0, 255).astype('uint8')
+    def build_video_clip(source_clip, edits, adjustments, effect_threads=1):
+        """
+        Builds the edited video from a source clip, an edit list and the adjustments.
+        Used for the editor clip, the preview proxy and by export worker processes, which cannot share self.clip.
+        With effect_threads > 1 the effects run on row tiles of each frame in parallel, for export.
+        The "speed" adjustment time-remaps the edited range (see time_remap).
+        """
+        # Compile brightness, contrast, gamma and the RGB gains into a single lookup-table
+        # stage, so each frame is walked once instead of once per effect. The filters run
+        # in the same image stage, so the pipeline depth does not grow with the edit count.
+        return edits.render(source_clip, ColorLUT.from_adjustments(adjustments), threads=effect_threads,
+                            speed=adjustments.get("speed", 1.0))
+
+    def source_time_offset(self):
+        """Returns where the trimmed timeline starts in the source, in seconds."""
+        return self.edits.source_in
+
+    def _attach_proxy(self):
+        """Switches the preview over to the proxy once the background encode has finished."""
+        try:
+            self.proxy_source_clip = self._open_video(self.proxy.proxy_path)
+        except Exception as e:
+            print(f"ERROR: Could not open preview proxy. Reason: {e}")
+            self.proxy.failed = True
+            return
+        print(f"Preview proxy ready: {self.proxy.proxy_path}")
+        with self.state_lock:
+            self.apply_all_effects()
+
+    def proxy_progress(self):
+        """Returns the proxy build progress (0.0 to 1.0), or None when no proxy is being used."""
+        if not self.proxy or self.proxy.failed: return None
+        return self.proxy.progress
+
+    def _effect_state_key(self):
+        """A hash of everything that changes how a frame is rendered."""
+        return hash((tuple(sorted(self.adjustments.items())), self.edits.key(),
+                     self.proxy_source_clip is not None))
+
+    def preview_effects(self):
+        """
+        Returns (effect function, state key) of the current edits, for images derived from the source such
+        as timeline thumbnails. The function is None when there is nothing to do; the key changes with it.
+        """
+        if not self.clip: return None, None
+        _clip, _base, process, state_key = self._render_state
+        return process, state_key
+
+    def get_frame(self, time, target_size=None, fast=False):
+        """
+        Returns the rendered preview frame at a given time, using the frame cache when possible.
+        Frames come from the proxy when it is ready, otherwise from the full-resolution clip.
+        With a target (width, height) the frame is scaled to fit inside it before the effects run;
+        fast=True uses a cheaper scaling filter, for playback.
+        """
+        if not self.clip: return None
+        with self.render_lock, profiler.span("get_frame"):
+            # Attach here, on a rendering thread, rather than from the proxy's worker thread.
+            if self.proxy and self.proxy.ready and not self.proxy_source_clip:
+                self._attach_proxy()
+            preview_clip, preview_base, process, state_key = self._render_state
+            # Snap the time to a frame index the same way moviepy's reader does.
+            frame_index = int(preview_clip.fps * time + 0.00001)
+            # Scaled frames are cached per size, so going back to an earlier canvas size is a cache hit.
+            key = (frame_index, state_key) if target_size is None else (frame_index, state_key, target_size, fast)
+            frame = self.frame_cache.get(key)
+            if frame is None:
+                time = min(time, preview_clip.duration)
+                if target_size is None:
+                    frame = preview_clip.get_frame(time)
+                else:
+                    frame = self._scaled_frame(preview_base.get_frame(time), process, target_size, fast)
+                # Decoded and processed frames live in reused buffers; the cached copy must not.
+                from frame_buffers import detach
+                frame = detach(frame)
+                self.frame_cache.put(key, frame)
+            return frame
+
+    @staticmethod
+    def _scaled_frame(frame, process, target_size, fast):
+        """Scales a frame to fit inside target_size and applies the effect function at the smaller of the two sizes."""
+        frame_h, frame_w = frame.shape[:2]
+        ratio = min(target_size[0] / frame_w, target_size[1] / frame_h)
+        new_size = (max(1, int(frame_w * ratio)), max(1, int(frame_h * ratio)))
+        if fast:
+            resample, reducing_gap = Image.Resampling.BILINEAR, 2.0
+        else:
+            resample, reducing_gap = Image.Resampling.LANCZOS, None
+        if ratio < 1 and process is not None:
+            # Shrink first, so the effects only touch the pixels that will be shown.
+            with profiler.span("resize"):
+                frame = np.asarray(Image.fromarray(frame).resize(new_size, resample, reducing_gap=reducing_gap))
+            return process(frame)
+        if process is not None:
+            frame = process(frame)
+        with profiler.span("resize"):
+            return np.asarray(Image.fromarray(frame).resize(new_size, resample, reducing_gap=reducing_gap))
 
     def set_adjustment(self, key, value):
         """Updates an adjustment value (like brightness) and reapplies all effects."""
-        if self.original_clip:
+        if not self.original_clip: return
+        with self.state_lock:
             self.adjustments[key] = value
             self.apply_all_effects()
 
     def reset_all_changes(self):
         """Resets all clips and adjustments back to their original state."""
-        if self.original_clip:
+        if not self.original_clip: return False
+        with self.state_lock:
             # Reset all clip versions to the original video.
             self.clip = self.original_clip
-            self.base_clip = self.original_clip
             self.main_audio_clip = self.original_main_audio
             self.base_main_audio = self.original_main_audio
 
             # Clear any extra audio tracks.
+            for original in self.original_additional_audio_clips:
+                self._release_audio(original)
             self.additional_audio_clips.clear()
             self.original_additional_audio_clips.clear()
+            self.additional_audio_tracks.clear()
+
+            # The clip is back to the original, so every cached frame is stale.
+            self.edits = EditDecisionList(0.0, self.original_clip.duration)
+            self.frame_cache.clear()
 
             # Reset the adjustments dictionary to default values.
-            for key in self.adjustments:
-                if key in ["r", "g", "b", "gamma", "volume", "speed"]:
-                    self.adjustments[key] = 1.0
-                else:
-                    self.adjustments[key] = 0.0
+            self.adjustments.update(DEFAULT_ADJUSTMENTS)
             print("All changes have been reset.")
             # After resetting, apply the default (empty) effects to update the view.
             self.apply_all_effects()
-            return True
-        return False
+        return True
 
     def trim_video(self, start, end):
         """Trims the video and all associated audio tracks."""
         if not self.clip: return False
-        try:
-            current_duration = self.base_clip.duration
-            if start >= end or start > current_duration:
-                print("Invalid trim values.")
+        with self.state_lock:
+            try:
+                current_duration = self.clip.duration
+                if start >= end or start > current_duration:
+                    print("Invalid trim values.")
+                    return False
+
+                end = min(end, current_duration)
+                # Trims are given in timeline seconds; the edit list and the audio tracks count source seconds.
+                speed = self.adjustments.get("speed", 1.0)
+                start, end = start * speed, end * speed
+
+                # The trim is folded into the edit list's source range, so the clips are always
+                # one subclip away from the originals, however many trims have been made.
+                self.edits.trim(start, end)
+                if self.original_main_audio:
+                    main_in = self.edits.source_in
+                    if main_in < self.original_main_audio.duration:
+                        main_out = min(self.edits.source_out, self.original_main_audio.duration)
+                        self.base_main_audio = self.original_main_audio.subclip(main_in, main_out)
+                    else:
+                        self.base_main_audio = None
+                        self.main_audio_clip = None
+
+                # Trim any additional audio tracks as well, again straight from their originals.
+                trimmed_additional = []
+                trimmed_originals = []
+                trimmed_tracks = []
+                for audio, original, track in zip(self.additional_audio_clips, self.original_additional_audio_clips,
+                                                  self.additional_audio_tracks):
+                    if start < audio.duration:
+                        track_in = track["offset"] + start
+                        track_out = track["offset"] + min(end, audio.duration)
+                        trimmed_additional.append(original.subclip(track_in, track_out))
+                        trimmed_originals.append(original)
+                        trimmed_tracks.append(dict(track, offset=track_in))
+                    else:
+                        self._release_audio(original)
+                self.additional_audio_clips = trimmed_additional
+                self.original_additional_audio_clips = trimmed_originals
+                self.additional_audio_tracks = trimmed_tracks
+
+                # The time base has changed, so frames cached for the old range are stale.
+                self.frame_cache.clear()
+
+                # Re-apply all current effects to the newly trimmed range.
+                self.apply_all_effects()
+                return True
+            except Exception as e:
+                print(f"ERROR during trim: {e}")
                 return False
 
-            end = min(end, current_duration)
+    def apply_filter(self, filter_name):
+        """Applies a permanent filter to the video. Returns False for an unknown filter."""
+        if not self.clip: return False
+        with self.state_lock:
+            if not self.edits.add_filter(filter_name):
+                print(f"Unknown filter: {filter_name}")
+                return False
+            self.frame_cache.clear()
+            # Rebuild the clip with the new filter list and the adjustments on top.
+            self.apply_all_effects()
+        return True
 
-            # The trim is applied to the 'base' clips.
-            self.base_clip = self.base_clip.subclip(start, end)
-            if self.base_main_audio:
-                if start < self.base_main_audio.duration:
-                    self.base_main_audio = self.base_main_audio.subclip(start, min(end, self.base_main_audio.duration))
+    def set_track_gain(self, track_index, gain):
+        """Sets the gain of an additional audio track (0 is the first imported track)."""
+        if 0 <= track_index < len(self.additional_audio_tracks):
+            self.additional_audio_tracks[track_index]["gain"] = gain
 
-            # Trim any additional audio tracks as well.
-            trimmed_additional = []
-            for audio in self.additional_audio_clips:
-                if start < audio.duration:
-                    audio_end = min(end, audio.duration)
-                    trimmed_additional.append(audio.subclip(start, audio_end))
-            self.additional_audio_clips = trimmed_additional
+    def build_audio_mixer(self):
+        """
+        Returns an AudioMixer holding the main and additional audio tracks for the current edit,
+        or None if there is no audio. The main track is scaled by the volume adjustment, and every
+        track is time-stretched by the speed adjustment.
+        """
+        mixer = AudioMixer()
+        duration = self.clip.duration
+        for path, offset, track_duration, speed, gain in self._audio_tracks():
+            mixer.add_track(path, offset=offset, duration=min(duration, track_duration), gain=gain, speed=speed)
+        return mixer if mixer.tracks else None
 
-            # Re-apply all current effects to the newly trimmed base clip.
-            self.apply_all_effects()
+    def audio_track_sources(self):
+        """
+        Returns (path, offset, duration, speed) for every audio track in timeline order (main track first):
+        the track starts `offset` seconds into the file, lasts `duration` timeline seconds, and plays
+        `speed` source seconds per timeline second.
+        """
+        return [track[:4] for track in self._audio_tracks()]
+
+    def _audio_tracks(self):
+        """(path, offset, duration, speed, gain) for every audio track, main track first."""
+        # The audio clips keep the source timing; the speed is applied when the tracks are mixed.
+        speed = self.adjustments.get("speed", 1.0)
+        tracks = []
+        if self.main_audio_clip and self.source_path:
+            tracks.append((self.source_path, self.source_time_offset(), self.main_audio_clip.duration / speed, speed,
+                           self.adjustments.get("volume", 1.0)))
+        for aud_clip, track in zip(self.additional_audio_clips, self.additional_audio_tracks):
+            tracks.append((track["path"], track["offset"], aud_clip.duration / speed, speed, track["gain"]))
+        return tracks
+
+    def write_final_audio(self, output_path):
+        """Mixes all audio tracks to the video's length and encodes them. Returns False if there is no audio."""
+        mixer = self.build_audio_mixer()
+        if not mixer: return False
+        mixer.write_audiofile(output_path, self.clip.duration)
+        return True
+
+    def _export_trim_only(self, output_path, job=None):
+        """
+        Exports a trim-only edit with stream copy. Returns False if it cannot be cut that way, so the caller re-encodes.
+        The copy reports all of `job`'s frames in one step when it is done. It cannot be interrupted, so a
+        cancel is honoured before it starts and before its output, written under a temporary name, is renamed.
+        """
+        total_frames = int(math.ceil(self.clip.duration * self.clip.fps - 0.00001))
+        if job:
+            job.raise_if_cancelled()
+            job.begin(total_frames)
+        start = self.source_time_offset()
+        root, extension = os.path.splitext(output_path)
+        partial_path = f"{root}.part{extension}"
+        try:
+            with profiler.span("export.smart_trim", "export"):
+                copied = export_trim_only(self.source_path, start, start + self.clip.duration,
+                                          self.clip.fps, partial_path)
+            if not copied: return False
+            if job: job.raise_if_cancelled()
+            os.replace(partial_path, output_path)
+            if job: job.advance(total_frames)
             return True
-        except Exception as e:
-            print(f"ERROR during trim: {e}")
+        except IOError as e:
+            print(f"Warning: stream-copy export failed, re-encoding instead. Reason: {e}")
             return False
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
 
-    def apply_filter(self, filter_name):
-        """Applies a permanent filter to the video."""
-        if not self.clip: return
-        # Filters are applied directly to the base_clip.
-        if filter_name == 'grayscale':
-            self.base_clip = self.base_clip.fx(vfx.blackwhite)
-        elif filter_name == 'invert_colors':
-            self.base_clip = self.base_clip.fx(vfx.invert_colors)
-        elif filter_name == 'mirror_x':
-            self.base_clip = self.base_clip.fx(vfx.mirror_x)
-        # Re-apply adjustments on top of the new filtered base.
-        self.apply_all_effects()
-
-    def export_video(self, output_path):
-        """Exports the final edited video to a file."""
+    def is_trim_only(self):
+        """True when the only edits are trims: no filters, default adjustments and no extra audio tracks."""
+        if not self.source_path or self.additional_audio_clips: return False
+        if self.edits.pipeline_filters(): return False
+        return all(self.adjustments.get(key, value) == value for key, value in DEFAULT_ADJUSTMENTS.items())
+
+    def snapshot(self):
+        """
+        Returns a copy of this backend's edit state for a background export. Later trims, filters and
+        adjustments change the live backend only; the clips and readers themselves are shared.
+        """
+        snapshot = copy.copy(self)
+        snapshot.edits = self.edits.copy()
+        snapshot.adjustments = dict(self.adjustments)
+        snapshot.additional_audio_clips = list(self.additional_audio_clips)
+        snapshot.original_additional_audio_clips = list(self.original_additional_audio_clips)
+        snapshot.additional_audio_tracks = [dict(track) for track in self.additional_audio_tracks]
+        return snapshot
+
+    def queue_export(self, output_path, workers=None, encoder=None, callback=None):
+        """
+        Queues an export of the current edit state and returns at once with its export_queue.ExportJob,
+        or None if no video is loaded. `callback(job)` is called from the export thread as it progresses.
+        """
+        if not self.clip: return None
+        return self.exports.submit(self.snapshot(), output_path, workers, encoder, callback)
+
+    def export_video(self, output_path, workers=None, encoder=None, job=None):
+        """
+        Exports the final edited video to a file.
+        Always renders from the full-resolution source, never from the preview proxy.
+        Trim-only edits are exported with stream copy. Otherwise the timeline is rendered in chunks
+        kept in the render cache, so that only the chunks an edit changed are rendered again;
+        without the cache, more than one worker renders it in parallel segments.
+        `encoder` overrides the encoder settings for this export, e.g. {"preset": "fast", "crf": 20};
+        see export_pipeline.DEFAULT_ENCODER. `job` is the ExportJob when running from the export queue.
+        """
         if not self.clip: return False
+        workers = workers or self.export_workers
         try:
-            final_clip = self.clip
-            all_audio_tracks = []
-
-            if self.main_audio_clip:
-                adjusted_main_audio = self.main_audio_clip.set_duration(self.clip.duration)
-                all_audio_tracks.append(adjusted_main_audio)
+            if self.is_trim_only() and self._export_trim_only(output_path, job):
+                return True
 
-            for aud_clip in self.additional_audio_clips:
-                all_audio_tracks.append(aud_clip.set_duration(self.clip.duration))
+            if self.render_cache is not None and self.source_path:
+                export_chunked(self, output_path, self.render_cache, workers, encoder, job=job)
+                return True
 
-            # Combine all audio tracks if there are any.
-            if all_audio_tracks:
-                final_audio = CompositeAudioClip(all_audio_tracks)
-                final_clip = final_clip.set_audio(final_audio)
+            if workers > 1 and self.source_path:
+                export_parallel(self, output_path, workers=workers, encoder=encoder, job=job)
+                return True
 
-            # Write the final video file with a progress bar in the console.
-            final_clip.write_videofile(output_path, codec="libx264", audio_codec="aac",
-                                       threads=4, preset="medium", logger='bar')
+            # Decode, effects, encode and the audio mix run as concurrent stages.
+            export_pipelined(self, output_path, encoder, job=job)
             return True
+        except ExportCancelled:
+            print(f"Export to {output_path} cancelled.")
+            return False
         except Exception as e:
             print(f"ERROR: Could not export video. Reason: {e}")
             return False
@@ -0,0 +1,181 @@
+"""
+Headless batch rendering of Fiora projects, without the Tk UI.
+
+A project file holds one edit as JSON, or a list of them:
+
+    {
+        "source": "input.mp4",
+        "output": "output.mp4",
+        "trim": [2.0, 10.5],
+        "filters": ["grayscale"],
+        "adjustments": {"brightness": 10, "gamma": 1.2},
+        "audio_tracks": [{"path": "music.mp3", "gain": 0.5}],
+        "encoder": {"preset": "fast", "crf": 20}
+    }
+
+Every key except "source" and "output" is optional. Relative paths are resolved against
+the folder of the project file. The edits are replayed in the same order as in the editor:
+audio tracks, trim, filters, then adjustments. "encoder" overrides the export's codec, preset,
+crf and threads.
+
+Usage:
+    python batch_render.py projects/*.json [--jobs 2] [--export-workers 1] [--effect-threads 1]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# One job per process, each encoding with a single worker, keeps every core busy without oversubscribing.
+DEFAULT_BATCH_JOBS = max(1, (os.cpu_count() or 1) // 2)
+
+
+def load_projects(project_paths):
+    """
+    Reads the project files into a list of job dictionaries.
+    Returns (jobs, failures); a file that cannot be read becomes a failure instead of stopping the batch.
+    """
+    jobs, failures = [], []
+    for project_path in project_paths:
+        try:
+            with open(project_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            failures.append({"name": project_path, "ok": False, "seconds": 0.0, "error": f"Could not read: {e}"})
+            continue
+
+        projects = data if isinstance(data, list) else [data]
+        base_dir = os.path.dirname(os.path.abspath(project_path))
+        for i, project in enumerate(projects):
+            name = project_path if len(projects) == 1 else f"{project_path}[{i}]"
+            error = _project_error(project)
+            if error:
+                failures.append({"name": name, "ok": False, "seconds": 0.0, "error": error})
+                continue
+            job = dict(project, name=name)
+            job["source"] = os.path.join(base_dir, project["source"])
+            job["output"] = os.path.join(base_dir, project["output"])
+            job["audio_tracks"] = [dict(track, path=os.path.join(base_dir, track["path"]))
+                                   for track in project.get("audio_tracks", [])]
+            jobs.append(job)
+    return jobs, failures
+
+
+def _project_error(project):
+    """Returns why a project entry cannot be rendered, or None if its paths are all usable."""
+    if not isinstance(project, dict) or "source" not in project or "output" not in project:
+        return 'A project needs a "source" and an "output".'
+    if not isinstance(project["source"], str) or not isinstance(project["output"], str):
+        return '"source" and "output" must be paths.'
+    tracks = project.get("audio_tracks", [])
+    if not isinstance(tracks, list):
+        return '"audio_tracks" must be a list.'
+    for i, track in enumerate(tracks):
+        if not isinstance(track, dict) or not isinstance(track.get("path"), str):
+            return f'Audio track {i + 1} needs a "path".'
+    return None
+
+
+def render_project(job, export_workers=1, effect_threads=1):
+    """Replays one project against a fresh backend and exports it. Raises ValueError when a step fails."""
+    # Imported here so spawned workers only load moviepy when they actually render.
+    from backend_processor import FioraBackend
+
+    backend = FioraBackend(use_proxy=False, export_workers=export_workers, effect_threads=effect_threads)
+    try:
+        if not backend.load_video(job["source"]):
+            raise ValueError(f"Could not load video {job['source']}")
+
+        for i, track in enumerate(job.get("audio_tracks", [])):
+            if not backend.load_audio(track["path"]):
+                raise ValueError(f"Could not load audio {track['path']}")
+            backend.set_track_gain(i, track.get("gain", 1.0))
+
+        if job.get("trim"):
+            start, end = job["trim"]
+            if not backend.trim_video(float(start), float(end)):
+                raise ValueError(f"Invalid trim range {start}-{end}")
+
+        for filter_name in job.get("filters", []):
+            if not backend.apply_filter(filter_name):
+                raise ValueError(f"Unknown filter: {filter_name}")
+
+        adjustments = job.get("adjustments", {})
+        unknown = sorted(set(adjustments) - set(backend.adjustments))
+        if unknown:
+            raise ValueError(f"Unknown adjustments: {', '.join(unknown)}")
+        if adjustments:
+            backend.adjustments.update({key: float(value) for key, value in adjustments.items()})
+            backend.apply_all_effects()
+
+        output_dir = os.path.dirname(job["output"])
+        if output_dir: os.makedirs(output_dir, exist_ok=True)
+        if not backend.export_video(job["output"], encoder=job.get("encoder")):
+            raise ValueError(f"Export to {job['output']} failed")
+    finally:
+        backend.close()
+
+
+def _run_job(job, export_workers, effect_threads):
+    """Worker-process entry point: renders one project and reports how it went instead of raising."""
+    started = time.perf_counter()
+    try:
+        render_project(job, export_workers, effect_threads)
+        error = None
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    return {"name": job["name"], "ok": error is None, "seconds": time.perf_counter() - started, "error": error}
+
+
+def run_batch(jobs, max_jobs=DEFAULT_BATCH_JOBS, export_workers=1, effect_threads=1):
+    """Renders the jobs across a pool of `max_jobs` worker processes. Returns one result dictionary per job."""
+    if not jobs: return []
+    results = []
+    # 'spawn' gives each job a clean interpreter, the same way the parallel export does.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(max_jobs, len(jobs)), mp_context=context) as pool:
+        futures = [pool.submit(_run_job, job, export_workers, effect_threads) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            status = "done" if result["ok"] else f"FAILED: {result['error']}"
+            print(f"[{len(results) + 1}/{len(jobs)}] {result['name']} ({result['seconds']:.1f}s) {status}")
+            results.append(result)
+    return results
+
+
+def print_summary(results, elapsed):
+    """Prints per-job timings and the list of failed jobs."""
+    failed = [result for result in results if not result["ok"]]
+    print(f"\n{'project':<50}{'time (s)':>10}  status")
+    for result in sorted(results, key=lambda r: r["name"]):
+        print(f"{result['name'][-50:]:<50}{result['seconds']:>10.1f}  {'ok' if result['ok'] else 'FAILED'}")
+    print(f"\n{len(results) - len(failed)} of {len(results)} projects rendered in {elapsed:.1f}s.")
+    if failed:
+        print("Failures:")
+        for result in failed:
+            print(f"  {result['name']}: {result['error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render Fiora project files without the editor UI.")
+    parser.add_argument("projects", nargs="+", help="JSON project files")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_BATCH_JOBS,
+                        help=f"projects rendered at the same time (default {DEFAULT_BATCH_JOBS})")
+    parser.add_argument("--export-workers", type=int, default=1,
+                        help="parallel export workers inside each project (default 1)")
+    parser.add_argument("--effect-threads", type=int, default=1,
+                        help="threads for the frame effects inside each project (default 1)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    jobs, failures = load_projects(args.projects)
+    results = failures + run_batch(jobs, max(1, args.jobs), max(1, args.export_workers), max(1, args.effect_threads))
+    print_summary(results, time.perf_counter() - started)
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
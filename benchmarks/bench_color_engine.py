@@ -0,0 +1,82 @@
+"""
+Per-frame latency of the colour stage at 1080p and 4K, before and after the fused LUT engine.
+
+"Before" is the old chain of vfx.lum_contrast -> vfx.gamma_corr -> RGB multiply,
+"after" is the single ColorLUT stage used by FioraBackend.apply_all_effects.
+
+Usage:
+    python benchmarks/bench_color_engine.py [--repeats 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from moviepy.editor import VideoClip, vfx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from color_engine import ColorLUT  # noqa: E402
+
+RESOLUTIONS = {"1080p": (1080, 1920), "4K": (2160, 3840)}
+SETTINGS = {"brightness": 12.0, "contrast": 0.3, "gamma": 1.2, "r": 1.1, "g": 0.9, "b": 1.05}
+
+
+def _legacy_rgb(frame, r, g, b):
+    new_frame = frame.astype('float64')
+    new_frame[:, :, 0] *= r
+    new_frame[:, :, 1] *= g
+    new_frame[:, :, 2] *= b
+    return np.clip(new_frame, 0, 255).astype('uint8')
+
+
+def _source_clip(frame):
+    # A plain VideoClip, because ImageClip would bake the effects into its image once.
+    return VideoClip(lambda t: frame, duration=1)
+
+
+def build_legacy_clip(frame, s):
+    clip = _source_clip(frame)
+    clip = clip.fx(vfx.lum_contrast, lum=s["brightness"], contrast=s["contrast"])
+    clip = clip.fx(vfx.gamma_corr, gamma=s["gamma"])
+    return clip.fl_image(lambda f: _legacy_rgb(f, s["r"], s["g"], s["b"]))
+
+
+def build_fused_clip(frame, s):
+    return _source_clip(frame).fl_image(ColorLUT.from_adjustments(s))
+
+
+def time_frame(clip, repeats):
+    """Returns the median get_frame() latency in milliseconds."""
+    clip.get_frame(0)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        clip.get_frame(0)
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'resolution':<12}{'chained (ms)':>14}{'fused LUT (ms)':>16}{'speedup':>10}")
+    for name, (h, w) in RESOLUTIONS.items():
+        frame = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+        legacy = build_legacy_clip(frame, SETTINGS)
+        fused = build_fused_clip(frame, SETTINGS)
+
+        # The fused stage must be a drop-in replacement, so check the output first.
+        if not np.array_equal(legacy.get_frame(0), fused.get_frame(0)):
+            print(f"WARNING: fused output differs from the chained output at {name}")
+
+        before = time_frame(legacy, args.repeats)
+        after = time_frame(fused, args.repeats)
+        print(f"{name:<12}{before:>14.1f}{after:>16.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
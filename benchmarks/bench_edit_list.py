@@ -0,0 +1,84 @@
+"""
+get_frame() latency as edits pile up: the old nested clip chain versus the flattened edit list.
+
+Two edit patterns are measured: trims only, and trims each followed by a filter (cycling
+through invert_colors, mirror_x and grayscale). The nested chain wraps the clip in one more
+subclip and one more fl_image per edit, the way trim_video and apply_filter used to; the edit
+list renders one subclip and one image stage, and drops filter combinations that are no-ops.
+
+Usage:
+    python benchmarks/bench_edit_list.py [--edits 0 8 32 128] [--repeats 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from moviepy.editor import VideoClip, vfx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from edit_list import EditDecisionList  # noqa: E402
+
+FILTERS = ["invert_colors", "mirror_x", "grayscale"]
+MOVIEPY_FILTERS = {"invert_colors": vfx.invert_colors, "mirror_x": vfx.mirror_x, "grayscale": vfx.blackwhite}
+
+
+def _source_clip(frame):
+    # A plain VideoClip, because ImageClip would bake the effects into its image once.
+    return VideoClip(lambda t: frame, duration=600)
+
+
+def build_nested_clip(frame, edit_count, with_filters):
+    clip = _source_clip(frame)
+    for i in range(edit_count):
+        clip = clip.subclip(0.01, clip.duration)
+        if with_filters:
+            clip = clip.fx(MOVIEPY_FILTERS[FILTERS[i % len(FILTERS)]])
+    return clip
+
+
+def build_flat_clip(frame, edit_count, with_filters):
+    source = _source_clip(frame)
+    edits = EditDecisionList(0.0, source.duration)
+    for i in range(edit_count):
+        edits.trim(0.01, edits.duration(source.duration))
+        if with_filters:
+            edits.add_filter(FILTERS[i % len(FILTERS)])
+    return edits.render(source)
+
+
+def time_frame(clip, repeats):
+    """Returns the median get_frame() latency in milliseconds."""
+    clip.get_frame(1.0)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        clip.get_frame(1.0)
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--edits", type=int, nargs="+", default=[0, 8, 32, 128])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    frame = np.random.default_rng(0).integers(0, 256, (360, 640, 3), dtype=np.uint8)
+    for with_filters in (False, True):
+        print(f"\n{'trims + filters' if with_filters else 'trims only'}, 640x360")
+        print(f"{'edits':<8}{'nested (ms)':>13}{'edit list (ms)':>16}{'speedup':>10}")
+        for edit_count in args.edits:
+            nested = build_nested_clip(frame, edit_count, with_filters)
+            flat = build_flat_clip(frame, edit_count, with_filters)
+            if not np.array_equal(nested.get_frame(1.0), flat.get_frame(1.0)):
+                print(f"WARNING: edit list output differs from the nested chain with {edit_count} edits")
+
+            before = time_frame(nested, args.repeats)
+            after = time_frame(flat, args.repeats)
+            print(f"{edit_count:<8}{before:>13.3f}{after:>16.3f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Memory traffic of the frame path: moviepy's allocating reader and vfx chain versus pooled buffers.
+
+Two scenarios, each in its own subprocess so peak RSS is measured per run:
+  * preview   decode, grayscale + brightness/contrast + gamma, scale to 960x540 for the canvas
+  * export    decode, the same effects, and hand the frame to an ffmpeg encoder
+
+"legacy" decodes with moviepy's reader (a new bytes object and array per frame) and applies
+vfx.blackwhite, vfx.lum_contrast and vfx.gamma_corr, which allocate float frames at every step.
+"pooled" decodes into a reused frame ring and applies the edit list's in-place stages and ColorLUT.
+
+Reported: the largest transient allocation while handling one frame (tracemalloc), those
+transient allocations as a rate, the time per frame, and the process's peak RSS.
+
+Usage:
+    python benchmarks/bench_frame_memory.py [--resolution 1080p] [--frames 60]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from synthetic_media import video_path  # noqa: E402
+
+ADJUSTMENTS = {"brightness": 12.0, "contrast": 0.3, "gamma": 1.2}
+PREVIEW_SIZE = (960, 540)
+# Enough frames to fill every buffer ring before measuring.
+WARMUP_FRAMES = 8
+
+
+def _legacy_clip(path):
+    from moviepy.editor import VideoFileClip, vfx
+    clip = VideoFileClip(path, audio=False)
+    clip = clip.fx(vfx.blackwhite)
+    clip = clip.fx(vfx.lum_contrast, lum=ADJUSTMENTS["brightness"], contrast=ADJUSTMENTS["contrast"])
+    return clip.fx(vfx.gamma_corr, ADJUSTMENTS["gamma"])
+
+
+def _pooled_clip(path):
+    from moviepy.editor import VideoFileClip
+    from color_engine import ColorLUT
+    from edit_list import EditDecisionList
+    from frame_buffers import use_frame_pool
+    clip = use_frame_pool(VideoFileClip(path, audio=False))
+    edits = EditDecisionList(0.0, clip.duration)
+    edits.add_filter("grayscale")
+    return edits.render(clip, ColorLUT.from_adjustments(ADJUSTMENTS))
+
+
+def run_scenario(path, scenario, variant, frame_count):
+    """Runs one scenario in this process and returns its measurements."""
+    import numpy as np
+    from PIL import Image
+    from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+    from export_pipeline import write_frame
+
+    clip = _pooled_clip(path) if variant == "pooled" else _legacy_clip(path)
+    writer = None
+    if scenario == "export":
+        output = os.path.join(tempfile.mkdtemp(prefix="fiora_bench_"), "out.mp4")
+        writer = FFMPEG_VideoWriter(output, clip.size, clip.fps, preset="ultrafast")
+    # Warm up, so one-time allocations (buffer rings, lookup tables) are not counted.
+    for index in range(WARMUP_FRAMES):
+        clip.get_frame(index / clip.fps)
+
+    tracemalloc.start()
+    peaks, allocated = [], 0
+    start = time.perf_counter()
+    for index in range(WARMUP_FRAMES, WARMUP_FRAMES + frame_count):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        frame = clip.get_frame(index / clip.fps)
+        if writer:
+            if variant == "pooled":
+                write_frame(writer, frame)
+            else:
+                writer.write_frame(frame)
+        else:
+            image = Image.fromarray(np.asarray(frame, dtype=np.uint8))
+            image.resize(PREVIEW_SIZE, Image.Resampling.BILINEAR)
+        peak = tracemalloc.get_traced_memory()[1]
+        peaks.append(peak - before)
+        allocated += peak - before
+        del frame
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    if writer:
+        writer.close()
+    clip.close()
+    return {
+        "peak_mb_per_frame": max(peaks) / 2 ** 20,
+        "allocated_mb_per_s": allocated / 2 ** 20 / elapsed,
+        "ms_per_frame": elapsed / frame_count * 1000,
+        # ru_maxrss is in kilobytes on Linux.
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resolution", default="1080p")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--media-dir", help="folder for the generated test media (reused between runs)")
+    parser.add_argument("--run", nargs=2, metavar=("SCENARIO", "VARIANT"), help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_scenario(args.path, args.run[0], args.run[1], args.frames)))
+        return
+
+    media_dir = args.media_dir or os.path.join(tempfile.gettempdir(), "fiora_bench_media")
+    os.makedirs(media_dir, exist_ok=True)
+    path = video_path(media_dir, args.resolution, max(5, args.frames // 30 + 3))
+
+    print(f"{args.frames} frames at {args.resolution}")
+    print(f"{'scenario':<10}{'variant':<9}{'peak/frame':>12}{'alloc rate':>14}{'time/frame':>12}{'peak RSS':>11}")
+    for scenario in ("preview", "export"):
+        for variant in ("legacy", "pooled"):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--run", scenario, variant,
+                                     "--path", path, "--frames", str(args.frames)],
+                                    capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{scenario:<10}{variant:<9}{result['peak_mb_per_frame']:>10.1f}MB"
+                  f"{result['allocated_mb_per_s']:>10.0f}MB/s{result['ms_per_frame']:>10.1f}ms"
+                  f"{result['peak_rss_mb']:>9.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Export throughput (encoded frames/sec) against the number of export worker processes.
+
+A synthetic test clip is generated with ffmpeg's testsrc2 source, a colour adjustment is
+applied so the effect chain is exercised, and the clip is exported once per worker count.
+
+Usage:
+    python benchmarks/bench_parallel_export.py [--size 1920x1080] [--seconds 10] [--workers 1 2 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend_processor import FioraBackend  # noqa: E402
+from synthetic_media import make_video  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--seconds", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="fiora_bench_") as temp_dir:
+        source = os.path.join(temp_dir, "source.mp4")
+        make_video(source, args.size, args.seconds)
+
+        backend = FioraBackend(use_proxy=False, render_cache_mb=0)
+        backend.load_video(source)
+        backend.set_adjustment("contrast", 0.2)
+        backend.set_adjustment("r", 1.1)
+        total_frames = int(backend.clip.duration * backend.clip.fps)
+
+        results = []
+        for workers in args.workers:
+            output = os.path.join(temp_dir, f"export_{workers}.mp4")
+            start = time.perf_counter()
+            if not backend.export_video(output, workers=workers):
+                print(f"Export with {workers} worker(s) failed.")
+                continue
+            elapsed = time.perf_counter() - start
+            results.append((workers, elapsed, total_frames / elapsed))
+        backend.close()
+
+    print(f"\n{args.size}, {args.seconds}s, {total_frames} frames")
+    print(f"{'workers':<10}{'seconds':>10}{'frames/sec':>12}{'speedup':>10}")
+    for workers, elapsed, fps in results:
+        print(f"{workers:<10}{elapsed:>10.2f}{fps:>12.1f}{results[0][1] / elapsed:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Re-export time with the chunk render cache, after the kinds of small edits made between two exports.
+
+The first export renders every chunk; each later one changes one thing and reports how many chunks
+it could reuse. An export without the cache gives the full re-render time they are compared against.
+The cache lives in a temporary folder, so earlier runs do not count.
+
+Usage:
+    python benchmarks/bench_render_cache.py [--resolution 720p] [--seconds 30] [--workers 1]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend_processor import FioraBackend  # noqa: E402
+from render_cache import export_chunked  # noqa: E402
+from synthetic_media import video_path  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resolution", default="720p")
+    parser.add_argument("--seconds", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--media-dir", help="folder for the generated test media (reused between runs)")
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="fiora_bench_cache_")
+    # Read when the backend creates its render cache.
+    os.environ["FIORA_CACHE_DIR"] = cache_dir
+
+    media_dir = args.media_dir or os.path.join(tempfile.gettempdir(), "fiora_bench_media")
+    os.makedirs(media_dir, exist_ok=True)
+    path = video_path(media_dir, args.resolution, args.seconds)
+    output_path = os.path.join(cache_dir, "out.mp4")
+
+    backend = FioraBackend(use_proxy=False, export_workers=args.workers)
+    backend.load_video(path)
+    backend.set_adjustment("contrast", 0.2)
+    edits = [
+        ("first export", lambda: None),
+        ("unchanged", lambda: None),
+        ("trim end -1s", lambda: backend.trim_video(0, backend.clip.duration - 1)),
+        ("trim start +1s", lambda: backend.trim_video(1, backend.clip.duration)),
+        ("brightness +10", lambda: backend.set_adjustment("brightness", 10)),
+        ("brightness back", lambda: backend.set_adjustment("brightness", 0.0)),
+    ]
+    print(f"{args.resolution}, {args.seconds}s source, {args.workers} worker(s)")
+    print(f"{'edit':<18}{'seconds':>9}{'reused':>8}{'rendered':>10}")
+    try:
+        for name, edit in edits:
+            edit()
+            result = export_chunked(backend, output_path, backend.render_cache, args.workers)
+            print(f"{name:<18}{result['seconds']:>9.2f}{result['reused']:>8}{result['rendered']:>10}")
+
+        cache, backend.render_cache = backend.render_cache, None
+        start = time.perf_counter()
+        backend.export_video(output_path)
+        print(f"{'without the cache':<18}{time.perf_counter() - start:>9.2f}")
+        backend.render_cache = cache
+    finally:
+        backend.close()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Random-access seek latency: moviepy's single reader versus the keyframe-indexed decoder pool.
+
+The test clip has a long GOP (one keyframe every --gop seconds, like camera footage), which is
+where moviepy's restart-and-decode-forward seeks hurt most. Two access patterns are timed:
+  * jumps   clicks at random places on the timeline
+  * scrub   dragging the playhead: short steps back and forth, with an occasional jump elsewhere
+
+Usage:
+    python benchmarks/bench_seek.py [--resolution 720p] [--seconds 60] [--gop 5] [--seeks 60]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from moviepy.editor import VideoFileClip
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_buffers import use_frame_pool  # noqa: E402
+from seek_index import KeyframeIndex, use_decoder_pool  # noqa: E402
+from synthetic_media import RESOLUTIONS, make_video  # noqa: E402
+
+
+def jump_times(rng, duration, count):
+    return list(rng.uniform(0, duration - 0.5, count))
+
+
+def scrub_times(rng, duration, count):
+    times, t = [], duration / 2
+    for _ in range(count):
+        if rng.random() < 0.05:
+            t = rng.uniform(0, duration - 0.5)
+        else:
+            t = min(max(t + rng.uniform(-0.5, 0.5), 0.0), duration - 0.5)
+        times.append(t)
+    return times
+
+
+def check_frames(path, pooled, rng, count=5, within=10.0):
+    """Checks seeks in the first seconds against frames decoded in order."""
+    times = sorted(rng.uniform(0, within, count))
+    reference = VideoFileClip(path, audio=False)
+    indices = {int(reference.fps * t + 0.00001): t for t in times}
+    for index, frame in enumerate(reference.iter_frames()):
+        if index in indices and not np.array_equal(frame, pooled.get_frame(indices[index])):
+            print(f"WARNING: the decoder pool returned a different frame at {indices[index]:.3f}s")
+        if index >= max(indices): break
+    reference.close()
+
+
+def time_seeks(clips, times):
+    """Returns the seek latencies of each clip in milliseconds. The clips take turns, so load spikes hit both."""
+    samples = [[] for _ in clips]
+    for t in times:
+        for clip, clip_samples in zip(clips, samples):
+            start = time.perf_counter()
+            clip.get_frame(t)
+            clip_samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resolution", default="720p")
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--gop", type=float, default=5.0, help="seconds between keyframes")
+    parser.add_argument("--seeks", type=int, default=60)
+    parser.add_argument("--media-dir", help="folder for the generated test media (reused between runs)")
+    args = parser.parse_args()
+
+    media_dir = args.media_dir or os.path.join(tempfile.gettempdir(), "fiora_bench_media")
+    os.makedirs(media_dir, exist_ok=True)
+    path = os.path.join(media_dir, f"testsrc_{args.resolution}_{args.seconds}s_gop{args.gop:g}.mp4")
+    make_video(path, RESOLUTIONS[args.resolution], args.seconds, gop_seconds=args.gop, audio=False)
+
+    start = time.perf_counter()
+    index = KeyframeIndex.load_or_build(path)
+    print(f"Keyframe index: {len(index.times)} keyframes, loaded in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    rng = np.random.default_rng(0)
+    patterns = {"jumps": jump_times(rng, args.seconds, args.seeks), "scrub": scrub_times(rng, args.seconds, args.seeks)}
+    print(f"\n{args.resolution}, {args.seconds}s, keyframe every {args.gop:g}s, {args.seeks} seeks")
+    print(f"{'pattern':<9}{'decoder':<10}{'median (ms)':>13}{'p95 (ms)':>11}")
+    for name, times in patterns.items():
+        plain = VideoFileClip(path, audio=False)
+        pooled = use_decoder_pool(use_frame_pool(VideoFileClip(path, audio=False)), index_keyframes=False)
+        pooled.reader.keyframes = index
+        for label, samples in zip(("moviepy", "pool"), time_seeks((plain, pooled), times)):
+            print(f"{name:<9}{label:<10}{np.median(samples):>13.1f}{np.percentile(samples, 95):>11.1f}")
+        check_frames(path, pooled, rng)
+        plain.close()
+        pooled.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Editor startup time: how long after launch the window is up, and how long until the first preview
+frame of a video opened from the command line is drawn.
+
+Each run starts `python main_ui.py <video>` in a new process with FIORA_STARTUP_REPORT set, so the
+editor writes the wall-clock time of each milestone and closes itself. Times are counted from just
+before the process starts, so they include the interpreter and every import. The first run fills the
+on-disk caches (icons, keyframe index), as the first launch after an install would; the medians are
+over the runs after it. Needs a display.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--resolution 720p]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from synthetic_media import video_path  # noqa: E402
+
+# In the order they happen: main_ui's imports are done, the window is shown, the first frame is drawn.
+MILESTONES = ("imported", "first_window", "first_frame")
+
+
+def measure_startup(video=None, cache_dir=None, timeout=120):
+    """
+    Launches the editor once, opening `video` if given. Returns {milestone: seconds after launch}.
+    Raises RuntimeError if the editor closes without writing its report (e.g. without a display).
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory(prefix="fiora_startup_") as temp_dir:
+        report_path = os.path.join(temp_dir, "startup.json")
+        env = dict(os.environ, FIORA_STARTUP_REPORT=report_path)
+        if cache_dir:
+            env["FIORA_CACHE_DIR"] = cache_dir
+        command = [sys.executable, os.path.join(root, "main_ui.py")] + ([os.path.abspath(video)] if video else [])
+        launched = time.time()
+        try:
+            # Run from the project folder, where the editor finds its assets.
+            result = subprocess.run(command, cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                    universal_newlines=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"The editor did not reach its last startup milestone within {timeout}s.")
+        if not os.path.exists(report_path):
+            error = result.stderr.strip().splitlines()
+            raise RuntimeError(f"The editor did not report its startup. {error[-1] if error else ''}")
+        with open(report_path, "r", encoding="utf-8") as f:
+            marks = json.load(f)
+    return {name: marks[name] - launched for name in MILESTONES if marks.get(name) is not None}
+
+
+def median_startup(video=None, runs=5):
+    """Median milestone times over `runs` launches, after one launch that fills a fresh cache folder."""
+    with tempfile.TemporaryDirectory(prefix="fiora_startup_cache_") as cache_dir:
+        first = measure_startup(video, cache_dir)
+        samples = [measure_startup(video, cache_dir) for _ in range(runs)]
+    return first, {name: statistics.median(sample[name] for sample in samples) for name in first}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--resolution", default="720p")
+    parser.add_argument("--seconds", type=int, default=10)
+    parser.add_argument("--media-dir", help="folder for the generated test media (reused between runs)")
+    args = parser.parse_args()
+
+    media_dir = args.media_dir or os.path.join(tempfile.gettempdir(), "fiora_bench_media")
+    os.makedirs(media_dir, exist_ok=True)
+    path = video_path(media_dir, args.resolution, args.seconds)
+
+    print(f"{'launch':<30}" + "".join(f"{name + ' (s)':>18}" for name in MILESTONES))
+    for label, video in (("empty window", None), (f"{args.resolution} video", path)):
+        try:
+            first, median = median_startup(video, args.runs)
+        except RuntimeError as e:
+            print(e)
+            return 1
+        for row, times in ((f"{label}, first run", first), (f"{label}, median of {args.runs}", median)):
+            print(f"{row:<30}" + "".join(f"{times[name]:>18.3f}" if name in times else f"{'-':>18}"
+                                         for name in MILESTONES))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
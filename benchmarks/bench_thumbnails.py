@@ -0,0 +1,73 @@
+"""
+Timeline filmstrip: how long the thumbnail strip of a video takes to build, and to redraw with effects.
+
+The strip is built from keyframes only; the full decode it falls back to for videos with sparse
+keyframes is timed alongside, on the same file. Loading the strip from the disk cache is what every
+later session pays. The last column derives a screen of thumbnails (at the default zoom, with a
+filter and a colour change) from the cached ones, as a slider change does.
+
+Usage:
+    python benchmarks/bench_thumbnails.py [--resolutions 720p,1080p] [--seconds 60]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import thumbnail_strip  # noqa: E402
+from color_engine import ColorLUT  # noqa: E402
+from edit_list import EditDecisionList  # noqa: E402
+from synthetic_media import video_path  # noqa: E402
+from thumbnail_strip import ThumbnailStrip  # noqa: E402
+
+# Thumbnails on a 1200 pixel wide timeline.
+SCREEN_WIDTH = 1200
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resolutions", default="720p,1080p")
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--media-dir", help="folder for the generated test media (reused between runs)")
+    args = parser.parse_args()
+
+    media_dir = args.media_dir or os.path.join(tempfile.gettempdir(), "fiora_bench_media")
+    os.makedirs(media_dir, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(prefix="fiora_bench_")
+    process = EditDecisionList(filters=["grayscale"]).frame_function(ColorLUT(contrast=0.2))
+
+    print(f"{args.seconds}s sources")
+    print(f"{'resolution':<12}{'thumbs':>7}{'keyframes (s)':>15}{'full decode (s)':>17}{'cached (ms)':>13}"
+          f"{'screen (ms)':>13}")
+    try:
+        for resolution in args.resolutions.split(","):
+            path = video_path(media_dir, resolution, args.seconds)
+            strip, keyframe_seconds = timed(lambda: ThumbnailStrip.build(path))
+            # A zero gap limit makes every video count as having sparse keyframes.
+            limit, thumbnail_strip.MAX_KEYFRAME_GAP_SECONDS = thumbnail_strip.MAX_KEYFRAME_GAP_SECONDS, 0.0
+            try:
+                _full, full_seconds = timed(lambda: ThumbnailStrip.build(path))
+            finally:
+                thumbnail_strip.MAX_KEYFRAME_GAP_SECONDS = limit
+            cache_path = os.path.join(temp_dir, "strip.npz")
+            strip.save(cache_path)
+            strip, load_seconds = timed(lambda: ThumbnailStrip.load(cache_path))
+            indexes = [i % len(strip.times) for i in range(SCREEN_WIDTH // strip.width + 1)]
+            _images, screen_seconds = timed(lambda: [strip.image(i, process) for i in indexes])
+            print(f"{resolution:<12}{len(strip.times):>7}{keyframe_seconds:>15.2f}{full_seconds:>17.2f}"
+                  f"{load_seconds * 1000:>13.1f}{screen_seconds * 1000:>13.1f}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
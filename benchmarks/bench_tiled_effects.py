@@ -0,0 +1,77 @@
+"""
+Scaling of the tiled frame effects used by export, from one thread up to the core count.
+
+Each frame goes through the edit list's image stage (grayscale or not, invert, colour LUT and
+mirror), with the rows split into one tile per thread. The output is checked against the
+single-threaded stage.
+
+Usage:
+    python benchmarks/bench_tiled_effects.py [--size 1920x1080] [--max-threads 8] [--frames 30]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from color_engine import ColorLUT  # noqa: E402
+from edit_list import EditDecisionList  # noqa: E402
+
+ADJUSTMENTS = {"brightness": 12.0, "contrast": 0.3, "gamma": 1.2, "r": 1.1, "g": 0.9, "b": 1.05}
+CHAINS = {
+    "colour+invert+mirror": ["invert_colors", "mirror_x"],
+    "grayscale+colour": ["grayscale"],
+}
+
+
+def time_stage(process, frames):
+    """Returns the median milliseconds per frame, over one warm-up pass and three timed passes."""
+    for frame in frames[:2]:
+        process(frame)
+    samples = []
+    for _ in range(3):
+        start = time.perf_counter()
+        for frame in frames:
+            process(frame)
+        samples.append((time.perf_counter() - start) * 1000 / len(frames))
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--max-threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--frames", type=int, default=30)
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.size.split("x"))
+    rng = np.random.default_rng(0)
+    # A few distinct frames, so the timings are not from a frame sitting in the CPU cache.
+    frames = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(4)]
+    frames = [frames[i % len(frames)] for i in range(args.frames)]
+    thread_counts = sorted({1, 2, 4, 8, 16, args.max_threads} & set(range(1, args.max_threads + 1)))
+    color_stage = ColorLUT.from_adjustments(ADJUSTMENTS)
+
+    print(f"{args.size}, {os.cpu_count()} cores")
+    for name, filters in CHAINS.items():
+        edits = EditDecisionList()
+        for filter_name in filters:
+            edits.add_filter(filter_name)
+        reference = edits.frame_function(color_stage)
+        expected = np.array(reference(frames[0]))
+        print(f"\n{name}")
+        print(f"{'threads':<9}{'ms/frame':>10}{'speedup':>9}")
+        baseline = None
+        for threads in thread_counts:
+            process = edits.frame_function(color_stage, threads)
+            if not np.array_equal(process(frames[0]), expected):
+                print(f"WARNING: {threads} threads give a different frame than one")
+            elapsed = time_stage(process, frames)
+            baseline = baseline or elapsed
+            print(f"{threads:<9}{elapsed:>10.2f}{baseline / elapsed:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Export time of a sped-up timeline: moviepy's speedx versus the time-remap stage.
+
+speedx decodes, converts and pipes every source frame and then drops the ones it does not show,
+so its export time stays tied to the source length. The remap stage has ffmpeg drop those frames
+right after decoding, before they are converted, so only the decode itself (every frame of a
+long-GOP source has to be decoded, shown or not) still follows the source length. The
+"after decode" column takes the time of a plain decode of the source off the remap export;
+it is the part that scales with the output. The audio time-stretch is timed on its own.
+
+Usage:
+    python benchmarks/bench_time_remap.py [--resolution 720p] [--seconds 60] [--speeds 1,2,4,8]
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+from moviepy.editor import VideoFileClip, vfx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio_mixer import load_track_buffer  # noqa: E402
+from backend_processor import FioraBackend  # noqa: E402
+from edit_list import EditDecisionList  # noqa: E402
+from export_pipeline import ExportPipeline, encoder_settings, open_writer, render_edited_video  # noqa: E402
+from ffmpeg_tools import run_ffmpeg  # noqa: E402
+from synthetic_media import make_audio, video_path  # noqa: E402
+from time_remap import stretch_audio  # noqa: E402
+
+
+def export_speedx(path, speed, output_path, encoder):
+    """Exports the whole clip through moviepy's speedx. Returns the output frame count."""
+    source = VideoFileClip(path, audio=False)
+    clip = source.fx(vfx.speedx, speed)
+    frames = int(math.ceil(clip.duration * clip.fps - 0.00001))
+    writer = open_writer(output_path, clip.size, clip.fps, encoder)
+    ExportPipeline().run(clip, None, clip.fps, 0, frames, writer)
+    source.close()
+    return frames
+
+
+def export_remap(path, speed, output_path, encoder):
+    """Exports the whole clip through the time-remap stage. Returns the output frame count."""
+    source = VideoFileClip(path, audio=False)
+    fps, duration = source.fps, source.duration
+    source.close()
+    frames = int(math.ceil(duration / speed * fps - 0.00001))
+    render_edited_video(path, EditDecisionList(), {"speed": speed}, output_path, fps, 0, frames, encoder)
+    return frames
+
+
+def mixed_track_lengths(path, audio_path, speed):
+    """
+    Timeline lengths of an imported audio track, imported before and after the speed change.
+    They should be the same: the order of the two edits must not change the mix.
+    """
+    lengths = []
+    for import_first in (True, False):
+        backend = FioraBackend(use_proxy=False, render_cache_mb=0)
+        backend.load_video(path)
+        if import_first: backend.load_audio(audio_path)
+        backend.set_adjustment("speed", speed)
+        if not import_first: backend.load_audio(audio_path)
+        lengths.append(backend.audio_track_sources()[-1][2])
+        backend.close()
+    return lengths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resolution", default="720p")
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--speeds", default="1,2,4,8")
+    parser.add_argument("--preset", default="veryfast", help="x264 preset for the exports")
+    parser.add_argument("--media-dir", help="folder for the generated test media (reused between runs)")
+    args = parser.parse_args()
+
+    media_dir = args.media_dir or os.path.join(tempfile.gettempdir(), "fiora_bench_media")
+    os.makedirs(media_dir, exist_ok=True)
+    path = video_path(media_dir, args.resolution, args.seconds)
+    encoder = encoder_settings({"preset": args.preset})
+    samples = load_track_buffer(path)
+    # Longer than the video, so both imports are cut to the edited range.
+    audio_path = make_audio(os.path.join(media_dir, f"tone_{args.seconds + 5}s.wav"), args.seconds + 5)
+    output_path = os.path.join(tempfile.mkdtemp(prefix="fiora_bench_"), "out.mp4")
+    start = time.perf_counter()
+    run_ffmpeg(["-i", path, "-an", "-f", "null", "-"])
+    decode_seconds = time.perf_counter() - start
+
+    print(f"{args.resolution}, {args.seconds}s source, x264 {args.preset}, "
+          f"decoding the source takes {decode_seconds:.2f}s")
+    print(f"{'speed':<7}{'frames':>7}{'speedx (s)':>12}{'remap (s)':>11}{'after decode (ms/frame)':>25}"
+          f"{'audio (ms)':>12}")
+    for speed in (float(value) for value in args.speeds.split(",")):
+        start = time.perf_counter()
+        frames = export_speedx(path, speed, output_path, encoder)
+        speedx_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        export_remap(path, speed, output_path, encoder)
+        remap_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        stretched = stretch_audio(samples, speed)
+        audio_ms = (time.perf_counter() - start) * 1000
+        if abs(len(stretched) - len(samples) / speed) > 1:
+            print(f"WARNING: the stretched audio has {len(stretched)} samples instead of {len(samples) / speed:.0f}")
+        before, after = mixed_track_lengths(path, audio_path, speed)
+        if abs(before - after) > 0.001:
+            print(f"WARNING: an audio track imported after the speed change lasts {after:.2f}s "
+                  f"instead of {before:.2f}s")
+        print(f"{speed:<7g}{frames:>7}{speedx_seconds:>12.2f}{remap_seconds:>11.2f}"
+              f"{(remap_seconds - decode_seconds) * 1000 / frames:>25.1f}{audio_ms:>12.0f}")
+    os.remove(output_path)
+    os.rmdir(os.path.dirname(output_path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+The Fiora performance suite: preview, editing and export timings on synthetic media, saved as JSON.
+
+Measured for each test resolution:
+  * load_video          FioraBackend.load_video on a short and a long clip
+  * get_frame           per-frame latency for each effect combination of apply_all_effects
+  * preview             the _update_preview path: get_frame scaled to the canvas (with colour effects,
+                        which run after the scaling), then PIL image and PhotoImage
+                        (PhotoImage needs a display; without one the raw pixel copy it makes is timed)
+  * trim_chain          applying a chain of trims, and get_frame latency after it
+  * export              export_video time for a re-encode and for a trim-only (stream copy) edit
+  * startup             launching main_ui.py: time to the first window, and to the first frame of a
+                        720p video given on the command line (needs a display; skipped without one)
+
+Every metric is a time in seconds, lower is better. With --baseline, the run is compared to an
+earlier results file and the script exits with status 1 if any metric got slower by more than
+--threshold.
+
+Usage:
+    python benchmarks/run_suite.py [--quick] [--output results.json] [--baseline old.json] [--threshold 0.15]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend_processor import FioraBackend  # noqa: E402
+from bench_startup import median_startup  # noqa: E402
+from synthetic_media import video_path  # noqa: E402
+
+# Effect combinations for get_frame, as (adjustments, filters).
+EFFECT_COMBINATIONS = {
+    "none": ({}, []),
+    "light": ({"brightness": 12.0, "contrast": 0.3, "gamma": 1.2}, []),
+    "colour": ({"r": 1.1, "g": 0.9, "b": 1.05}, []),
+    "light+colour": ({"brightness": 12.0, "contrast": 0.3, "gamma": 1.2, "r": 1.1, "g": 0.9, "b": 1.05}, []),
+    "grayscale": ({}, ["grayscale"]),
+    "mirror+invert+light": ({"brightness": 12.0, "gamma": 1.2}, ["mirror_x", "invert_colors"]),
+}
+PREVIEW_SIZE = (960, 540)
+TRIM_CHAIN_LENGTH = 20
+# Differences below this are timer noise and never count as a regression.
+MIN_REGRESSION_SECONDS = 0.0005
+
+
+def _median_time(function, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples))
+
+
+def _frame_latency(backend, frame_count):
+    """Median get_frame time over consecutive frames, so no frame comes out of the preview cache."""
+    fps = backend.clip.fps
+    backend.get_frame(0)
+    samples = []
+    for index in range(1, frame_count + 1):
+        start = time.perf_counter()
+        backend.get_frame(index / fps)
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples))
+
+
+def _photo_image_factory():
+    """Returns a function that turns a PIL image into a Tk PhotoImage, or None without a display."""
+    try:
+        import tkinter as tk
+        from PIL import ImageTk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception:
+        return None
+    return lambda image: ImageTk.PhotoImage(image=image, master=root)
+
+
+def bench_load(media_dir, resolution, lengths, repeats, metrics):
+    for seconds in lengths:
+        path = video_path(media_dir, resolution, seconds)
+
+        def load():
+            backend = FioraBackend(use_proxy=False)
+            backend.load_video(path)
+            backend.close()
+        metrics[f"load_video/{resolution}/{seconds}s"] = _median_time(load, repeats)
+
+
+def bench_effects(path, resolution, frame_count, metrics):
+    for name, (adjustments, filters) in EFFECT_COMBINATIONS.items():
+        backend = FioraBackend(use_proxy=False)
+        backend.load_video(path)
+        for filter_name in filters:
+            backend.apply_filter(filter_name)
+        backend.adjustments.update(adjustments)
+        backend.apply_all_effects()
+        metrics[f"get_frame/{resolution}/{name}"] = _frame_latency(backend, frame_count)
+        backend.close()
+
+
+def bench_preview(path, resolution, repeats, photo_image, metrics):
+    backend = FioraBackend(use_proxy=False)
+    backend.load_video(path)
+    backend.adjustments.update(EFFECT_COMBINATIONS["light+colour"][0])
+    backend.apply_all_effects()
+    fps = backend.clip.fps
+    backend.get_frame(0, target_size=PREVIEW_SIZE)
+    frames = iter(range(1, repeats + 1))
+
+    def preview():
+        # The same steps as VideoEditorUI._render_preview_image and _show_preview_image: the backend scales
+        # the frame to the canvas before the effects run. Consecutive frames, so none comes from the cache.
+        image = Image.fromarray(backend.get_frame(next(frames) / fps, target_size=PREVIEW_SIZE))
+        if photo_image:
+            photo_image(image)
+        else:
+            image.tobytes()
+    metrics[f"preview/{resolution}"] = _median_time(preview, repeats)
+    backend.close()
+
+
+def bench_trim_chain(path, resolution, frame_count, metrics):
+    backend = FioraBackend(use_proxy=False)
+    backend.load_video(path)
+
+    def trim_chain():
+        for _ in range(TRIM_CHAIN_LENGTH):
+            backend.trim_video(0.05, backend.clip.duration)
+    metrics[f"trim_chain/{resolution}/apply_{TRIM_CHAIN_LENGTH}"] = _median_time(trim_chain, 1)
+    metrics[f"trim_chain/{resolution}/get_frame_after_{TRIM_CHAIN_LENGTH}"] = _frame_latency(backend, frame_count)
+    backend.close()
+
+
+def bench_export(path, resolution, temp_dir, metrics, info):
+    backend = FioraBackend(use_proxy=False, export_workers=1, render_cache_mb=0)
+    backend.load_video(path)
+    backend.trim_video(0.5, backend.clip.duration - 0.5)
+    output = os.path.join(temp_dir, "export.mp4")
+
+    start = time.perf_counter()
+    backend.export_video(output)
+    metrics[f"export/{resolution}/trim_only"] = time.perf_counter() - start
+
+    backend.set_adjustment("contrast", 0.2)
+    start = time.perf_counter()
+    backend.export_video(output)
+    elapsed = time.perf_counter() - start
+    metrics[f"export/{resolution}/reencode"] = elapsed
+    info[f"export/{resolution}/reencode_fps"] = round(backend.clip.duration * backend.clip.fps / elapsed, 2)
+    backend.close()
+
+
+def bench_startup(path, resolution, repeats, metrics):
+    _first, median = median_startup(path, repeats)
+    metrics["startup/first_window"] = median["first_window"]
+    metrics[f"startup/{resolution}/first_frame"] = median["first_frame"]
+
+
+def compare(metrics, baseline, threshold):
+    """Prints the change of every metric against a baseline. Returns the names of the regressions."""
+    regressions = []
+    print(f"\n{'metric':<50}{'baseline':>11}{'now':>11}{'change':>9}")
+    for name in sorted(metrics):
+        if name not in baseline: continue
+        before, now = baseline[name], metrics[name]
+        change = (now - before) / before if before > 0 else 0.0
+        regressed = now - before > max(threshold * before, MIN_REGRESSION_SECONDS)
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<50}{before * 1000:>9.2f}ms{now * 1000:>9.2f}ms{change:>+8.0%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="only 360p and 720p, fewer repeats")
+    parser.add_argument("--media-dir", help="folder for the generated test media (reused between runs)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="an earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown per metric (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    resolutions = ["360p", "720p"] if args.quick else ["360p", "720p", "1080p"]
+    lengths = [5, 20] if args.quick else [10, 60]
+    repeats = 3 if args.quick else 5
+    frame_count = 15 if args.quick else 45
+    media_dir = args.media_dir or os.path.join(tempfile.gettempdir(), "fiora_bench_media")
+    os.makedirs(media_dir, exist_ok=True)
+
+    photo_image = _photo_image_factory()
+    metrics, info = {}, {}
+    with tempfile.TemporaryDirectory(prefix="fiora_bench_") as temp_dir:
+        for resolution in resolutions:
+            print(f"Benchmarking {resolution}...")
+            path = video_path(media_dir, resolution, lengths[0])
+            bench_load(media_dir, resolution, lengths, repeats, metrics)
+            bench_effects(path, resolution, frame_count, metrics)
+            bench_preview(path, resolution, repeats * 4, photo_image, metrics)
+            bench_trim_chain(path, resolution, frame_count, metrics)
+            bench_export(path, resolution, temp_dir, metrics, info)
+        if photo_image is not None:
+            print("Benchmarking startup...")
+            bench_startup(video_path(media_dir, "720p", lengths[0]), "720p", repeats, metrics)
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": args.quick,
+            "preview_photoimage": photo_image is not None,
+        },
+        "metrics": metrics,
+        "info": info,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Wrote {len(metrics)} metrics to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["metrics"]
+        regressions = compare(metrics, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) slower than the baseline by more than {args.threshold:.0%}.")
+            return 1
+        print("\nNo regressions.")
+    else:
+        print(f"\n{'metric':<50}{'time':>11}")
+        for name in sorted(metrics):
+            print(f"{name:<50}{metrics[name] * 1000:>9.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
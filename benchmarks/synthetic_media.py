@@ -0,0 +1,40 @@
+"""
+Synthetic test media for the benchmarks, generated locally with ffmpeg.
+
+The sources are deterministic (testsrc2 video and sine-tone audio), so every run and every
+machine measures the same content. Files are reused if they already exist in the target folder.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ffmpeg_tools import run_ffmpeg  # noqa: E402
+
+RESOLUTIONS = {"360p": "640x360", "720p": "1280x720", "1080p": "1920x1080", "4K": "3840x2160"}
+
+
+def make_video(path, size, seconds, fps=30, gop_seconds=2, audio=True):
+    """Writes an H.264 test clip with a fixed GOP length and, optionally, an AAC sine-tone track."""
+    if os.path.exists(path): return path
+    args = ["-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}"]
+    if audio:
+        args += ["-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100"]
+    args += ["-t", str(seconds), "-c:v", "libx264", "-g", str(int(gop_seconds * fps)), "-pix_fmt", "yuv420p"]
+    if audio:
+        args += ["-c:a", "aac", "-shortest"]
+    run_ffmpeg(args + [path])
+    return path
+
+
+def make_audio(path, seconds, frequency=440, sample_rate=44100):
+    """Writes a WAV sine tone."""
+    if os.path.exists(path): return path
+    run_ffmpeg(["-f", "lavfi", "-i", f"sine=frequency={frequency}:sample_rate={sample_rate}",
+                "-t", str(seconds), path])
+    return path
+
+
+def video_path(directory, resolution, seconds, fps=30):
+    """Returns (generating it first if needed) the test clip for a named resolution and length."""
+    path = os.path.join(directory, f"testsrc_{resolution}_{seconds}s_{fps}fps.mp4")
+    return make_video(path, RESOLUTIONS[resolution], seconds, fps)
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import threading
+
+# Bytes read from each end of a file when fingerprinting it.
+_FINGERPRINT_SAMPLE_BYTES = 4 * 1024 * 1024
+
+
+def get_cache_dir(name):
+    """
+    Returns (and creates) a named sub-folder of Fiora's on-disk cache.
+    The root defaults to ~/.cache/fiora and can be moved with the FIORA_CACHE_DIR variable.
+    """
+    root = os.environ.get("FIORA_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "fiora")
+    path = os.path.join(root, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_fingerprint(path):
+    """
+    Returns a content hash that identifies a media file across sessions.
+    Only the size, the modification time and the first and last few MB are hashed,
+    so even multi-GB files are fingerprinted in milliseconds. The modification time
+    catches edits in the middle of a file that keep its size; a moved or renamed
+    file still matches.
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    digest = hashlib.sha1(f"{size}:{stat.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(_FINGERPRINT_SAMPLE_BYTES))
+        if size > 2 * _FINGERPRINT_SAMPLE_BYTES:
+            f.seek(-_FINGERPRINT_SAMPLE_BYTES, os.SEEK_END)
+            digest.update(f.read(_FINGERPRINT_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+class CachedBuildStore:
+    """
+    Hands out data built from media files, by path. `kind` is a class with build(path), save(cache_path)
+    and load(cache_path). Each file's data is built on a background thread the first time it is requested
+    and stored on disk under the file's content hash, so later sessions load it immediately.
+    """
+
+    def __init__(self, kind, cache_name, suffix, on_ready=None):
+        self.kind = kind
+        self.cache_name = cache_name
+        self.suffix = suffix
+        # on_ready(path) is called from poll(), on the polling thread, once a file's data is ready.
+        self.on_ready = on_ready
+        self._items = {}
+        self._building = set()
+        self._ready = []
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Returns the data for a file, or None while it is still being built (or if the build failed)."""
+        with self._lock:
+            if path in self._items:
+                return self._items[path]
+            if path in self._building:
+                return None
+            self._building.add(path)
+        threading.Thread(target=self._load_or_build, args=(path,), name=f"fiora-{self.cache_name}",
+                         daemon=True).start()
+        return None
+
+    @property
+    def busy(self):
+        with self._lock:
+            return bool(self._building)
+
+    def poll(self):
+        """Calls on_ready for the builds that finished since the last poll. Returns True while any are running."""
+        with self._lock:
+            ready, self._ready = self._ready, []
+            busy = bool(self._building)
+        if self.on_ready:
+            for path in ready:
+                self.on_ready(path)
+        return busy
+
+    def _load_or_build(self, path):
+        item = None
+        try:
+            cache_path = os.path.join(get_cache_dir(self.cache_name), f"{file_fingerprint(path)}.{self.suffix}")
+            if os.path.exists(cache_path):
+                item = self.kind.load(cache_path)
+            else:
+                item = self.kind.build(path)
+                item.save(cache_path)
+        except Exception as e:
+            print(f"ERROR: Could not build {self.cache_name} for {path}. Reason: {e}")
+        with self._lock:
+            # A failed build is remembered as None so it is not retried on every redraw.
+            self._items[path] = item
+            self._building.discard(path)
+            if item is not None: self._ready.append(path)
@@ -0,0 +1,75 @@
+import numpy as np
+
+# Pivot used by moviepy's lum_contrast, kept so the fused stage matches the old output exactly.
+CONTRAST_THRESHOLD = 127
+# Rows mapped per lookup: indexing a whole 1080p frame at once allocates ~6 MB of temporaries.
+_BAND_ROWS = 64
+
+
+def build_color_luts(brightness=0.0, contrast=0.0, gamma=1.0, r=1.0, g=1.0, b=1.0):
+    """
+    Compiles brightness, contrast, gamma and the RGB gains into one 256-entry
+    uint8 lookup table per channel (shape (3, 256)).
+    The stages are evaluated in the same order and with the same rounding as the
+    old lum_contrast -> gamma_corr -> _rgb_manipulator chain, so the result is identical.
+    """
+    levels = np.arange(256, dtype=np.float64)
+
+    # Stage 1: luminosity / contrast (same formula as vfx.lum_contrast).
+    if brightness != 0.0 or contrast != 0.0:
+        levels = levels + brightness + contrast * (levels - float(CONTRAST_THRESHOLD))
+        levels = np.clip(levels, 0, 255).astype(np.uint8).astype(np.float64)
+
+    # Stage 2: gamma correction (same formula as vfx.gamma_corr).
+    if gamma != 1.0:
+        levels = (255 * (levels / 255) ** gamma).astype(np.uint8).astype(np.float64)
+
+    # Stage 3: per-channel gains, one table row per channel.
+    luts = np.empty((3, 256), dtype=np.uint8)
+    for channel, gain in enumerate((r, g, b)):
+        luts[channel] = np.clip(levels * gain, 0, 255).astype(np.uint8)
+    return luts
+
+
+def apply_color_luts(frame, luts, out=None):
+    """
+    Maps every pixel of an RGB uint8 frame through the per-channel tables in one pass.
+    `out` may be the frame itself. Rows are mapped in bands, so the only temporary is one band.
+    """
+    if out is None:
+        out = np.empty(frame.shape, dtype=np.uint8)
+    # A shared table (no RGB gains) can be applied to all channels in one lookup.
+    shared = frame.ndim == 2 or ((luts[0] == luts[1]).all() and (luts[0] == luts[2]).all())
+    for top in range(0, frame.shape[0], _BAND_ROWS):
+        rows = slice(top, top + _BAND_ROWS)
+        if shared:
+            out[rows] = luts[0][frame[rows]]
+            continue
+        for channel in range(min(frame.shape[2], 3)):
+            out[rows, :, channel] = luts[channel][frame[rows, :, channel]]
+        # Leave any extra channel (e.g. alpha) untouched.
+        if frame.shape[2] > 3 and out is not frame:
+            out[rows, :, 3:] = frame[rows, :, 3:]
+    return out
+
+
+class ColorLUT:
+    """A compiled colour stage that can be passed straight to clip.fl_image()."""
+
+    def __init__(self, brightness=0.0, contrast=0.0, gamma=1.0, r=1.0, g=1.0, b=1.0):
+        self.params = (brightness, contrast, gamma, r, g, b)
+        self.luts = build_color_luts(brightness, contrast, gamma, r, g, b)
+        self.is_identity = bool((self.luts == np.arange(256, dtype=np.uint8)).all())
+
+    @classmethod
+    def from_adjustments(cls, adjustments):
+        """Builds the colour stage from a FioraBackend adjustments dictionary."""
+        return cls(brightness=adjustments.get("brightness", 0.0),
+                   contrast=adjustments.get("contrast", 0.0),
+                   gamma=adjustments.get("gamma", 1.0),
+                   r=adjustments.get("r", 1.0),
+                   g=adjustments.get("g", 1.0),
+                   b=adjustments.get("b", 1.0))
+
+    def __call__(self, frame, out=None):
+        return apply_color_luts(frame, self.luts, out)
@@ -0,0 +1,193 @@
+import threading
+
+import numpy as np
+
+from profiler import profiler
+from tiled_effects import MIN_TILE_ROWS, tile_runner
+from time_remap import source_frame
+
+
+# --- Frame filters ---
+# The same pixel math as moviepy's vfx.blackwhite, vfx.invert_colors and vfx.mirror_x,
+# as plain frame functions so any number of them can run inside one fl_image stage.
+# Each one writes into `out` (which may be the frame itself) instead of allocating a new frame.
+
+_GRAY_WEIGHT = 1.0 / 3
+# Rows converted per step, which bounds the float temporaries to one band.
+_BAND_ROWS = 64
+# Work buffers per thread for the effect stages: enough for a frame to outlive the next one.
+_WORK_POOL_FRAMES = 3
+_EPSILON = 0.00001
+
+
+def _grayscale(frame, out):
+    height, width = frame.shape[:2]
+    gray = np.empty((min(_BAND_ROWS, height), width))
+    weighted = np.empty_like(gray)
+    for top in range(0, height, _BAND_ROWS):
+        band = frame[top:top + _BAND_ROWS]
+        rows = len(band)
+        # The same operations, in the same order, as moviepy's float64 weighted sum.
+        np.multiply(band[:, :, 0], _GRAY_WEIGHT, out=gray[:rows])
+        np.multiply(band[:, :, 1], _GRAY_WEIGHT, out=weighted[:rows])
+        gray[:rows] += weighted[:rows]
+        np.multiply(band[:, :, 2], _GRAY_WEIGHT, out=weighted[:rows])
+        gray[:rows] += weighted[:rows]
+        out[top:top + rows] = gray[:rows, :, None]
+    return out
+
+
+def _invert_colors(frame, out):
+    return np.subtract(255, frame, out=out)
+
+
+def _mirror_x(frame, out):
+    # A view, so nothing is copied; it always runs last (see pipeline_filters).
+    return frame[:, ::-1]
+
+
+FRAME_FILTERS = {
+    "grayscale": _grayscale,
+    "invert_colors": _invert_colors,
+    "mirror_x": _mirror_x,
+}
+
+
+class EditDecisionList:
+    """
+    The edits made to a video, kept flat: one source in/out range and an ordered list of filters.
+    Consecutive trims are composed arithmetically into the range, so rendering always builds the
+    same short pipeline (one subclip and at most one fl_image) however many edits were made.
+    """
+
+    def __init__(self, source_in=0.0, source_out=None, filters=None):
+        self.source_in = source_in
+        # None means "to the end of the source".
+        self.source_out = source_out
+        self.filters = list(filters or [])
+
+    def copy(self):
+        return EditDecisionList(self.source_in, self.source_out, self.filters)
+
+    def duration(self, source_duration):
+        """Length of the edited range for a source of the given duration."""
+        source_out = source_duration if self.source_out is None else min(self.source_out, source_duration)
+        return max(0.0, source_out - self.source_in)
+
+    def trim(self, start, end):
+        """Keeps [start, end) of the current edited range, in timeline seconds."""
+        new_in = self.source_in + start
+        new_out = self.source_in + end
+        if self.source_out is not None:
+            new_out = min(new_out, self.source_out)
+        self.source_in, self.source_out = new_in, new_out
+
+    def add_filter(self, filter_name):
+        """Appends a filter. Returns False for an unknown filter name."""
+        if filter_name not in FRAME_FILTERS: return False
+        self.filters.append(filter_name)
+        return True
+
+    def pipeline_filters(self):
+        """
+        The filters that actually have to run, in order, with no-op combinations removed.
+        mirror_x only moves pixels, so it commutes with the per-pixel filters: the mirrors are
+        counted and, if the count is odd, applied once at the end. Two inverts in a row cancel out.
+        """
+        filters = []
+        mirrored = False
+        for name in self.filters:
+            if name == "mirror_x":
+                mirrored = not mirrored
+            elif name == "invert_colors" and filters and filters[-1] == "invert_colors":
+                filters.pop()
+            else:
+                filters.append(name)
+        if mirrored:
+            filters.append("mirror_x")
+        return filters
+
+    def key(self):
+        """A hashable value that identifies what the edits do to a frame."""
+        return (self.source_in, self.source_out, tuple(self.pipeline_filters()))
+
+    def frame_function(self, color_stage=None, threads=1, work_frames=_WORK_POOL_FRAMES):
+        """
+        Returns one function that runs every filter and then the colour stage, or None if there is nothing to do.
+        With threads > 1 each frame is split into row tiles that run on a shared thread pool, for export.
+        An output frame is valid until `work_frames` more frames have been processed on the same thread.
+        """
+        # Imported here so the editor window can open before moviepy has loaded (frame_buffers imports its reader).
+        from frame_buffers import FrameBufferPool
+
+        stages = [(name, FRAME_FILTERS[name]) for name in self.pipeline_filters()]
+        if color_stage is not None and not color_stage.is_identity:
+            # The colour stage is per-pixel too, so it goes before a trailing mirror.
+            position = len(stages) - 1 if stages and stages[-1][0] == "mirror_x" else len(stages)
+            stages.insert(position, ("colour_lut", color_stage))
+        if not stages: return None
+        local = threading.local()
+        # Every stage but a trailing mirror works row by row, so those can run on tiles.
+        mirrored = stages[-1][0] == "mirror_x"
+        row_stages = stages[:-1] if mirrored else stages
+        runner = tile_runner(threads) if threads > 1 and row_stages else None
+
+        def process(frame):
+            # The first stage writes into a pooled work buffer, so the decoded frame is left intact;
+            # the following stages then work in place on that buffer.
+            pool = getattr(local, "pool", None)
+            if pool is None:
+                pool = local.pool = FrameBufferPool(work_frames)
+            out = pool.next(frame.shape)
+            if runner is None or frame.shape[0] < 2 * MIN_TILE_ROWS:
+                for name, stage in stages:
+                    with profiler.span(name):
+                        frame = stage(frame, out)
+                return frame
+
+            def process_tile(top, bottom):
+                tile, tile_out = frame[top:bottom], out[top:bottom]
+                for _name, stage in row_stages:
+                    tile = stage(tile, tile_out)
+            # Per-stage spans would time single tiles, so the tiled stages are timed as a whole.
+            with profiler.span("effects_tiled"):
+                runner.run(process_tile, frame.shape[0])
+            return _mirror_x(out, out) if mirrored else out
+        return process
+
+    def render(self, source_clip, color_stage=None, effects=True, threads=1, speed=1.0):
+        """
+        Builds the edited clip straight from the source clip: one frame function that maps the time into
+        the cut (time-remapped at a `speed` other than 1) and runs a single image stage.
+        With effects=False only the cut is applied, for callers that run frame_function() themselves.
+        `threads` is passed on to frame_function().
+        """
+        # Imported here so the editor window can open before moviepy has loaded.
+        from moviepy.video.VideoClip import VideoClip
+
+        fps = source_clip.fps
+        source_in = self.source_in
+        duration = self.duration(source_clip.duration)
+        if speed != 1.0:
+            # Output frame i shows frame source_frame(i) of the cut. The preview's decoders seek well;
+            # export reads through a time_remap.RemappedVideoReader instead.
+            def source_time(t):
+                return source_frame(int(fps * t + _EPSILON), speed) / fps + source_in
+            duration /= speed
+        else:
+            def source_time(t):
+                return t + source_in
+        process = self.frame_function(color_stage, threads) if effects else None
+        get_source_frame = source_clip.get_frame
+
+        def render_frame(t):
+            with profiler.span("decode"):
+                frame = get_source_frame(source_time(t))
+            return frame if process is None else process(frame)
+        # Built without a make_frame, so that VideoClip does not decode a frame to find the size:
+        # subclip() and fl() would each do so, on every slider change and trim.
+        clip = VideoClip(duration=duration)
+        clip.make_frame = render_frame
+        clip.size = tuple(source_clip.size)
+        clip.fps = fps
+        return clip
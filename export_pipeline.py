@@ -0,0 +1,262 @@
+import math
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+from ffmpeg_tools import concat_copy
+from profiler import profiler
+
+# Encoder settings used when an export does not override them. crf None keeps the codec's
+# default quality, threads None lets ffmpeg pick.
+DEFAULT_ENCODER = {"codec": "libx264", "preset": "medium", "crf": None, "threads": None}
+# Frames buffered between two stages. Enough to absorb jitter without holding much memory.
+DEFAULT_QUEUE_FRAMES = 4
+_DONE = object()
+
+
+class ExportCancelled(Exception):
+    """Raised by an export that was cancelled before it finished."""
+
+
+def encoder_settings(overrides=None):
+    """Returns DEFAULT_ENCODER with the given settings applied. Raises ValueError for unknown keys."""
+    settings = dict(DEFAULT_ENCODER)
+    unknown = set(overrides or {}) - set(settings)
+    if unknown:
+        raise ValueError(f"Unknown encoder settings: {', '.join(sorted(unknown))}")
+    settings.update(overrides or {})
+    return settings
+
+
+def open_writer(output_path, size, fps, encoder):
+    """Starts an ffmpeg encoder for raw RGB frames with the given encoder settings."""
+    # Imported here so worker processes do not import moviepy at module load.
+    from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+
+    params = ["-crf", str(encoder["crf"])] if encoder["crf"] is not None else None
+    return FFMPEG_VideoWriter(output_path, size, fps, codec=encoder["codec"], preset=encoder["preset"],
+                              threads=encoder["threads"], ffmpeg_params=params)
+
+
+def write_frame(writer, frame):
+    """
+    Sends one frame to the encoder. Contiguous frames go straight from their buffer, without a tobytes() copy.
+    Writers without an ffmpeg process of their own (render_cache.ChunkWriter) are handed the frame.
+    """
+    if not frame.flags.c_contiguous or frame.dtype != "uint8" or not hasattr(writer, "proc"):
+        writer.write_frame(frame)
+        return
+    try:
+        writer.proc.stdin.write(memoryview(frame.reshape(-1)))
+    except IOError as e:
+        _, ffmpeg_error = writer.proc.communicate()
+        raise IOError(f"FFMPEG error while writing {writer.filename}: {e}\n{ffmpeg_error}")
+
+
+class ExportPipeline:
+    """
+    Runs an export as concurrent stages joined by bounded queues: decode -> effects -> encode,
+    plus any side jobs (the audio mix) on threads of their own. A full queue blocks the stage
+    feeding it, so a slow stage holds the others back instead of letting frames pile up.
+    Every stage's busy time is recorded; busy time over wall time is its utilisation, and the
+    stage closest to 100% is the bottleneck.
+    """
+
+    def __init__(self, depth=DEFAULT_QUEUE_FRAMES, progress=None):
+        self.depth = depth
+        # progress(frames) is called on the encode thread after every encoded frame.
+        self.progress = progress
+        self.busy = {}
+        self.seconds = 0.0
+        self.cancelled = False
+        self._started = None
+        self._abort = threading.Event()
+        self._errors = []
+        self._threads = []
+
+    def _put(self, q, item):
+        while not self._abort.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._abort.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _start(self, name, target, *args):
+        if self._started is None:
+            self._started = time.perf_counter()
+
+        def run():
+            try:
+                target(*args)
+            except Exception as e:
+                self._errors.append(e)
+                self._abort.set()
+        thread = threading.Thread(target=run, name=f"fiora-export-{name}", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _timed(self, name, function, *args):
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.busy[name] = self.busy.get(name, 0.0) + time.perf_counter() - start
+
+    def cancel(self):
+        """Stops every stage at its next frame; run() then raises ExportCancelled. Safe to call from any thread."""
+        self.cancelled = True
+        self._abort.set()
+
+    def add_job(self, name, function, *args):
+        """Runs a side job, like the audio mix, alongside the frame stages. Its time counts as that stage's."""
+        self.busy.setdefault(name, 0.0)
+        self._start(name, self._timed, name, function, *args)
+
+    def _decode(self, clip, fps, first_frame, end_frame, decoded):
+        for index in range(first_frame, end_frame):
+            frame = self._timed("decode", clip.get_frame, index / fps)
+            if not self._put(decoded, frame): return
+        self._put(decoded, _DONE)
+
+    def _effects(self, process, decoded, processed):
+        while True:
+            frame = self._get(decoded)
+            if frame is _DONE: break
+            if not self._put(processed, self._timed("effects", process, frame)): return
+        self._put(processed, _DONE)
+
+    def run(self, clip, process, fps, first_frame, end_frame, writer):
+        """
+        Decodes frames [first_frame, end_frame) of `clip`, runs `process` on them (if any) and sends them
+        to `writer`, which is closed at the end. Waits for the side jobs too, and re-raises the first error,
+        or ExportCancelled if cancel() was called.
+        """
+        decoded = queue.Queue(self.depth)
+        processed = decoded
+        self.busy.update(decode=0.0, encode=0.0)
+        self._start("decode", self._decode, clip, fps, first_frame, end_frame, decoded)
+        if process is not None:
+            processed = queue.Queue(self.depth)
+            self.busy["effects"] = 0.0
+            self._start("effects", self._effects, process, decoded, processed)
+        try:
+            # Encoding runs on this thread; ffmpeg itself encodes in its own process.
+            while True:
+                frame = self._get(processed)
+                if frame is _DONE: break
+                with profiler.span("encode", "export"):
+                    self._timed("encode", write_frame, writer, frame)
+                if self.progress: self.progress(1)
+        except Exception:
+            self._abort.set()
+            raise
+        finally:
+            self.join()
+            writer.close()
+            self.seconds = time.perf_counter() - self._started
+        if self.cancelled:
+            raise ExportCancelled(writer.filename)
+        if self._errors:
+            raise self._errors[0]
+
+    def join(self):
+        """Waits for every stage and side job to finish."""
+        for thread in self._threads:
+            thread.join()
+
+    def utilization(self):
+        """Returns {stage: busy time / wall time}."""
+        return {name: busy / self.seconds if self.seconds else 0.0 for name, busy in self.busy.items()}
+
+    def report(self):
+        """A one-line summary of the stage utilisation, bottleneck first."""
+        stages = sorted(self.utilization().items(), key=lambda item: -item[1])
+        return "Stage utilisation: " + ", ".join(f"{name} {share:.0%}" for name, share in stages)
+
+
+def render_edited_video(source_path, edits, adjustments, output_path, fps, first_frame, end_frame,
+                        encoder=None, effect_threads=1, depth=DEFAULT_QUEUE_FRAMES, pipeline=None, writer=None):
+    """
+    Renders frames [first_frame, end_frame) of the edited timeline from the source file and
+    encodes them to a video-only file through an ExportPipeline. Returns the pipeline.
+    Sped-up timelines read only the source frames they show (see time_remap.RemappedVideoReader).
+    `writer` replaces the encoder that would be opened for output_path.
+    """
+    # Imported here so worker processes do not import moviepy at module load.
+    from moviepy.video.io.VideoFileClip import VideoFileClip
+    from color_engine import ColorLUT
+    from frame_buffers import use_frame_pool
+    from time_remap import remapped_source_clip
+
+    pipeline = pipeline or ExportPipeline(depth)
+    encoder = encoder_settings(encoder)
+    # Decoded frames stay in use while they wait in both queues (an effect-free or mirror-only
+    # frame goes to the encoder as it is), and effect output while it waits in the second one.
+    source = use_frame_pool(VideoFileClip(source_path, audio=False), 2 * depth + 3)
+    try:
+        speed = adjustments.get("speed", 1.0)
+        if speed > 1.0:
+            clip = remapped_source_clip(source, edits, speed)
+        else:
+            clip = edits.render(source, effects=False, speed=speed)
+        process = edits.frame_function(ColorLUT.from_adjustments(adjustments), effect_threads,
+                                       work_frames=depth + 2)
+        if writer is None:
+            writer = open_writer(output_path, clip.size, fps, encoder)
+        pipeline.run(clip, process, fps, first_frame, end_frame, writer)
+    finally:
+        source.close()
+    return pipeline
+
+
+def export_pipelined(backend, output_path, encoder=None, depth=DEFAULT_QUEUE_FRAMES, job=None):
+    """
+    Exports the backend's edited video in one process: the audio mix runs alongside the
+    decode, effect and encode stages, and the two are muxed without re-encoding at the end.
+    `job` (an export_queue.ExportJob) receives the frame progress and can cancel the export.
+    Returns the ExportPipeline, for its timings.
+    """
+    clip = backend.clip
+    total_frames = int(math.ceil(clip.duration * clip.fps - 0.00001))
+    if job: job.begin(total_frames)
+    temp_dir = tempfile.mkdtemp(prefix="fiora_export_")
+    try:
+        audio_path = os.path.join(temp_dir, "audio.m4a")
+        audio_written = []
+
+        def mix_audio():
+            with profiler.span("export.audio_mix", "export"):
+                audio_written.append(backend.write_final_audio(audio_path))
+        pipeline = ExportPipeline(depth, job.advance if job else None)
+        if job: job.on_cancel(pipeline.cancel)
+        pipeline.add_job("audio_mix", mix_audio)
+        try:
+            video_path = os.path.join(temp_dir, "video.mp4")
+            with profiler.span("export.video", "export"):
+                render_edited_video(backend.source_path, backend.edits, backend.adjustments, video_path, clip.fps,
+                                    0, total_frames, encoder, backend.effect_threads, depth, pipeline)
+        finally:
+            # The audio mix may still be running if the video part failed early.
+            pipeline.join()
+        if job: job.raise_if_cancelled()
+        with profiler.span("export.mux", "export"):
+            concat_copy([video_path], output_path, audio_path if audio_written[0] else None,
+                        list_path=os.path.join(temp_dir, "video.txt"))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    print(f"Exported {total_frames} frames in {pipeline.seconds:.1f}s "
+          f"({total_frames / pipeline.seconds:.1f} fps). {pipeline.report()}")
+    return pipeline
@@ -0,0 +1,160 @@
+import queue
+import threading
+import time
+
+from export_pipeline import ExportCancelled
+
+# Seconds between progress callbacks while frames are being encoded. State changes are always reported.
+PROGRESS_INTERVAL = 0.25
+
+
+class ExportJob:
+    """
+    One queued export: a snapshot of the edit state, where to write it and how to encode it.
+    The exporter reports encoded frames through begin()/advance(); the UI reads progress, fps
+    and eta, and cancel() stops the job whether it is still queued or already rendering.
+    `state` is one of "queued", "running", "done", "failed" or "cancelled".
+    """
+
+    def __init__(self, backend, output_path, workers=None, encoder=None, callback=None):
+        self.backend = backend
+        self.output_path = output_path
+        self.workers = workers
+        self.encoder = encoder
+        # callback(job) runs on the export thread, so UI code must hand it over to its own thread.
+        self.callback = callback
+        self.state = "queued"
+        self.total_frames = 0
+        self.frames_done = 0
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+        # Set by a chunked export (render_cache.export_chunked) when it finishes.
+        self.chunks_reused = None
+        self.chunks_rendered = None
+        self._cancel_hooks = []
+        self._lock = threading.Lock()
+        self._last_report = 0.0
+
+    @property
+    def is_finished(self):
+        return self.state in ("done", "failed", "cancelled")
+
+    @property
+    def progress(self):
+        """The fraction of frames encoded, from 0 to 1."""
+        if self.state == "done": return 1.0
+        return self.frames_done / self.total_frames if self.total_frames else 0.0
+
+    @property
+    def fps(self):
+        """Frames encoded per second since the job started."""
+        if not self.started: return 0.0
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        return self.frames_done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Seconds left at the current throughput, or None before the first frames are done."""
+        fps = self.fps
+        if not fps or not self.total_frames: return None
+        return max(0, self.total_frames - self.frames_done) / fps
+
+    def begin(self, total_frames):
+        """Called by the exporter once it knows how many frames it will encode."""
+        self.total_frames = total_frames
+        self._report(force=True)
+
+    def advance(self, frames=1):
+        """Called by the exporter as frames are encoded, from any of its threads."""
+        with self._lock:
+            self.frames_done += frames
+        self._report()
+
+    def on_cancel(self, hook):
+        """Registers a function that stops the running export. Runs straight away if the job is already cancelled."""
+        with self._lock:
+            self._cancel_hooks.append(hook)
+            cancelled = self.cancel_requested
+        if cancelled: hook()
+
+    def cancel(self):
+        """Stops the job. A queued job never starts; a running one stops at its next frame."""
+        with self._lock:
+            if self.is_finished or self.cancel_requested: return
+            self.cancel_requested = True
+            hooks = list(self._cancel_hooks)
+        for hook in hooks:
+            hook()
+
+    def raise_if_cancelled(self):
+        if self.cancel_requested: raise ExportCancelled(self.output_path)
+
+    def _set_state(self, state):
+        self.state = state
+        if state == "running":
+            self.started = time.perf_counter()
+        elif self.is_finished:
+            self.finished = time.perf_counter()
+        self._report(force=True)
+
+    def _report(self, force=False):
+        if self.callback is None: return
+        now = time.perf_counter()
+        if not force and now - self._last_report < PROGRESS_INTERVAL: return
+        self._last_report = now
+        try:
+            self.callback(self)
+        except Exception as e:
+            print(f"Error in export progress callback: {e}")
+
+
+class ExportQueue:
+    """
+    Runs export jobs one at a time on a background thread, in the order they were submitted.
+    Exports already use every core, so running two at once would only make both slower; the
+    queue lets more of them line up while editing goes on.
+    """
+
+    def __init__(self):
+        self.jobs = []
+        self._pending = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, backend, output_path, workers=None, encoder=None, callback=None):
+        """
+        Queues an export of `backend`, which should be a snapshot (FioraBackend.snapshot()) so that
+        later edits do not change it. Returns the ExportJob.
+        """
+        job = ExportJob(backend, output_path, workers, encoder, callback)
+        with self._lock:
+            self.jobs.append(job)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="fiora-export-queue", daemon=True)
+                self._thread.start()
+        self._pending.put(job)
+        return job
+
+    @property
+    def active(self):
+        """The jobs that are queued or running, oldest first."""
+        return [job for job in self.jobs if not job.is_finished]
+
+    def cancel_all(self):
+        for job in self.active:
+            job.cancel()
+
+    def _run(self):
+        while True:
+            job = self._pending.get()
+            if job.cancel_requested:
+                job._set_state("cancelled")
+                continue
+            job._set_state("running")
+            try:
+                ok = job.backend.export_video(job.output_path, job.workers, job.encoder, job=job)
+            except Exception as e:
+                print(f"ERROR: Export to {job.output_path} failed. Reason: {e}")
+                ok = False
+            job._set_state("done" if ok else "cancelled" if job.cancel_requested else "failed")
@@ -0,0 +1,73 @@
+import re
+import subprocess
+
+_PTS_TIME = re.compile(r"pts_time:(-?[0-9.]+)")
+_STREAM = re.compile(r"Stream #\d+:\d+.*?: (Video|Audio): (\w+)([^,]*), (\w+)")
+
+
+def ffmpeg_binary():
+    """Returns the ffmpeg executable that moviepy is configured to use."""
+    # Imported here so the editor window can open before moviepy (and imageio behind it) has loaded.
+    from moviepy.config import get_setting
+    return get_setting("FFMPEG_BINARY")
+
+
+def run_ffmpeg(args):
+    """
+    Runs ffmpeg with the given arguments (without the binary itself) and waits for it.
+    Raises an IOError containing ffmpeg's error output if it fails.
+    """
+    cmd = [ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error", "-nostats"] + list(args)
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if result.returncode != 0:
+        raise IOError(f"ffmpeg failed: {result.stderr.strip()}")
+    return result
+
+
+def probe_keyframe_times(path):
+    """
+    Returns the sorted presentation times (in seconds) of the video keyframes in a file.
+    Only keyframes are decoded, so this is fast even for long recordings.
+    """
+    cmd = [ffmpeg_binary(), "-hide_banner", "-nostats", "-skip_frame", "nokey", "-i", path,
+           "-map", "0:v:0", "-vf", "showinfo", "-f", "null", "-"]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    if result.returncode != 0:
+        raise IOError(f"Could not read keyframes of {path}")
+    return sorted(float(t) for t in _PTS_TIME.findall(result.stderr))
+
+
+def probe_streams(path):
+    """
+    Returns the codec of the first video and audio stream, e.g.
+    {"video": "h264", "video_pix_fmt": "yuv420p", "audio": "aac"}. Missing streams are left out.
+    """
+    cmd = [ffmpeg_binary(), "-hide_banner", "-i", path]
+    # ffmpeg exits with an error when no output is given, but still prints the stream info.
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    streams = {}
+    for kind, codec, _profile, detail in _STREAM.findall(result.stderr):
+        key = kind.lower()
+        if key in streams: continue
+        streams[key] = codec
+        if key == "video":
+            streams["video_pix_fmt"] = detail
+    return streams
+
+
+def concat_copy(segment_paths, output_path, audio_path=None, list_path=None):
+    """
+    Joins video segments that share the same codec settings without re-encoding them,
+    optionally muxing in a separately encoded audio track.
+    """
+    list_path = list_path or output_path + ".concat.txt"
+    with open(list_path, "w") as f:
+        for path in segment_paths:
+            # The concat demuxer needs quotes in paths escaped.
+            escaped = path.replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    args = ["-f", "concat", "-safe", "0", "-i", list_path]
+    if audio_path:
+        args += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0"]
+    args += ["-c", "copy", "-movflags", "+faststart", output_path]
+    run_ffmpeg(args)
@@ -0,0 +1,88 @@
+import warnings
+
+import numpy as np
+from moviepy.video.io.ffmpeg_reader import FFMPEG_VideoReader
+
+# Decoded frames kept per reader. A frame stays valid until this many more frames have been read.
+DEFAULT_POOL_FRAMES = 4
+
+
+class PooledFrame(np.ndarray):
+    """Marks arrays that live in a FrameBufferPool (and views of them), so they can be detached before being kept."""
+
+
+def detach(frame):
+    """Returns a frame that is safe to keep: pooled frames are copied out, anything else is returned as is."""
+    return np.array(frame) if isinstance(frame, PooledFrame) else frame
+
+
+class FrameBufferPool:
+    """
+    A ring of preallocated uint8 frame buffers. next() hands the buffers out in turn, so a buffer
+    is reused `count` calls later; whoever needs a frame for longer must detach() it.
+    """
+
+    def __init__(self, count=DEFAULT_POOL_FRAMES):
+        self.count = count
+        self._buffers = []
+        self._shape = None
+        self._next = 0
+
+    def next(self, shape):
+        """Returns the next buffer of the ring, reallocating the ring if the frame shape changed."""
+        if shape != self._shape:
+            self._buffers = [np.empty(shape, dtype=np.uint8).view(PooledFrame) for _ in range(self.count)]
+            self._shape = shape
+            self._next = 0
+        buffer = self._buffers[self._next]
+        self._next = (self._next + 1) % self.count
+        return buffer
+
+
+def _read_into(stream, buffer):
+    """Fills a contiguous array from a binary stream without intermediate bytes objects. Returns the bytes read."""
+    view = memoryview(buffer.reshape(-1))
+    total = 0
+    while total < len(view):
+        count = stream.readinto(view[total:])
+        if not count: break
+        total += count
+    return total
+
+
+class PooledVideoReader(FFMPEG_VideoReader):
+    """
+    moviepy's ffmpeg reader, but frames are read with readinto() straight into a ring of
+    preallocated buffers, and skipped frames into one scratch buffer, instead of allocating
+    a new bytes object for every frame. Frames are writable PooledFrame arrays.
+    """
+
+    def read_frame(self):
+        w, h = self.size
+        frame = self.pool.next((h, w, self.depth))
+        read = _read_into(self.proc.stdout, frame)
+        if read != frame.nbytes:
+            warnings.warn(f"Warning: in file {self.filename}, {frame.nbytes} bytes wanted but {read} bytes read, "
+                          f"at frame {self.pos}/{self.nframes}. Using the last valid frame instead.", UserWarning)
+            if not hasattr(self, "lastread"):
+                raise IOError(f"MoviePy error: failed to read the first frame of video file {self.filename}.")
+            return self.lastread
+        self.lastread = frame
+        return frame
+
+    def skip_frames(self, n=1):
+        w, h = self.size
+        if self.skip_buffer is None or self.skip_buffer.shape != (h, w, self.depth):
+            self.skip_buffer = np.empty((h, w, self.depth), dtype=np.uint8)
+        for _ in range(n):
+            _read_into(self.proc.stdout, self.skip_buffer)
+        self.pos += n
+
+
+def use_frame_pool(clip, count=DEFAULT_POOL_FRAMES):
+    """Switches a VideoFileClip's reader over to pooled frame buffers. Returns the clip."""
+    reader = clip.reader
+    reader.__class__ = PooledVideoReader
+    reader.pool = FrameBufferPool(count)
+    reader.skip_buffer = None
+    return clip
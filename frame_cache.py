@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+
+
+class FrameCache:
+    """
+    A bounded least-recently-used cache of rendered frames.
+    The size limit is a memory budget in MB rather than a frame count,
+    so the same cache holds more SD frames than 4K ones.
+    It is safe to share between the UI thread and the render threads.
+    """
+
+    def __init__(self, max_memory_mb=256):
+        self.max_memory_mb = max_memory_mb
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+    def get(self, key):
+        """Returns the cached frame for the key (marking it as recently used), or None."""
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def put(self, key, frame):
+        """Stores a frame and evicts the oldest entries until the cache fits its budget."""
+        if frame.nbytes > self.max_bytes: return
+        with self._lock:
+            if key in self._frames:
+                self.current_bytes -= self._frames.pop(key).nbytes
+            self._frames[key] = frame
+            self.current_bytes += frame.nbytes
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._frames.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+
+    def clear(self):
+        """Drops every cached frame. The hit/miss counters are kept."""
+        with self._lock:
+            self._frames.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Returns a small dictionary describing the cache usage."""
+        total = self.hits + self.misses
+        return {
+            "frames": len(self._frames),
+            "memory_mb": self.current_bytes / (1024 * 1024),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -1,12 +1,59 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from backend_processor import FioraBackend
+from cache_paths import CachedBuildStore, get_cache_dir
+from playback import FramePrefetcher
+from profiler import profiler
+from render_scheduler import RenderScheduler
+from thumbnail_strip import THUMBNAIL_HEIGHT, ThumbnailStrip
+from waveform_index import PeakIndex
 from PIL import Image, ImageTk
+import json
+import math
 import os
+import sys
+import time
+
+# Toolbar icons are shown at this size. The window icon is scaled down to fit APP_ICON_SIZE.
+ICON_SIZE = (20, 20)
+APP_ICON_SIZE = (128, 128)
+# With FIORA_STARTUP_REPORT set to a file path, the editor writes the wall-clock times of its startup
+# milestones there as JSON and closes once they are reached (see benchmarks/bench_startup.py).
+STARTUP_REPORT = os.environ.get("FIORA_STARTUP_REPORT")
+
+
+def _resize_icon(path, size, fit):
+    image = Image.open(path)
+    if fit:
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        return image
+    return image.resize(size, Image.Resampling.LANCZOS)
+
+
+def sized_icon(path, size, fit=False):
+    """
+    Returns a Tk image of a PNG resized to `size` (or, with fit=True, scaled down to fit inside it).
+    The resized copy is kept in the on-disk cache so that startup hands Tk a small ready-made file
+    instead of decoding and resampling the original; it is made again when the original changes.
+    If the cache cannot be written, the original is resized in memory.
+    """
+    stat = os.stat(path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    variant = f"{size[0]}x{size[1]}{'_fit' if fit else ''}"
+    try:
+        cache_path = os.path.join(get_cache_dir("icons"), f"{name}_{variant}_{stat.st_size}_{stat.st_mtime_ns}.png")
+        if not os.path.exists(cache_path):
+            partial_path = cache_path + ".part.png"
+            _resize_icon(path, size, fit).save(partial_path)
+            os.replace(partial_path, cache_path)
+    except OSError as e:
+        print(f"Warning: could not cache the resized icon {name}: {e}")
+        return ImageTk.PhotoImage(_resize_icon(path, size, fit))
+    return tk.PhotoImage(file=cache_path)
 
 
 class VideoEditorUI:
-    def __init__(self, master):
+    def __init__(self, master, video_path=None, startup_marks=None):
         self.master = master
         self.master.title("Fiora Editor")
         self.master.geometry("1200x750")
@@ -29,28 +76,76 @@ class VideoEditorUI:
         self.pixels_per_second = 20
         self.current_time = 0.0
         self.playhead_id = None
+
+        # Timeline layout and the canvas items that are kept and updated in place between redraws
+        self.TRACK_HEIGHT, self.RULER_HEIGHT = 60, 25
+        self._timeline_layout = []
+        self._timeline_height = 500
+        self._timeline_rendered = None
+        self._track_items = {}
+        self._ruler_items = []
         self.icons = {}
         self.sliders = {}
         self.is_playing = False
 
+        # Playback state: the decode-ahead thread and the wall-clock anchor it is synced to
+        self.prefetcher = None
+        self._preview_size = (0, 0)
+        self._clock_start = 0.0
+        self._clock_media_start = 0.0
+        self._stats_start = 0.0
+        self._stats_frames = 0
+
+        # Preview renders for seeks, sliders and filters run off the Tk thread; only the newest is shown
+        self.render_scheduler = RenderScheduler(self._render_preview_request)
+        self._render_poll_id = None
+
+        # Audio peak indexes for the timeline waveforms, built in the background and cached on disk.
+        # The timeline is redrawn as each one becomes ready.
+        self.waveforms = CachedBuildStore(PeakIndex, "waveforms", "peaks.npz", on_ready=self._timeline_build_ready)
+        self._timeline_poll_id = None
+
+        # Keyframe thumbnails for the V1 filmstrip, built the same way. The Tk images derived from them
+        # (with the current effects applied) are kept per thumbnail until the effects change.
+        self.thumbnails = CachedBuildStore(ThumbnailStrip, "thumbnails", f"{THUMBNAIL_HEIGHT}.thumbs.npz",
+                                           on_ready=self._timeline_build_ready)
+        self._filmstrip_items = []
+        self._filmstrip_images = {}
+        self._filmstrip_state = None
+        self._filmstrip_redraw_id = None
+
+        # Background exports: the poll that shows their progress, and the jobs already reported as finished
+        self._export_poll_id = None
+        self._reported_exports = set()
+
+        # Stage profiler readout (F9 toggles profiling, F10 saves a Chrome trace)
+        self._profile_poll_id = None
+
+        # Startup milestones (wall-clock times), and the video to open once the window is up.
+        # No media library is loaded before the window shows; moviepy loads with the first video.
+        self.startup_marks = dict(startup_marks or {})
+        self._startup_video = video_path
+
         try:
             icon_path = os.path.join("assets", "Fiora.png")
-            app_icon = tk.PhotoImage(file=icon_path)
+            app_icon = sized_icon(icon_path, APP_ICON_SIZE, fit=True)
             self.master.iconphoto(False, app_icon)
-        except tk.TclError:
+        except (tk.TclError, OSError):
             print("Icon not found: Please ensure 'Fiora.png' is in the 'assets' folder.")
 
         self._load_icons()
         self._create_widgets()
+        self.master.bind("<Map>", self._on_map, add="+")
+        if profiler.enabled: self._poll_profiler()
 
     def _load_icons(self):
-        """Loads all icon images from the 'assets' folder."""
+        """Loads all icon images from the 'assets' folder, through the cache of pre-sized copies."""
         icon_names = ["import", "export", "trim", "adjust", "filters", "color", "reset"]
         for name in icon_names:
             path = ""
             try:
                 path = os.path.join("assets", f"{name}_icon.png")
-                self.icons[name] = ImageTk.PhotoImage(Image.open(path).resize((20, 20), Image.Resampling.LANCZOS))
+                self.icons[name] = sized_icon(path, ICON_SIZE)
             except FileNotFoundError:
                 print(f"Warning: Icon file not found at {path}")
                 self.icons[name] = None
@@ -91,6 +186,7 @@ class VideoEditorUI:
                    command=self._reset_all).pack(fill=tk.X, pady=(0, 5))
         ttk.Button(bottom_buttons_frame, text=" Export Video", image=self.icons.get("export"), compound="left",
                    command=self._export_video).pack(fill=tk.X)
+        ttk.Button(bottom_buttons_frame, text="Cancel Export", command=self._cancel_export).pack(fill=tk.X, pady=(5, 0))
 
         # --- Left Toolbar Buttons ---
         ttk.Button(left_frame, text=" Import Video", image=self.icons.get("import"), compound="left",
@@ -115,6 +211,11 @@ class VideoEditorUI:
         self.preview_canvas.pack(fill=tk.BOTH, expand=True)
         self.preview_canvas.bind("<Configure>", self._resize_preview)
         self.tk_image = None
+        # Overlay with the per-stage timings, only shown while profiling.
+        self.profile_label = tk.Label(self.preview_canvas, bg="#000", fg="#7fff7f", font=('Consolas', 9),
+                                      justify=tk.LEFT, anchor=tk.W)
+        self.master.bind("<F9>", self._toggle_profiling)
+        self.master.bind("<F10>", self._save_profile_trace)
 
         controls_frame = ttk.Frame(preview_container)
         controls_frame.pack(fill=tk.X, pady=5)
@@ -126,13 +227,17 @@ class VideoEditorUI:
         mid_paned.add(timeline_panel, weight=1)
         self.track_header_canvas = tk.Canvas(timeline_panel, width=80, bg=self.FRAME_COLOR, highlightthickness=0)
         self.track_header_canvas.pack(side=tk.LEFT, fill=tk.Y)
-        h_scroll = ttk.Scrollbar(timeline_panel, orient=tk.HORIZONTAL)
-        h_scroll.pack(side=tk.BOTTOM, fill=tk.X)
+        self.timeline_scrollbar = ttk.Scrollbar(timeline_panel, orient=tk.HORIZONTAL)
+        self.timeline_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
         self.timeline_canvas = tk.Canvas(timeline_panel, bg="#1e1f23", highlightthickness=0,
-                                         xscrollcommand=h_scroll.set)
+                                         xscrollcommand=self._on_timeline_scrolled)
         self.timeline_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        h_scroll.config(command=self.timeline_canvas.xview)
+        self.timeline_scrollbar.config(command=self.timeline_canvas.xview)
         self.timeline_canvas.bind("<Button-1>", self._on_timeline_click)
+        # Ctrl + mouse wheel zooms the timeline (Button-4/5 are the wheel on X11).
+        self.timeline_canvas.bind("<Control-MouseWheel>", self._on_timeline_zoom)
+        self.timeline_canvas.bind("<Control-Button-4>", self._on_timeline_zoom)
+        self.timeline_canvas.bind("<Control-Button-5>", self._on_timeline_zoom)
 
         # --- Final Setup ---
         self._create_all_panels()
@@ -204,7 +309,8 @@ class VideoEditorUI:
         items = {"Brightness": {"range": (-1.0, 1.0), "default": 0.0, "key": "brightness"},
                  "Contrast": {"range": (-1.0, 1.0), "default": 0.0, "key": "contrast"},
                  "Shadows": {"range": (0.1, 2.0), "default": 1.0, "key": "gamma"},
-                 "Highlights": {"range": (0.1, 2.0), "default": 1.0, "key": "gamma"}}
+                 "Highlights": {"range": (0.1, 2.0), "default": 1.0, "key": "gamma"},
+                 "Speed": {"range": (0.25, 4.0), "default": 1.0, "key": "speed"}}
         return self._create_panel_with_sliders(parent, items)
 
     def _create_color_panel(self, parent):
@@ -222,21 +328,62 @@ class VideoEditorUI:
                                                                                                          padx=10)
         return frame
 
+    # --- Startup ---
+
+    def _on_map(self, event):
+        """Called when a widget is mapped; the first time the main window is, it is shown at the next idle."""
+        if event.widget is not self.master or "first_window" in self.startup_marks: return
+        self.startup_marks["first_window"] = None
+        self.master.after_idle(self._on_first_window)
+
+    def _on_first_window(self):
+        self._mark_startup("first_window")
+        if self._startup_video:
+            self._load_video(self._startup_video)
+
+    def _mark_startup(self, name):
+        """Records a startup milestone, and writes the startup report once the last one is reached."""
+        if self.startup_marks.get(name) is not None: return
+        self.startup_marks[name] = time.time()
+        last = "first_frame" if self._startup_video else "first_window"
+        if not STARTUP_REPORT or name != last: return
+        try:
+            with open(STARTUP_REPORT, "w", encoding="utf-8") as f:
+                json.dump(self.startup_marks, f)
+        except OSError as e:
+            print(f"Error writing startup report: {e}")
+        # Stops the proxy encode and the decoders that loading the video started.
+        self.processor.close()
+        self.master.after_idle(self.master.destroy)
+
     # --- Core Functionality ---
 
-    def _load_video(self):
-        """Opens a file dialog to load a video and resets the UI."""
+    def _load_video(self, file_path=None):
+        """Loads a video (asking for one with a file dialog if no path is given) and resets the UI."""
         if self.is_playing: self._toggle_playback()
-        file_path = filedialog.askopenfilename(filetypes=[("Video Files", "*.mp4 *.avi *.mov")])
+        file_path = file_path or filedialog.askopenfilename(filetypes=[("Video Files", "*.mp4 *.avi *.mov")])
         if file_path and self.processor.load_video(file_path):
             self.status_var.set(f"Loaded: {os.path.basename(file_path)}")
             # IMPORTANT: Reset the sliders in the UI to their default values for the new video.
             self._reset_sliders()
             self._update_preview()
             self._draw_timeline()
+            self._poll_proxy_progress()
         else:
             self.status_var.set("Failed to load video.")
 
+    def _poll_proxy_progress(self):
+        """Shows the preview proxy build progress and switches the preview over once it is ready."""
+        progress = self.processor.proxy_progress()
+        if progress is None: return
+        if progress < 1.0:
+            self.status_var.set(f"Building preview proxy... {progress * 100:.0f}%")
+            self.master.after(250, self._poll_proxy_progress)
+        else:
+            self.status_var.set("Preview proxy ready.")
+            if not self.is_playing:
+                self._update_preview(self.current_time)
+
     def _load_audio(self):
         """Opens a file dialog to load an additional audio track."""
         if self.is_playing: self._toggle_playback()
@@ -250,7 +397,10 @@ class VideoEditorUI:
                 self.status_var.set("Failed to load audio.")
 
     def _export_video(self):
-        """Opens a save dialog and exports the final video."""
+        """
+        Opens a save dialog and queues an export of the current edits. The export runs in the
+        background, so editing can go on and more exports can be queued behind it.
+        """
         if not self.processor.clip:
             messagebox.showwarning("Warning", "Please load a video first.")
             return
@@ -261,76 +411,271 @@ class VideoEditorUI:
         )
 
         if file_path:
-            self.status_var.set("Exporting... Please wait.")
-            self.master.update_idletasks()
-            try:
-                success = self.processor.export_video(file_path)
-                if success:
-                    self.status_var.set("Export successful!")
-                    messagebox.showinfo(
-                        "Export Successful",
-                        f"Video was successfully saved to:\n\n{os.path.abspath(file_path)}"
-                    )
-                else:
-                    self.status_var.set("Export failed. Check console for errors.")
-                    messagebox.showerror("Export Failed", "Could not export the video.")
-            except Exception as e:
-                self.status_var.set(f"Export error: {e}")
-                messagebox.showerror("Export Error", f"An unexpected error occurred:\n\n{e}")
+            self.processor.queue_export(file_path)
+            self.status_var.set(f"Queued export to {os.path.basename(file_path)}.")
+            if self._export_poll_id is None:
+                self._export_poll_id = self.master.after(250, self._poll_exports)
+
+    def _cancel_export(self):
+        """Cancels the export that is running, or the next queued one."""
+        active = self.processor.exports.active
+        if not active:
+            self.status_var.set("No export to cancel.")
+            return
+        active[0].cancel()
+        self.status_var.set(f"Cancelling export to {os.path.basename(active[0].output_path)}...")
+
+    def _poll_exports(self):
+        """Shows the running export's progress and reports exports as they finish."""
+        self._export_poll_id = None
+        for job in self.processor.exports.jobs:
+            if not job.is_finished or job in self._reported_exports: continue
+            self._reported_exports.add(job)
+            name = os.path.basename(job.output_path)
+            if job.state == "done":
+                reused = ""
+                if job.chunks_reused:
+                    chunks = job.chunks_reused + job.chunks_rendered
+                    reused = f" Reused {job.chunks_reused} of {chunks} chunks from earlier exports."
+                self.status_var.set(f"Exported {name}.{reused}")
+                messagebox.showinfo("Export Successful",
+                                    f"Video was successfully saved to:\n\n{os.path.abspath(job.output_path)}")
+            elif job.state == "cancelled":
+                self.status_var.set(f"Export to {name} cancelled.")
+            else:
+                self.status_var.set("Export failed. Check console for errors.")
+                messagebox.showerror("Export Failed", f"Could not export the video to {name}.")
+
+        active = self.processor.exports.active
+        if not active: return
+        job = active[0]
+        queued = f", {len(active) - 1} more queued" if len(active) > 1 else ""
+        if job.state == "running" and job.total_frames:
+            eta = f", {job.eta:.0f}s left" if job.eta is not None else ""
+            self.status_var.set(f"Exporting {os.path.basename(job.output_path)}: {job.progress * 100:.0f}% "
+                                f"({job.frames_done}/{job.total_frames} frames, {job.fps:.1f} fps{eta}){queued}")
+        elif job.state == "running":
+            self.status_var.set(f"Exporting {os.path.basename(job.output_path)}...{queued}")
+        self._export_poll_id = self.master.after(250, self._poll_exports)
 
     def _draw_timeline(self):
-        """Draws the video and audio tracks on the timeline canvas."""
-        self.timeline_canvas.delete("all")
+        """
+        Lays out the video and audio tracks on the timeline, then draws the visible part of them.
+        Canvas items are kept per track and moved in place, so nothing is deleted and recreated here.
+        """
         self.track_header_canvas.delete("all")
-        track_height, ruler_height = 60, 25
-        current_y = ruler_height
-
-        # Calculate total duration for the ruler based on the longest clip
-        all_clips = []
-        if self.processor.clip: all_clips.append(self.processor.clip)
-        if self.processor.main_audio_clip: all_clips.append(self.processor.main_audio_clip)
-        all_clips.extend(self.processor.additional_audio_clips)
-        total_duration = max([c.duration for c in all_clips] + [60]) if all_clips else 60
-
-        # Draw V1 (Video) track
-        self.track_header_canvas.create_text(40, current_y + track_height / 2, text="V1", fill=self.TEXT_COLOR,
+        current_y = self.RULER_HEIGHT
+
+        # Calculate total duration for the ruler based on the longest track, in timeline seconds
+        audio_sources = self.processor.audio_track_sources()
+        durations = [source[2] for source in audio_sources]
+        if self.processor.clip: durations.append(self.processor.clip.duration)
+        total_duration = max(durations + [60])
+
+        # Each layout entry is (key, top, duration, color, audio source or None).
+        layout = []
+        audio_sources = iter(audio_sources)
+
+        # V1 (Video) track
+        self.track_header_canvas.create_text(40, current_y + self.TRACK_HEIGHT / 2, text="V1", fill=self.TEXT_COLOR,
                                              font=('Segoe UI', 12, 'bold'))
         if self.processor.clip:
-            self.timeline_canvas.create_rectangle(0, current_y, self.processor.clip.duration * self.pixels_per_second,
-                                                  current_y + track_height, fill=self.ACCENT_COLOR_VIDEO,
-                                                  outline="#000")
-        current_y += track_height
+            layout.append(("V1", current_y, self.processor.clip.duration, self.ACCENT_COLOR_VIDEO, None))
+        current_y += self.TRACK_HEIGHT
 
-        # Draw Audio 1 (Main) track
+        # Audio 1 (Main) track
         if self.processor.main_audio_clip:
-            self.track_header_canvas.create_text(40, current_y + track_height / 2, text="Audio 1", fill=self.TEXT_COLOR,
-                                                 font=('Segoe UI', 10))
-            self.timeline_canvas.create_rectangle(0, current_y,
-                                                  self.processor.main_audio_clip.duration * self.pixels_per_second,
-                                                  current_y + track_height, fill=self.ACCENT_COLOR_AUDIO,
-                                                  outline="#000")
-            current_y += track_height
-
-        # Draw additional audio tracks
-        for i, audio_clip in enumerate(self.processor.additional_audio_clips):
-            self.track_header_canvas.create_text(40, current_y + track_height / 2, text=f"Audio {i + 2}",
+            self.track_header_canvas.create_text(40, current_y + self.TRACK_HEIGHT / 2, text="Audio 1",
                                                  fill=self.TEXT_COLOR, font=('Segoe UI', 10))
-            self.timeline_canvas.create_rectangle(0, current_y, audio_clip.duration * self.pixels_per_second,
-                                                  current_y + track_height, fill=self.ACCENT_COLOR_AUDIO,
-                                                  outline="#000")
-            current_y += track_height
+            source = next(audio_sources)
+            layout.append(("A1", current_y, source[2], self.ACCENT_COLOR_AUDIO, source))
+            current_y += self.TRACK_HEIGHT
 
-        # Draw time ruler
-        # ... (ruler drawing logic) ...
+        # Additional audio tracks
+        for i in range(len(self.processor.additional_audio_clips)):
+            self.track_header_canvas.create_text(40, current_y + self.TRACK_HEIGHT / 2, text=f"Audio {i + 2}",
+                                                 fill=self.TEXT_COLOR, font=('Segoe UI', 10))
+            source = next(audio_sources)
+            layout.append((f"A{i + 2}", current_y, source[2], self.ACCENT_COLOR_AUDIO, source))
+            current_y += self.TRACK_HEIGHT
+
+        # Tracks that are gone (e.g. after a reset) lose their items.
+        keys = {entry[0] for entry in layout}
+        for key in [key for key in self._track_items if key not in keys]:
+            self.timeline_canvas.delete(*self._track_items.pop(key))
+
+        self._timeline_layout = layout
+        self._timeline_height = current_y + 50
+        self.timeline_canvas.config(scrollregion=(0, 0, total_duration * self.pixels_per_second + 100,
+                                                  self._timeline_height))
+        self._render_visible_timeline(force=True)
+
+    def _render_visible_timeline(self, force=False):
+        """
+        Updates the track, filmstrip, waveform and ruler items for the visible part of the timeline.
+        One extra screen is drawn on each side, so small scrolls reuse what is already there.
+        """
+        canvas = self.timeline_canvas
+        view_start = canvas.canvasx(0)
+        view_end = canvas.canvasx(max(canvas.winfo_width(), 1))
+        rendered = self._timeline_rendered
+        if not force and rendered and rendered[0] <= view_start and view_end <= rendered[1]: return
+        margin = view_end - view_start
+        x0, x1 = max(0.0, view_start - margin), view_end + margin
+        self._timeline_rendered = (x0, x1)
+
+        filmstrip_count = 0
+        for key, top, duration, color, source in self._timeline_layout:
+            if key not in self._track_items:
+                self._track_items[key] = (
+                    canvas.create_rectangle(0, 0, 0, 0, fill=color, outline="#000"),
+                    canvas.create_polygon(0, 0, 0, 0, 0, 0, fill="#1e8449", outline="", state="hidden"))
+            rect_id, wave_id = self._track_items[key]
+            left, right = x0, min(x1, duration * self.pixels_per_second)
+            if right <= left:
+                canvas.itemconfigure(rect_id, state="hidden")
+                canvas.itemconfigure(wave_id, state="hidden")
+                continue
+            canvas.coords(rect_id, left, top, right, top + self.TRACK_HEIGHT)
+            canvas.itemconfigure(rect_id, state="normal")
+            if key == "V1":
+                filmstrip_count = self._draw_filmstrip(left, right, top, duration * self.pixels_per_second)
+            points = self._waveform_points(source, left, right, top) if source else None
+            if points:
+                canvas.coords(wave_id, *points)
+                canvas.itemconfigure(wave_id, state="normal")
+            else:
+                canvas.itemconfigure(wave_id, state="hidden")
+        for image_id in self._filmstrip_items[filmstrip_count:]:
+            canvas.itemconfigure(image_id, state="hidden")
 
-        self.timeline_canvas.config(scrollregion=(0, 0, total_duration * self.pixels_per_second + 100, current_y + 50))
+        self._draw_ruler(x0, x1)
         self._draw_playhead()
+        # The V1 rectangle is recreated after a reset, so the thumbnails are put back on top of it.
+        canvas.tag_raise("filmstrip")
+        canvas.tag_raise(self.playhead_id)
+
+        # Redraw once the peak indexes and thumbnails that are still being built are ready.
+        if (self.waveforms.busy or self.thumbnails.busy) and self._timeline_poll_id is None:
+            self._timeline_poll_id = self.master.after(250, self._poll_timeline_builds)
+
+    def _draw_filmstrip(self, left, right, top, end):
+        """
+        Places thumbnails along the V1 track between two x positions, one per thumbnail width, so the
+        time between them follows the zoom. Each shows the source where its slot starts, mapped through
+        the trim and speed, with the current effects applied. `end` is the x position where the track ends.
+        Returns how many image items were used.
+        """
+        strip = self.thumbnails.get(self.processor.source_path)
+        if strip is None: return 0
+        process, state_key = self.processor.preview_effects()
+        if (self.processor.source_path, state_key) != self._filmstrip_state:
+            self._filmstrip_images.clear()
+            self._filmstrip_state = (self.processor.source_path, state_key)
+        canvas = self.timeline_canvas
+        offset = self.processor.source_time_offset()
+        speed = self.processor.adjustments.get("speed", 1.0)
+        width, y = strip.width, top + (self.TRACK_HEIGHT - strip.height) / 2
+        slots = range(int(left // width), int(math.ceil(right / width)))
+        while len(self._filmstrip_items) < len(slots):
+            self._filmstrip_items.append(canvas.create_image(0, 0, anchor=tk.NW, tags="filmstrip"))
+        for image_id, slot in zip(self._filmstrip_items, slots):
+            x = slot * width
+            index = strip.index_at(offset + x / self.pixels_per_second * speed)
+            # The last slot is cut off where the track ends.
+            shown_width = max(1, min(width, int(end - x)))
+            image = self._filmstrip_images.get((index, shown_width))
+            if image is None:
+                pixels = strip.image(index, process)[:, :shown_width]
+                image = ImageTk.PhotoImage(image=Image.fromarray(pixels))
+                self._filmstrip_images[(index, shown_width)] = image
+            canvas.coords(image_id, x, y)
+            canvas.itemconfigure(image_id, image=image, state="normal")
+        return len(slots)
+
+    def _redraw_filmstrip_later(self):
+        """Redraws the thumbnails with the new effects once a burst of slider changes has settled."""
+        if self._filmstrip_redraw_id is not None:
+            self.master.after_cancel(self._filmstrip_redraw_id)
+        self._filmstrip_redraw_id = self.master.after(100, self._redraw_filmstrip)
+
+    def _redraw_filmstrip(self):
+        self._filmstrip_redraw_id = None
+        self._render_visible_timeline(force=True)
+
+    def _waveform_points(self, source, left, right, top):
+        """Returns polygon points for a track's min/max envelope between two x positions, or None."""
+        path, offset, _duration, speed = source
+        index = self.waveforms.get(path)
+        if index is None: return None
+        first, last = int(left), int(right)
+        # A pixel spans `speed` times as many seconds of the source as of the timeline.
+        mins, maxs, _rms = index.columns(offset + first * speed / self.pixels_per_second,
+                                         (last - first) * speed / self.pixels_per_second, last - first)
+        if len(mins) < 2: return None
+        middle, half = top + self.TRACK_HEIGHT / 2, self.TRACK_HEIGHT / 2 - 4
+        xs = range(first, last)
+        # Upper envelope left to right, then the lower envelope back, as one polygon.
+        points = [coord for x, peak in zip(xs, maxs) for coord in (x, middle - peak * half)]
+        points += [coord for x, peak in zip(reversed(xs), mins[::-1]) for coord in (x, middle - peak * half)]
+        return points
+
+    def _draw_ruler(self, x0, x1):
+        """Draws the time ruler ticks between two x positions, reusing the tick items from the last draw."""
+        canvas = self.timeline_canvas
+        # The smallest step (in seconds) that keeps the labels at least ~70 pixels apart.
+        step = next((s for s in (1, 2, 5, 10, 15, 30, 60, 120, 300, 600) if s * self.pixels_per_second >= 70), 600)
+        ticks = range(int(x0 / self.pixels_per_second // step), int(x1 / self.pixels_per_second // step) + 1)
+        while len(self._ruler_items) < len(ticks):
+            self._ruler_items.append((canvas.create_line(0, 0, 0, 0, fill="#888"),
+                                      canvas.create_text(0, 0, anchor=tk.NW, fill="#aaa", font=('Segoe UI', 8))))
+        for (line_id, text_id), tick in zip(self._ruler_items, ticks):
+            seconds = tick * step
+            x = seconds * self.pixels_per_second
+            canvas.coords(line_id, x, self.RULER_HEIGHT - 8, x, self.RULER_HEIGHT)
+            canvas.coords(text_id, x + 3, 2)
+            canvas.itemconfigure(line_id, state="normal")
+            canvas.itemconfigure(text_id, state="normal", text=f"{seconds // 60}:{seconds % 60:02d}")
+        for line_id, text_id in self._ruler_items[len(ticks):]:
+            canvas.itemconfigure(line_id, state="hidden")
+            canvas.itemconfigure(text_id, state="hidden")
+
+    def _on_timeline_scrolled(self, first, last):
+        """Keeps the scrollbar in sync and draws the newly visible part of the timeline."""
+        self.timeline_scrollbar.set(first, last)
+        self._render_visible_timeline()
+
+    def _on_timeline_zoom(self, event):
+        """Zooms the timeline around the mouse pointer."""
+        zoom_in = event.num == 4 or event.delta > 0
+        pixels_per_second = min(400, max(2, self.pixels_per_second * (1.25 if zoom_in else 0.8)))
+        if pixels_per_second == self.pixels_per_second: return
+        pointer_time = self.timeline_canvas.canvasx(event.x) / self.pixels_per_second
+        self.pixels_per_second = pixels_per_second
+        self._draw_timeline()
+        # Keep the time under the pointer where it was.
+        scroll_width = float(str(self.timeline_canvas.cget("scrollregion")).split()[2])
+        self.timeline_canvas.xview_moveto(max(0.0, (pointer_time * pixels_per_second - event.x) / scroll_width))
+
+    def _poll_timeline_builds(self):
+        """Waits for background waveform and thumbnail builds; the stores call _timeline_build_ready as each ends."""
+        self._timeline_poll_id = None
+        waveforms_busy, thumbnails_busy = self.waveforms.poll(), self.thumbnails.poll()
+        if (waveforms_busy or thumbnails_busy) and self._timeline_poll_id is None:
+            self._timeline_poll_id = self.master.after(250, self._poll_timeline_builds)
+
+    def _timeline_build_ready(self, _path):
+        """Redraws the visible timeline with a peak index or thumbnail strip that has just been built."""
+        self._render_visible_timeline(force=True)
 
     def _draw_playhead(self):
-        """Draws the red line on the timeline indicating the current time."""
-        if self.playhead_id: self.timeline_canvas.delete(self.playhead_id)
+        """Moves the red line on the timeline to the current time."""
         x_pos = self.current_time * self.pixels_per_second
-        self.playhead_id = self.timeline_canvas.create_line(x_pos, 0, x_pos, 500, fill="red", width=2)
+        if self.playhead_id is None:
+            self.playhead_id = self.timeline_canvas.create_line(x_pos, 0, x_pos, self._timeline_height,
+                                                                fill="red", width=2)
+        else:
+            self.timeline_canvas.coords(self.playhead_id, x_pos, 0, x_pos, self._timeline_height)
 
     def _on_timeline_click(self, event):
         """Handles clicks on the timeline to seek to a specific time."""
@@ -344,26 +689,64 @@ class VideoEditorUI:
             self._draw_playhead()
 
     def _update_preview(self, time=0):
-        """Updates the video preview canvas to show the frame at a specific time."""
+        """
+        Requests the preview canvas to show the frame at a specific time.
+        The frame is rendered on the render worker and drawn by _poll_render_results.
+        """
         if not self.processor.clip: return
-        frame = self.processor.clip.get_frame(time)
-        pil_image = Image.fromarray(frame)
         canvas_w, canvas_h = self.preview_canvas.winfo_width(), self.preview_canvas.winfo_height()
         if canvas_w < 2 or canvas_h < 2: return
-        ratio = min(canvas_w / self.processor.clip.w, canvas_h / self.processor.clip.h)
-        new_size = (int(self.processor.clip.w * ratio), int(self.processor.clip.h * ratio))
-        pil_image = pil_image.resize(new_size, Image.Resampling.LANCZOS)
-        self.tk_image = ImageTk.PhotoImage(image=pil_image)
+        self._preview_size = (canvas_w, canvas_h)
+        self.render_scheduler.submit((time, self._preview_size))
+        if self._render_poll_id is None:
+            self._render_poll_id = self.master.after(10, self._poll_render_results)
+
+    def _render_preview_request(self, request):
+        """Runs on the render worker thread."""
+        time, canvas_size = request
+        return self._render_preview_image(time, canvas_size)
+
+    def _poll_render_results(self):
+        """Draws the newest finished preview render, and keeps polling while renders are pending."""
+        busy = self.render_scheduler.busy
+        pil_image = self.render_scheduler.take_result()
+        # Playback owns the canvas while it runs, so late seek/slider renders are not drawn over it.
+        if pil_image is not None and not self.is_playing:
+            self._show_preview_image(pil_image)
+        self._render_poll_id = self.master.after(10, self._poll_render_results) if busy else None
+
+    def _render_preview_image(self, time, canvas_size, fast=False):
+        """
+        Renders the frame at a given time, scaled to fit the canvas.
+        The backend scales before running the effects; fast=True (playback) uses a cheaper filter.
+        This makes no Tk calls, so the playback thread can use it too.
+        """
+        return Image.fromarray(self.processor.get_frame(time, target_size=canvas_size, fast=fast))
+
+    def _show_preview_image(self, pil_image):
+        """Draws an already scaled preview image in the centre of the canvas."""
+        canvas_w, canvas_h = self.preview_canvas.winfo_width(), self.preview_canvas.winfo_height()
+        with profiler.span("photoimage"):
+            self.tk_image = ImageTk.PhotoImage(image=pil_image)
         self.preview_canvas.delete("all")
         self.preview_canvas.create_image(canvas_w / 2, canvas_h / 2, anchor=tk.CENTER, image=self.tk_image)
+        if "first_frame" not in self.startup_marks:
+            self.startup_marks["first_frame"] = None
+            self.master.after_idle(self._mark_startup, "first_frame")
 
     def _resize_preview(self, _event=None):
         """Called when the window is resized to adjust the preview size."""
-        self._update_preview(self.current_time)
+        if self.prefetcher:
+            # Frames already buffered for playback were scaled for the old size.
+            self._preview_size = (self.preview_canvas.winfo_width(), self.preview_canvas.winfo_height())
+            self.prefetcher.flush()
+        else:
+            self._update_preview(self.current_time)
 
     def _apply_trim(self):
         """Applies the trim values from the entry boxes."""
         if not self.processor.clip: return
+        if self.is_playing: self._toggle_playback()
         try:
             start = float(self.start_time_entry.get())
             end = float(self.end_time_entry.get())
@@ -385,17 +768,30 @@ class VideoEditorUI:
         """Called when a slider is moved."""
         self.processor.set_adjustment(key, value)
         self.status_var.set(f"{key.capitalize()}: {value:.2f}")
-        self._update_preview(self.current_time)
+        if key == "speed" and self.processor.clip:
+            # The timeline gets longer or shorter.
+            self.current_time = min(self.current_time, self.processor.clip.duration)
+            self._draw_timeline()
+        elif self.processor.clip:
+            self._redraw_filmstrip_later()
+        if self.prefetcher:
+            # Frames already buffered for playback were rendered with the old value.
+            self.prefetcher.flush()
+        else:
+            self._update_preview(self.current_time)
 
     def _apply_filter(self, filter_name):
         """Called when a filter button is clicked."""
         if not self.processor.clip: return
+        if self.is_playing: self._toggle_playback()
         self.processor.apply_filter(filter_name)
         self.status_var.set(f"Applied {filter_name} filter.")
         self._update_preview(self.current_time)
+        self._render_visible_timeline(force=True)
 
     def _reset_all(self):
         """Resets both the backend and the UI to the original state."""
+        if self.is_playing: self._toggle_playback()
         if self.processor.reset_all_changes():
             self.status_var.set("All changes have been reset.")
             self._reset_sliders()
@@ -416,25 +812,108 @@ class VideoEditorUI:
         self.is_playing = not self.is_playing
         if self.is_playing:
             self.play_pause_button.configure(text="⏸ Pause")
-            self._playback_loop()
+            self._start_playback()
         else:
             self.play_pause_button.configure(text="▶ Play")
+            self._stop_playback()
+
+    def _start_playback(self):
+        """Starts the decode-ahead thread and anchors the playback clock to the current time."""
+        clip = self.processor.clip
+        self._preview_size = (self.preview_canvas.winfo_width(), self.preview_canvas.winfo_height())
+        # The producer reads self._preview_size on each frame, so a resize takes effect after a flush.
+        self.prefetcher = FramePrefetcher(lambda t: self._render_preview_image(t, self._preview_size, fast=True),
+                                          clip.fps, self.current_time, clip.duration)
+        self.prefetcher.start()
+        self._clock_start = time.monotonic()
+        self._clock_media_start = self.current_time
+        self._stats_start = self._clock_start
+        self._stats_frames = 0
+        self._playback_loop()
+
+    def _stop_playback(self):
+        """Stops the decode-ahead thread."""
+        if self.prefetcher:
+            self.prefetcher.stop()
+            self.prefetcher = None
 
     def _playback_loop(self):
-        """The main loop that updates the preview during playback."""
-        if self.is_playing and self.processor.clip:
-            frame_duration = 1 / self.processor.clip.fps
-            self.current_time += frame_duration
-            if self.current_time >= self.processor.clip.duration:
-                self.current_time = self.processor.clip.duration
-                self._toggle_playback()
-                return
-            self._update_preview(self.current_time)
-            self._draw_playhead()
-            self.master.after(int(frame_duration * 1000), self._playback_loop)
+        """Shows the frame that matches the wall clock, then waits until the next frame is due."""
+        if not self.is_playing or not self.processor.clip: return
+        clip = self.processor.clip
+        now = time.monotonic()
+        self.current_time = self._clock_media_start + (now - self._clock_start)
+        if self.current_time >= clip.duration or self.prefetcher.error:
+            self.current_time = min(self.current_time, clip.duration)
+            self._toggle_playback()
+            return
+
+        # Late frames are dropped by the prefetcher; only the one matching the clock is shown.
+        frame_index = int(self.current_time * clip.fps + 0.00001)
+        pil_image = self.prefetcher.frame_for(frame_index)
+        if pil_image is not None:
+            self._show_preview_image(pil_image)
+            self._stats_frames += 1
+        self._draw_playhead()
+        self._report_playback_stats(now)
+
+        # If the frame was not ready yet, check again shortly instead of waiting a whole frame.
+        delay = (frame_index + 1) / clip.fps - self.current_time if pil_image is not None else 0.005
+        self.master.after(max(1, int(delay * 1000)), self._playback_loop)
+
+    def _report_playback_stats(self, now):
+        """Shows the achieved frame rate and the dropped-frame count in the status bar."""
+        elapsed = now - self._stats_start
+        if elapsed < 0.5: return
+        achieved_fps = self._stats_frames / elapsed
+        self.status_var.set(f"Playing: {achieved_fps:.1f} / {self.processor.clip.fps:g} fps, "
+                            f"{self.prefetcher.dropped} frames dropped")
+        self._stats_start = now
+        self._stats_frames = 0
+
+    # --- Profiling ---
+
+    def _toggle_profiling(self, _event=None):
+        """Turns the stage profiler on or off (F9)."""
+        profiler.set_enabled(not profiler.enabled)
+        if profiler.enabled:
+            profiler.clear()
+            self.status_var.set("Profiling on. F10 saves a Chrome trace, F9 turns it off.")
+            # A quick off/on leaves the previous poll pending, which would start a second loop.
+            if self._profile_poll_id is not None:
+                self.master.after_cancel(self._profile_poll_id)
+            self._poll_profiler()
+        else:
+            self.status_var.set("Profiling off.")
+
+    def _poll_profiler(self):
+        """Refreshes the timing overlay on the preview while profiling is on."""
+        if not profiler.enabled:
+            self.profile_label.place_forget()
+            self._profile_poll_id = None
+            return
+        stages = ["get_frame", "decode", "colour_lut", "grayscale", "invert_colors", "mirror_x",
+                  "resize", "photoimage"]
+        self.profile_label.config(text=profiler.readout(stages).replace("  ", "\n"))
+        self.profile_label.place(x=8, y=8)
+        self._profile_poll_id = self.master.after(500, self._poll_profiler)
+
+    def _save_profile_trace(self, _event=None):
+        """Saves the recorded stage timings as a Chrome trace-event file (F10)."""
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Chrome Trace", "*.json")],
+                                                 initialfile="fiora_trace.json")
+        if not file_path: return
+        try:
+            count = profiler.dump_chrome_trace(file_path)
+            self.status_var.set(f"Saved {count} trace events to {os.path.basename(file_path)}")
+        except OSError as e:
+            messagebox.showerror("Trace Error", f"Could not save the trace:\n\n{e}")
 
 
 if __name__ == "__main__":
+    imported = time.time()
     root = tk.Tk()
-    app = VideoEditorUI(root)
+    # An optional video path on the command line is opened as soon as the window is up.
+    app = VideoEditorUI(root, video_path=sys.argv[1] if len(sys.argv) > 1 else None,
+                        startup_marks={"imported": imported})
     root.mainloop()
@@ -0,0 +1,120 @@
+import os
+import threading
+
+from moviepy.audio.AudioClip import AudioClip
+from moviepy.audio.io.AudioFileClip import AudioFileClip
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from cache_paths import file_fingerprint
+
+# What moviepy's AudioFileClip decodes to by default.
+AUDIO_FPS = 44100
+AUDIO_CHANNELS = 2
+
+
+class MediaSource:
+    """
+    One media file in the registry. Its duration comes from a quick probe; the decoder itself
+    (an ffmpeg process plus its sample buffer) is only started by the first open() call and is
+    then shared by every clip made from this source.
+    """
+
+    def __init__(self, registry, key, path, duration):
+        self.registry = registry
+        self.key = key
+        self.path = path
+        self.duration = duration
+        self.refs = 0
+        self._clip = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._clip is not None
+
+    def open(self):
+        """Returns the shared decoder clip, starting it on first use."""
+        with self._lock:
+            if self._clip is None:
+                self._clip = AudioFileClip(self.path, fps=AUDIO_FPS)
+            return self._clip
+
+    def close(self):
+        with self._lock:
+            if self._clip is not None:
+                self._clip.close()
+                self._clip = None
+
+
+class LazyAudioClip(AudioClip):
+    """
+    An audio clip over a MediaSource that only starts the source's decoder when samples are read.
+    subclip() and fx() copies share the source, so the original, trimmed and volume-adjusted
+    versions of a track all use one decoder.
+    """
+
+    def __init__(self, source):
+        AudioClip.__init__(self)
+        self.source = source
+        self.fps = AUDIO_FPS
+        self.nchannels = AUDIO_CHANNELS
+        self.duration = self.end = source.duration
+        self.make_frame = lambda t: source.open().get_frame(t)
+
+    def close(self):
+        # The registry closes the decoder when the last reference is released.
+        pass
+
+
+class MediaRegistry:
+    """
+    Hands out shared, reference-counted media sources. A file opened twice, under the same path or
+    through another name for it (see file_fingerprint), gets the same source, so importing a track
+    that is already loaded starts no new decoder, and no decoder starts at all until samples are needed.
+    """
+
+    def __init__(self):
+        self._sources = {}
+        # (path, size, mtime) -> content key, so re-importing a file does not hash it again.
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def _content_key(self, path):
+        stat = os.stat(path)
+        path_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if path_key not in self._keys:
+            self._keys[path_key] = file_fingerprint(path)
+        return self._keys[path_key]
+
+    def acquire_audio(self, path, infos=None):
+        """
+        Returns a LazyAudioClip for a file's audio, registering the file if needed. `infos` can pass
+        in moviepy's probe of the file when the caller already has it.
+        Every acquire must be matched by a release(clip.source). Raises IOError if the file has no audio.
+        """
+        with self._lock:
+            key = ("audio", self._content_key(path))
+            source = self._sources.get(key)
+            if source is None:
+                infos = infos or ffmpeg_parse_infos(path)
+                if not infos.get("audio_found"):
+                    raise IOError(f"No audio stream in {path}")
+                source = self._sources[key] = MediaSource(self, key, path, infos["duration"])
+            source.refs += 1
+        return LazyAudioClip(source)
+
+    def release(self, source):
+        """Drops one reference to a source, closing its decoder when it was the last one."""
+        with self._lock:
+            source.refs -= 1
+            if source.refs > 0: return
+            self._sources.pop(source.key, None)
+        source.close()
+
+    def open_decoders(self):
+        """The number of sources whose decoder is running."""
+        with self._lock:
+            return sum(1 for source in self._sources.values() if source.is_open)
+
+    def __len__(self):
+        return len(self._sources)
@@ -0,0 +1,207 @@
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from export_pipeline import ExportPipeline, encoder_settings, render_edited_video
+from ffmpeg_tools import probe_keyframe_times, concat_copy
+from profiler import profiler
+
+# Half the cores by default, leaving the rest for the x264 threads inside each worker.
+DEFAULT_EXPORT_WORKERS = max(1, min(4, (os.cpu_count() or 1) // 2))
+# x264 holds about this many frames (its lookahead plus frame threads) before it writes one out, so a
+# frame is counted as done only once this many more have been sent, and the rest when the encoder exits.
+ENCODER_DELAY_FRAMES = 60
+
+# Set in each worker process by _init_worker: encoded frame counts go back to the parent on
+# _progress_queue, and setting _cancel_event stops every worker at its next frame.
+_progress_queue = None
+_cancel_event = None
+
+
+def plan_segments(total_frames, fps, workers, source_offset=0.0, keyframe_times=None, speed=1.0):
+    """
+    Splits the output frame range into at most `workers` contiguous segments.
+    Each inner boundary is moved to a nearby source keyframe when there is one, so every
+    worker starts decoding at a keyframe instead of decoding forward to its first frame.
+    `speed` is the timeline's playback speed: output second t shows source second t * speed.
+    Returns a list of (first_frame, end_frame) pairs.
+    """
+    boundaries = [0]
+    segment_length = total_frames / max(workers, 1)
+    for i in range(1, workers):
+        boundary = int(round(segment_length * i))
+        if keyframe_times:
+            target = boundary * speed / fps + source_offset
+            nearest = min(keyframe_times, key=lambda k: abs(k - target))
+            # Only snap when it keeps the segments roughly balanced.
+            if abs(nearest - target) * fps / speed <= segment_length / 4:
+                boundary = int(round((nearest - source_offset) * fps / speed))
+        if boundaries[-1] < boundary < total_frames:
+            boundaries.append(boundary)
+    boundaries.append(total_frames)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _init_worker(progress_queue, cancel_event):
+    global _progress_queue, _cancel_event
+    _progress_queue, _cancel_event = progress_queue, cancel_event
+
+
+def _render_segment(job, writer=None):
+    """
+    Worker-process entry point: renders and encodes one segment of the edited timeline.
+    `writer` replaces the encoder for job["output_path"], for entry points that wrap this one.
+    Returns (frame count, seconds, profiler trace events or an empty list, stage utilisation).
+    """
+    profiler.set_enabled(job["profile"])
+    started = time.perf_counter()
+    pipeline = ExportPipeline()
+    sent = [0]
+
+    def report(frames):
+        sent[0] += frames
+        if sent[0] > ENCODER_DELAY_FRAMES: _progress_queue.put(frames)
+        if _cancel_event.is_set(): pipeline.cancel()
+    pipeline.progress = report
+    with profiler.span("export.segment", "export"):
+        render_edited_video(job["source_path"], job["edits"], job["adjustments"], job["output_path"],
+                            job["fps"], job["first_frame"], job["end_frame"], job["encoder"],
+                            job["effect_threads"], pipeline=pipeline, writer=writer)
+    # The writer is closed, so the encoder has exited and the held back frames are done.
+    _progress_queue.put(min(sent[0], ENCODER_DELAY_FRAMES))
+    events = profiler.export_events() if job["profile"] else []
+    return job["end_frame"] - job["first_frame"], time.perf_counter() - started, events, pipeline.utilization()
+
+
+def _drain_progress(progress_queue, job):
+    frames = 0
+    try:
+        while True:
+            frames += progress_queue.get_nowait()
+    except queue.Empty:
+        pass
+    if job and frames: job.advance(frames)
+
+
+def render_segments(segment_jobs, workers, job=None, alongside=None, worker=_render_segment):
+    """
+    Renders segment jobs (see _render_segment) in a pool of at most `workers` processes.
+    `alongside()` runs in this process while they render, and `worker` can replace _render_segment
+    with a function that wraps it. `job` (an export_queue.ExportJob) receives the frame progress
+    and can cancel the workers. Returns (the result of alongside(), each segment's stage utilisation).
+    """
+    alongside_result = []
+
+    def run_alongside():
+        try:
+            alongside_result.append(alongside())
+        except Exception as e:
+            alongside_result.append(e)
+    # 'spawn' so the workers do not inherit the UI's threads and open ffmpeg pipes.
+    context = multiprocessing.get_context("spawn")
+    progress_queue, cancel_event = context.Queue(), context.Event()
+    if job: job.on_cancel(cancel_event.set)
+    alongside_thread = None
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(segment_jobs))), mp_context=context,
+                             initializer=_init_worker, initargs=(progress_queue, cancel_event)) as pool:
+        futures = [pool.submit(worker, segment_job) for segment_job in segment_jobs]
+        if alongside:
+            # On a thread, so the workers' progress keeps being drained while it runs.
+            alongside_thread = threading.Thread(target=run_alongside, name="fiora-export-alongside", daemon=True)
+            alongside_thread.start()
+
+        utilizations = []
+        try:
+            with profiler.span("export.wait_for_segments", "export"):
+                pending = futures
+                while pending:
+                    _done, pending = wait(pending, timeout=0.2)
+                    # Always drained: a worker cannot exit while its queued progress is unread.
+                    _drain_progress(progress_queue, job)
+                for future in futures:
+                    _frames, _seconds, events, utilization = future.result()
+                    profiler.import_events(events)
+                    utilizations.append(utilization)
+        finally:
+            if alongside_thread: alongside_thread.join()
+    # The last counts are sent as each worker returns, possibly after its future was seen done.
+    _drain_progress(progress_queue, job)
+    result = alongside_result[0] if alongside_result else None
+    if isinstance(result, Exception):
+        raise result
+    return result, utilizations
+
+
+def export_parallel(backend, output_path, workers=DEFAULT_EXPORT_WORKERS, encoder=None, job=None):
+    """
+    Exports the backend's edited video by rendering keyframe-aligned segments in separate
+    worker processes and joining them with a stream-copy concat. Each worker runs its own
+    decode/effects/encode pipeline; `encoder` overrides the DEFAULT_ENCODER settings.
+    The audio is mixed once, in this process, while the workers render.
+    `job` (an export_queue.ExportJob) receives the workers' frame progress and can cancel them.
+    Returns a dictionary with the frame count, elapsed time and throughput.
+    """
+    started = time.perf_counter()
+    clip = backend.clip
+    fps = clip.fps
+    total_frames = int(math.ceil(clip.duration * fps - 0.00001))
+    if job: job.begin(total_frames)
+
+    try:
+        keyframe_times = probe_keyframe_times(backend.source_path)
+    except IOError as e:
+        print(f"Warning: {e}. Segments will not be keyframe-aligned.")
+        keyframe_times = None
+    segments = plan_segments(total_frames, fps, workers, backend.source_time_offset(), keyframe_times,
+                             backend.adjustments.get("speed", 1.0))
+
+    temp_dir = tempfile.mkdtemp(prefix="fiora_export_")
+    encoder = encoder_settings(encoder)
+    if encoder["threads"] is None:
+        # Share the cores between the workers' encoders.
+        encoder["threads"] = max(1, (os.cpu_count() or 1) // len(segments))
+    jobs = [{
+        "source_path": backend.source_path,
+        "edits": backend.edits.copy(),
+        "adjustments": dict(backend.adjustments),
+        "fps": fps,
+        "first_frame": first_frame,
+        "end_frame": end_frame,
+        "encoder": encoder,
+        "effect_threads": max(1, backend.effect_threads // len(segments)),
+        "profile": profiler.enabled,
+        "output_path": os.path.join(temp_dir, f"segment_{i:04d}.mp4"),
+    } for i, (first_frame, end_frame) in enumerate(segments)]
+
+    try:
+        audio_path = os.path.join(temp_dir, "audio.m4a")
+
+        def mix_audio():
+            with profiler.span("export.audio_mix", "export"):
+                return backend.write_final_audio(audio_path)
+        audio_written, utilizations = render_segments(jobs, len(jobs), job, alongside=mix_audio)
+        if not audio_written:
+            audio_path = None
+
+        if job: job.raise_if_cancelled()
+        with profiler.span("export.concat", "export"):
+            concat_copy([segment_job["output_path"] for segment_job in jobs], output_path, audio_path,
+                        list_path=os.path.join(temp_dir, "segments.txt"))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    elapsed = time.perf_counter() - started
+    print(f"Exported {total_frames} frames in {elapsed:.1f}s "
+          f"({total_frames / elapsed:.1f} fps) using {len(jobs)} workers.")
+    # The workers' average, so the bottleneck stage of a typical segment shows first.
+    average = {name: sum(u.get(name, 0.0) for u in utilizations) / len(utilizations) for name in utilizations[0]}
+    print("Stage utilisation per worker: " +
+          ", ".join(f"{name} {share:.0%}" for name, share in sorted(average.items(), key=lambda item: -item[1])))
+    return {"frames": total_frames, "seconds": elapsed, "fps": total_frames / elapsed, "workers": len(jobs),
+            "utilization": average}
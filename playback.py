@@ -0,0 +1,84 @@
+import threading
+from collections import deque
+
+
+class FramePrefetcher:
+    """
+    Renders upcoming playback frames on a background thread into a bounded ring buffer.
+    The consumer asks for the frame that matches its wall clock; frames that are
+    already late are dropped, and the producer skips ahead when it falls behind.
+    """
+
+    def __init__(self, render_frame, fps, start_time, end_time, capacity=8):
+        # render_frame(time) must be safe to call off the Tk thread.
+        self.render_frame = render_frame
+        self.fps = fps
+        self.capacity = capacity
+        self._frames = deque()
+        self._condition = threading.Condition()
+        self._next_index = int(start_time * fps + 0.00001)
+        self._target_index = self._next_index
+        self._last_index = max(int(end_time * fps - 0.00001), self._next_index)
+        self._running = False
+        self._thread = None
+        self.dropped = 0
+        self.error = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="fiora-playback", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the producer thread and discards any buffered frames."""
+        with self._condition:
+            self._running = False
+            self._frames.clear()
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def flush(self):
+        """Discards buffered frames, e.g. after an adjustment changed how frames look."""
+        with self._condition:
+            self._frames.clear()
+            self._next_index = self._target_index
+            self._condition.notify_all()
+
+    def frame_for(self, index):
+        """
+        Returns the newest buffered frame at or before the clock's frame index, or None if
+        the producer has not reached it yet. Older buffered frames are dropped as late.
+        """
+        with self._condition:
+            self._target_index = index
+            frame = None
+            while self._frames and self._frames[0][0] <= index:
+                if frame is not None:
+                    self.dropped += 1
+                frame = self._frames.popleft()[1]
+            self._condition.notify_all()
+            return frame
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and len(self._frames) >= self.capacity:
+                    self._condition.wait()
+                if not self._running: return
+                # If the clock has already passed the next frame, skip straight to the clock.
+                index = max(self._next_index, self._target_index)
+                self.dropped += index - self._next_index
+                self._next_index = index + 1
+                if index > self._last_index: return
+            try:
+                frame = self.render_frame(index / self.fps)
+            except Exception as e:
+                print(f"ERROR: Could not render playback frame. Reason: {e}")
+                self.error = e
+                return
+            with self._condition:
+                # A flush or a stop while rendering makes this frame stale.
+                if not self._running or index >= self._next_index: continue
+                self._frames.append((index, frame))
+                self._condition.notify_all()
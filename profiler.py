@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Durations kept per stage for the rolling percentiles.
+ROLLING_WINDOW = 300
+# Trace events kept for the Chrome trace; the oldest are dropped first.
+MAX_TRACE_EVENTS = 200000
+
+
+class _NullSpan:
+    """The span handed out while profiling is off: entering and leaving it does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, profiler, name, category):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter(), self.category)
+        return False
+
+
+class StageProfiler:
+    """
+    Times named stages of the frame path and of export. While disabled, span() returns a shared
+    no-op object, so instrumented code only pays for one attribute check per stage.
+    Keeps a rolling window of durations per stage and a list of Chrome trace events
+    (chrome://tracing or https://ui.perfetto.dev can open the dumped file).
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._durations = {}
+        self._events = deque(maxlen=MAX_TRACE_EVENTS)
+        self._thread_names = {}
+        self._lock = threading.Lock()
+        # Trace timestamps are microseconds since this origin.
+        self._origin = time.perf_counter()
+
+    def span(self, name, category="frame"):
+        """Returns a context manager that times one run of a stage."""
+        if not self.enabled: return _NULL_SPAN
+        return _Span(self, name, category)
+
+    def record(self, name, start, end, category="frame"):
+        """Records one run of a stage from perf_counter() start and end times."""
+        thread = threading.current_thread()
+        with self._lock:
+            if name not in self._durations:
+                self._durations[name] = deque(maxlen=ROLLING_WINDOW)
+            self._durations[name].append(end - start)
+            self._thread_names.setdefault((os.getpid(), thread.ident), thread.name)
+            self._events.append({
+                "name": name, "cat": category, "ph": "X",
+                "ts": (start - self._origin) * 1e6, "dur": (end - start) * 1e6,
+                "pid": os.getpid(), "tid": thread.ident,
+            })
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+
+    def clear(self):
+        with self._lock:
+            self._durations.clear()
+            self._events.clear()
+
+    def percentiles(self, name, points=(50, 95)):
+        """Returns the given percentiles of a stage's recent durations in milliseconds, or None."""
+        with self._lock:
+            durations = list(self._durations.get(name, ()))
+        if not durations: return None
+        return [float(value) * 1000 for value in np.percentile(durations, points)]
+
+    def summary(self):
+        """Returns {stage: (p50 ms, p95 ms, runs in window)} for every stage seen so far."""
+        with self._lock:
+            windows = {name: list(durations) for name, durations in self._durations.items()}
+        return {name: tuple(float(value) * 1000 for value in np.percentile(durations, (50, 95))) + (len(durations),)
+                for name, durations in windows.items() if durations}
+
+    def readout(self, names):
+        """A compact one-line "stage p50/p95 ms" summary for the given stages, for a status display."""
+        parts = []
+        for name in names:
+            stats = self.percentiles(name)
+            if stats:
+                parts.append(f"{name} {stats[0]:.1f}/{stats[1]:.1f}")
+        return "  ".join(parts) + "  (p50/p95 ms)" if parts else "Profiling: no samples yet"
+
+    def export_events(self):
+        """Returns the recorded trace events with absolute perf_counter() microsecond timestamps."""
+        with self._lock:
+            return [dict(event, ts=event["ts"] + self._origin * 1e6) for event in self._events]
+
+    def import_events(self, events):
+        """Adds trace events exported by another process (e.g. an export worker) and their durations."""
+        with self._lock:
+            for event in events:
+                self._events.append(dict(event, ts=event["ts"] - self._origin * 1e6))
+                self._thread_names.setdefault((event["pid"], event["tid"]), f"worker {event['pid']}")
+                if event["name"] not in self._durations:
+                    self._durations[event["name"]] = deque(maxlen=ROLLING_WINDOW)
+                self._durations[event["name"]].append(event["dur"] / 1e6)
+
+    def dump_chrome_trace(self, path):
+        """Writes the recorded events as a Chrome trace-event JSON file. Returns the number of events."""
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+        metadata = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                    for (pid, tid), name in thread_names.items()]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+
+# The process-wide profiler. Set FIORA_PROFILE=1 to start with profiling on.
+profiler = StageProfiler(enabled=os.environ.get("FIORA_PROFILE", "") not in ("", "0"))
@@ -0,0 +1,81 @@
+import os
+import subprocess
+import threading
+
+from cache_paths import get_cache_dir, file_fingerprint
+from ffmpeg_tools import ffmpeg_binary
+
+# Height of the low-resolution preview proxy. Sources at or below this size are previewed directly.
+PROXY_HEIGHT = 540
+
+
+class ProxyGenerator:
+    """
+    Builds a low-resolution, short-GOP copy of a source video in a background thread.
+    Proxies are stored in the on-disk cache under the source's content hash,
+    so reopening the same file reuses the proxy instead of encoding it again.
+    """
+
+    def __init__(self, source_path, duration, proxy_height=PROXY_HEIGHT):
+        self.source_path = source_path
+        self.duration = duration
+        self.proxy_height = proxy_height
+        self.proxy_path = os.path.join(get_cache_dir("proxies"),
+                                       f"{file_fingerprint(source_path)}_{proxy_height}p.mp4")
+        self.progress = 0.0
+        self.ready = False
+        self.failed = False
+        self._process = None
+        self._thread = None
+        self._cancelled = False
+
+    def start(self):
+        """Reuses a cached proxy if there is one, otherwise starts encoding it in the background."""
+        if os.path.exists(self.proxy_path):
+            self.progress = 1.0
+            self.ready = True
+            return
+        self._thread = threading.Thread(target=self._run, name="fiora-proxy", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Stops an in-progress proxy encode. The partial file is discarded."""
+        self._cancelled = True
+        if self._process and self._process.poll() is None:
+            self._process.kill()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        partial_path = self.proxy_path + ".part.mp4"
+        cmd = [
+            ffmpeg_binary(), "-y", "-loglevel", "error", "-nostats",
+            "-i", self.source_path, "-an",
+            "-vf", f"scale=-2:{self.proxy_height}",
+            # A short GOP keeps random seeks on the proxy cheap.
+            "-c:v", "libx264", "-preset", "ultrafast", "-crf", "26", "-g", "12", "-pix_fmt", "yuv420p",
+            "-progress", "pipe:1", partial_path,
+        ]
+        try:
+            self._process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                             universal_newlines=True)
+            # ffmpeg writes key=value progress lines; out_time_us is the encoded position.
+            for line in self._process.stdout:
+                key, _, value = line.strip().partition("=")
+                if key in ("out_time_us", "out_time_ms") and value.isdigit() and self.duration:
+                    self.progress = min(int(value) / 1e6 / self.duration, 0.99)
+            error = self._process.stderr.read()
+            if self._process.wait() != 0 or self._cancelled:
+                if not self._cancelled:
+                    print(f"ERROR: Could not build preview proxy. Reason: {error.strip()}")
+                    self.failed = True
+                return
+            os.replace(partial_path, self.proxy_path)
+            self.progress = 1.0
+            self.ready = True
+        except Exception as e:
+            print(f"ERROR: Could not build preview proxy. Reason: {e}")
+            self.failed = True
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
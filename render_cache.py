@@ -0,0 +1,289 @@
+import hashlib
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from cache_paths import get_cache_dir, file_fingerprint
+from color_engine import ColorLUT
+from export_pipeline import ExportPipeline, encoder_settings, open_writer, render_edited_video, write_frame
+from ffmpeg_tools import concat_copy
+from parallel_export import _render_segment, render_segments
+from profiler import profiler
+
+# Output seconds per chunk. Shorter chunks are reused after smaller edits, but each one costs
+# an encoder start and a keyframe.
+CHUNK_SECONDS = 2.0
+# Disk budget for encoded chunks; the least recently used ones are deleted first.
+DEFAULT_RENDER_CACHE_MB = 2048
+# Bumped whenever the way a chunk is rendered changes, so that old chunks are not reused.
+_CACHE_VERSION = 1
+_EPSILON = 0.00001
+
+
+class RenderCache:
+    """
+    Encoded video chunks from earlier exports, stored on disk under a hash of what they show.
+    The cache is bounded to `max_mb`; trim() deletes the least recently used chunks first.
+    Chunks are rendered under a temporary name and renamed when complete, so a cancelled or
+    crashed export never leaves a partial chunk to be reused.
+    """
+
+    def __init__(self, max_mb=DEFAULT_RENDER_CACHE_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.directory = get_cache_dir("render_chunks")
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.mp4")
+
+    def get(self, key):
+        """Returns the path of the cached chunk (marking it as recently used), or None."""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def trim(self):
+        """Deletes the least recently used chunks until the cache fits its budget."""
+        entries = []
+        for name in os.listdir(self.directory):
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _mtime, size, _name in entries)
+        for _mtime, size, name in sorted(entries):
+            if total <= self.max_bytes: break
+            try:
+                os.remove(os.path.join(self.directory, name))
+                total -= size
+            except OSError as e:
+                print(f"Warning: could not remove cached chunk {name}: {e}")
+
+
+# --- Chunk planning ---
+
+def shown_source_frames(edits, speed, fps, total_frames):
+    """
+    The source frame shown at each output frame of the edited timeline, as an array. Mirrors the
+    frame arithmetic of the export readers, so equal arrays mean equal (unfiltered) frames.
+    """
+    index = np.arange(total_frames)
+    if speed > 1.0:
+        # time_remap.remapped_source_clip: the range's first frame plus source_frame(index, speed).
+        return int(fps * edits.source_in + _EPSILON) + (index * speed + _EPSILON).astype(np.int64)
+    # EditDecisionList.render: time_remap.source_frame, then the cut's offset, then the reader's index.
+    remapped = (index * speed + _EPSILON).astype(np.int64) if speed != 1.0 else index
+    return (fps * (remapped / fps + edits.source_in) + _EPSILON).astype(np.int64)
+
+
+def plan_chunks(edits, speed, fps, total_frames, chunk_seconds=CHUNK_SECONDS):
+    """
+    Splits the output frames into chunks on a fixed grid of source time, each about `chunk_seconds`
+    of output. Because the grid follows the source rather than the timeline, moving a cut only
+    changes the chunks at that cut. Returns a list of (first_frame, end_frame, source frames).
+    """
+    frames = shown_source_frames(edits, speed, fps, total_frames)
+    cell = max(1, int(round(chunk_seconds * fps * speed)))
+    cells = frames // cell
+    boundaries = [0] + (np.flatnonzero(np.diff(cells)) + 1).tolist() + [total_frames]
+    return [(first, end, frames[first:end]) for first, end in zip(boundaries[:-1], boundaries[1:]) if end > first]
+
+
+def chunk_key_base(source_path, edits, adjustments, fps, encoder):
+    """Hashes everything but the frame list that decides what an encoded chunk contains."""
+    lut = ColorLUT.from_adjustments(adjustments)
+    digest = hashlib.sha1(repr((_CACHE_VERSION, file_fingerprint(source_path), fps, encoder["codec"],
+                                encoder["preset"], encoder["crf"], tuple(edits.pipeline_filters()))).encode())
+    # The compiled tables rather than the slider values, so settings with the same effect share chunks.
+    if not lut.is_identity:
+        digest.update(lut.luts.tobytes())
+    return digest
+
+
+def chunk_key(base, source_frames):
+    digest = base.copy()
+    digest.update(np.ascontiguousarray(source_frames, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+# --- Export ---
+
+def _partial_path(cache_path):
+    """Where a chunk is encoded before it is complete: next to its cache file, so the rename stays on one disk."""
+    return f"{cache_path[:-len('.mp4')]}.{os.getpid()}.part.mp4"
+
+
+class ChunkWriter:
+    """
+    Stands in for the encoder of an ExportPipeline, encoding consecutive chunks of its frames to
+    separate files. A chunk is moved into the cache as soon as it is complete; its encoder is
+    flushed on a thread of its own while the next chunk starts.
+    """
+
+    def __init__(self, chunks, fps, encoder):
+        # (frame count, cache path) for each chunk still to be written, in order.
+        self.chunks = list(chunks)
+        self.fps = fps
+        self.encoder = encoder
+        self.filename = self.chunks[0][1]
+        self._writer = None
+        self._written = 0
+        self._closing = []
+        self._errors = []
+
+    def write_frame(self, frame):
+        if self._writer is None:
+            self.filename = self.chunks[0][1]
+            self._writer = open_writer(_partial_path(self.filename), (frame.shape[1], frame.shape[0]),
+                                       self.fps, self.encoder)
+        write_frame(self._writer, frame)
+        self._written += 1
+        if self._written < self.chunks[0][0]: return
+        self._finish(self._writer, self.chunks.pop(0)[1])
+        self._writer, self._written = None, 0
+
+    def _finish(self, writer, cache_path):
+        def run():
+            try:
+                writer.close()
+                os.replace(writer.filename, cache_path)
+            except Exception as e:
+                self._errors.append(e)
+        thread = threading.Thread(target=run, name="fiora-export-chunk_close", daemon=True)
+        self._closing.append(thread)
+        thread.start()
+
+    def close(self):
+        """Waits for the finished chunks. A chunk left incomplete by an error or a cancel is deleted."""
+        if self._writer is not None:
+            self._writer.close()
+            os.remove(self._writer.filename)
+            self._writer = None
+        for thread in self._closing:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+
+def _render_chunks(chunk_job):
+    """Worker-process entry point: renders a run of consecutive chunks (see parallel_export._render_segment)."""
+    return _render_segment(chunk_job, ChunkWriter(chunk_job["chunks"], chunk_job["fps"], chunk_job["encoder"]))
+
+
+def _plan_runs(missing, workers):
+    """
+    Groups the chunks to render into runs of consecutive chunks, each rendered by one pipeline, so
+    the source is opened and sought once per run rather than once per chunk. Long runs are split
+    until every worker has one. `missing` holds (first_frame, end_frame, cache path) per chunk.
+    """
+    runs = []
+    for chunk in missing:
+        if runs and runs[-1][-1][1] == chunk[0]:
+            runs[-1].append(chunk)
+        else:
+            runs.append([chunk])
+    while runs and len(runs) < workers:
+        longest = max(runs, key=len)
+        if len(longest) < 2: break
+        index = runs.index(longest)
+        runs[index:index + 1] = [longest[:len(longest) // 2], longest[len(longest) // 2:]]
+    return runs
+
+
+def export_chunked(backend, output_path, cache, workers=1, encoder=None, job=None):
+    """
+    Exports the backend's edited video as fixed-duration chunks kept in `cache` (a RenderCache).
+    Chunks an earlier export already encoded with the same source frames, filters, colour settings
+    and encoder settings are reused as they are; only the others are rendered, in worker processes
+    when `workers` > 1. The chunks and the audio mix are then joined without re-encoding.
+    `job` (an export_queue.ExportJob) receives the progress, counting reused chunks as done straight
+    away, and can cancel the export; chunks finished before a cancel stay cached.
+    Returns a dictionary with the frame count, elapsed time and the chunk counts.
+    """
+    started = time.perf_counter()
+    clip = backend.clip
+    fps = clip.fps
+    total_frames = int(math.ceil(clip.duration * fps - 0.00001))
+    if job: job.begin(total_frames)
+    encoder = encoder_settings(encoder)
+    base = chunk_key_base(backend.source_path, backend.edits, backend.adjustments, fps, encoder)
+
+    chunk_paths, missing = [], []
+    for first_frame, end_frame, source_frames in plan_chunks(backend.edits, backend.adjustments.get("speed", 1.0),
+                                                             fps, total_frames):
+        key = chunk_key(base, source_frames)
+        path = cache.get(key)
+        if path is None:
+            path = cache.path(key)
+            missing.append((first_frame, end_frame, path))
+        chunk_paths.append(path)
+    rendered_frames = sum(end_frame - first_frame for first_frame, end_frame, _path in missing)
+    if job and rendered_frames < total_frames: job.advance(total_frames - rendered_frames)
+
+    runs = _plan_runs(missing, workers)
+    workers = max(1, min(workers, len(runs)))
+    if encoder["threads"] is None and workers > 1:
+        # Share the cores between the workers' encoders.
+        encoder["threads"] = max(1, (os.cpu_count() or 1) // workers)
+    run_jobs = [{
+        "source_path": backend.source_path,
+        "edits": backend.edits.copy(),
+        "adjustments": dict(backend.adjustments),
+        "fps": fps,
+        "first_frame": run[0][0],
+        "end_frame": run[-1][1],
+        "encoder": encoder,
+        "effect_threads": max(1, backend.effect_threads // workers),
+        "profile": profiler.enabled,
+        "output_path": None,
+        "chunks": [(end_frame - first_frame, path) for first_frame, end_frame, path in run],
+    } for run in runs]
+
+    temp_dir = tempfile.mkdtemp(prefix="fiora_export_")
+    try:
+        audio_path = os.path.join(temp_dir, "audio.m4a")
+
+        def mix_audio():
+            with profiler.span("export.audio_mix", "export"):
+                return backend.write_final_audio(audio_path)
+        if workers > 1:
+            audio_written, _utilizations = render_segments(run_jobs, workers, job, alongside=mix_audio,
+                                                           worker=_render_chunks)
+        else:
+            audio_written = []
+            for run_job in run_jobs:
+                if job: job.raise_if_cancelled()
+                pipeline = ExportPipeline(progress=job.advance if job else None)
+                if job: job.on_cancel(pipeline.cancel)
+                if run_job is run_jobs[0]:
+                    # The audio mix runs alongside the first run.
+                    pipeline.add_job("audio_mix", lambda: audio_written.append(mix_audio()))
+                with profiler.span("export.chunks", "export"):
+                    render_edited_video(run_job["source_path"], run_job["edits"], run_job["adjustments"], None,
+                                        fps, run_job["first_frame"], run_job["end_frame"], encoder,
+                                        run_job["effect_threads"], pipeline=pipeline,
+                                        writer=ChunkWriter(run_job["chunks"], fps, encoder))
+            audio_written = audio_written[0] if run_jobs else mix_audio()
+        if job: job.raise_if_cancelled()
+        with profiler.span("export.concat", "export"):
+            concat_copy(chunk_paths, output_path, audio_path if audio_written else None,
+                        list_path=os.path.join(temp_dir, "chunks.txt"))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        cache.trim()
+
+    elapsed = time.perf_counter() - started
+    reused = len(chunk_paths) - len(missing)
+    if job: job.chunks_reused, job.chunks_rendered = reused, len(missing)
+    print(f"Exported {total_frames} frames in {elapsed:.1f}s: reused {reused} of {len(chunk_paths)} chunks, "
+          f"rendered {len(missing)} ({rendered_frames} frames).")
+    return {"frames": total_frames, "seconds": elapsed, "chunks": len(chunk_paths), "reused": reused,
+            "rendered": len(missing), "rendered_frames": rendered_frames}
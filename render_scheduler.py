@@ -0,0 +1,74 @@
+import threading
+
+
+class RenderScheduler:
+    """
+    Runs preview renders on a worker thread and coalesces the requests.
+    Only the newest request is kept: anything still waiting when a newer one arrives
+    is skipped without being rendered. A render that is already in progress is not
+    interrupted mid-decode, but its result is only kept if nothing newer has finished.
+    """
+
+    def __init__(self, render):
+        # render(request) is called on the worker thread and must not touch Tk.
+        self.render = render
+        self._condition = threading.Condition()
+        self._pending = None
+        self._generation = 0
+        self._in_flight = False
+        self._result = None
+        self._result_generation = 0
+        self._running = True
+        self.rendered = 0
+        self.skipped = 0
+        self._thread = threading.Thread(target=self._run, name="fiora-render", daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self):
+        """True while a request is waiting or being rendered."""
+        with self._condition:
+            return self._pending is not None or self._in_flight
+
+    def submit(self, request):
+        """Queues a render, replacing any request that has not started yet."""
+        with self._condition:
+            if self._pending is not None:
+                self.skipped += 1
+            self._generation += 1
+            self._pending = (self._generation, request)
+            self._condition.notify()
+
+    def take_result(self):
+        """Returns the newest finished result that has not been taken yet, or None."""
+        with self._condition:
+            result, self._result = self._result, None
+            return result
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._pending = None
+            self._condition.notify()
+        self._thread.join(timeout=2)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending is None:
+                    self._condition.wait()
+                if not self._running: return
+                generation, request = self._pending
+                self._pending = None
+                self._in_flight = True
+            try:
+                result = self.render(request)
+            except Exception as e:
+                print(f"ERROR: Could not render preview. Reason: {e}")
+                result = None
+            with self._condition:
+                self._in_flight = False
+                self.rendered += 1
+                if result is not None and generation > self._result_generation:
+                    self._result = result
+                    self._result_generation = generation
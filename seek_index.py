@@ -0,0 +1,184 @@
+import bisect
+import copy
+import math
+import os
+import subprocess
+import threading
+
+import numpy as np
+
+from cache_paths import get_cache_dir, file_fingerprint
+from ffmpeg_tools import ffmpeg_binary, probe_keyframe_times
+from frame_buffers import FrameBufferPool
+
+# Decoders kept open per video. Each one is an ffmpeg process parked at its own position.
+DEFAULT_DECODERS = 3
+# Seek costs in units of one frame decoded forward through the pipe (decode, RGB conversion, read).
+# Restarting ffmpeg costs about RESTART_COST_FRAMES, plus KEYFRAME_DECODE_COST for every frame that
+# ffmpeg decodes and drops between the keyframe and the target (measured on 720p H.264).
+RESTART_COST_FRAMES = 32
+KEYFRAME_DECODE_COST = 0.5
+# moviepy's own rule for when to restart instead of decoding forward, used until the index is ready.
+_FALLBACK_MAX_SKIP = 100
+
+
+class KeyframeIndex:
+    """
+    The sorted keyframe times of a video. Stored in the on-disk cache under the file's
+    content hash, so reopening a file does not probe its keyframes again.
+    """
+
+    def __init__(self, times):
+        self.times = list(times)
+
+    @classmethod
+    def load_or_build(cls, path):
+        cache_path = os.path.join(get_cache_dir("keyframes"), f"{file_fingerprint(path)}.npy")
+        if os.path.exists(cache_path):
+            try:
+                return cls(np.load(cache_path).tolist())
+            except (OSError, ValueError) as e:
+                print(f"Warning: discarding unreadable keyframe index {cache_path}: {e}")
+        index = cls(probe_keyframe_times(path))
+        partial_path = cache_path + ".part.npy"
+        np.save(partial_path, np.asarray(index.times, dtype=np.float64))
+        os.replace(partial_path, cache_path)
+        return index
+
+    def keyframe_before(self, time):
+        """Returns the time of the last keyframe at or before `time` (0.0 before the first one)."""
+        i = bisect.bisect_right(self.times, time + 0.00001) - 1
+        return self.times[i] if i >= 0 else 0.0
+
+
+class DecoderPool:
+    """
+    Stands in for a VideoFileClip's reader with several decoders of the same file, each parked
+    at a different position. A frame request goes to whichever decoder reaches it for the fewest
+    decoded frames: one that is already there, one a little behind it that can decode forward,
+    or, when a keyframe makes it cheaper, the least recently used one restarted at that keyframe.
+    So scrubbing back and forth reuses warm decoders instead of restarting ffmpeg for every seek.
+    """
+
+    def __init__(self, reader, size=DEFAULT_DECODERS, keyframes=None):
+        self.decoders = [reader]
+        self.size = size
+        self.keyframes = keyframes
+        self._last_used = {id(reader): 0}
+        self._clock = 0
+        self._lock = threading.Lock()
+        self._index_thread = None
+
+    def __getattr__(self, name):
+        # fps, size, duration, infos and the other reader attributes come from the first decoder.
+        if name == "decoders": raise AttributeError(name)
+        return getattr(self.decoders[0], name)
+
+    def load_keyframes(self, path):
+        """Loads or builds the keyframe index in the background. Seeks use moviepy's rule until it is ready."""
+        self._index_thread = threading.Thread(target=self._load_keyframes, args=(path,),
+                                              name="fiora-keyframes", daemon=True)
+        self._index_thread.start()
+
+    def _load_keyframes(self, path):
+        try:
+            self.keyframes = KeyframeIndex.load_or_build(path)
+        except Exception as e:
+            print(f"Warning: could not index keyframes of {path}: {e}")
+
+    def get_frame(self, t):
+        # The same frame numbering as FFMPEG_VideoReader.get_frame.
+        pos = int(self.decoders[0].fps * t + 0.00001) + 1
+        with self._lock:
+            decoder, restart = self._choose(pos, t)
+            self._clock += 1
+            self._last_used[id(decoder)] = self._clock
+            if restart:
+                self._restart(decoder, pos)
+                return decoder.read_frame()
+            if decoder.pos == pos:
+                return decoder.lastread
+            decoder.skip_frames(pos - decoder.pos - 1)
+            frame = decoder.read_frame()
+            decoder.pos = pos
+            return frame
+
+    def _choose(self, pos, t):
+        """Returns (decoder, restart) for the cheapest way to reach frame `pos`."""
+        keyframes = self.keyframes
+        if keyframes:
+            frames_after_keyframe = (t - keyframes.keyframe_before(t)) * self.decoders[0].fps
+            restart_cost = RESTART_COST_FRAMES + KEYFRAME_DECODE_COST * frames_after_keyframe
+        else:
+            restart_cost = _FALLBACK_MAX_SKIP
+        best, best_cost = None, restart_cost
+        for decoder in self.decoders:
+            if not decoder.proc or decoder.pos > pos: continue
+            cost = pos - decoder.pos
+            if cost <= best_cost:
+                best, best_cost = decoder, cost
+        if best is not None:
+            return best, False
+        if len(self.decoders) < self.size:
+            decoder = self._clone(self.decoders[0])
+            self.decoders.append(decoder)
+            return decoder, True
+        return min(self.decoders, key=lambda d: self._last_used.get(id(d), 0)), True
+
+    @staticmethod
+    def _restart(decoder, pos):
+        """
+        Restarts a decoder's ffmpeg at frame `pos` with a single accurate input seek: ffmpeg jumps to
+        the keyframe before it and drops the frames up to it before converting them. moviepy's own
+        initialize() decodes the last second through the filters, and seeks to the exact time instead
+        of the frame's start, which can land one frame late.
+        """
+        _stop(decoder)
+        cmd = [ffmpeg_binary()]
+        if pos > 1:
+            # Rounded down to the microsecond: rounding up could drop the wanted frame, and seeking
+            # any earlier would fall back to the previous keyframe when the frame is a keyframe.
+            cmd += ["-ss", "%.06f" % (math.floor((pos - 1) / decoder.fps * 1e6) / 1e6)]
+        cmd += ["-i", decoder.filename, "-loglevel", "error", "-f", "image2pipe",
+                "-vf", "scale=%d:%d" % tuple(decoder.size), "-sws_flags", decoder.resize_algo,
+                "-pix_fmt", decoder.pix_fmt, "-vcodec", "rawvideo", "-"]
+        decoder.proc = subprocess.Popen(cmd, bufsize=decoder.bufsize, stdin=subprocess.DEVNULL,
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        decoder.pos = pos
+
+    @staticmethod
+    def _clone(reader):
+        """A second reader of the same file, without probing the file again."""
+        decoder = copy.copy(reader)
+        decoder.proc = None
+        if hasattr(decoder, "pool"):
+            # Pooled readers need their own frame ring.
+            decoder.pool = FrameBufferPool(reader.pool.count)
+            decoder.skip_buffer = None
+        return decoder
+
+    def close(self):
+        with self._lock:
+            for decoder in self.decoders:
+                _stop(decoder)
+                decoder.close()
+
+
+def _stop(decoder):
+    """Kills a decoder's ffmpeg. It only writes to our pipe, so unlike moviepy's terminate() and wait
+    for a clean exit, which takes ~50ms, there is nothing to lose by killing it."""
+    if not decoder.proc: return
+    decoder.proc.kill()
+    decoder.proc.stdout.close()
+    decoder.proc.stderr.close()
+    decoder.proc.wait()
+    decoder.proc = None
+
+
+def use_decoder_pool(clip, size=DEFAULT_DECODERS, index_keyframes=True):
+    """Gives a VideoFileClip a pool of decoders for random access. Returns the clip."""
+    pool = DecoderPool(clip.reader, size)
+    clip.reader = pool
+    if index_keyframes:
+        pool.load_keyframes(clip.filename)
+    return clip
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import time
+
+from ffmpeg_tools import run_ffmpeg, probe_keyframe_times, probe_streams, concat_copy
+
+
+def export_trim_only(source_path, start, end, fps, output_path):
+    """
+    Exports source[start:end] with container-level stream copy ("smart render").
+    Only the partial GOPs at the two cut points are re-encoded, so the cuts stay
+    frame-accurate while the untouched GOPs in between are copied byte for byte.
+    Returns False (without writing anything) when the source cannot be cut this way,
+    in which case the caller should fall back to a full re-encode.
+    """
+    streams = probe_streams(source_path)
+    # The re-encoded edges must use the same codec and pixel format as the copied GOPs.
+    if streams.get("video") != "h264" or streams.get("video_pix_fmt") != "yuv420p":
+        return False
+
+    # Snap the cuts to the frame grid the same way moviepy's reader picks frames.
+    start = int(start * fps + 0.00001) / fps
+    end = int(end * fps + 0.00001) / fps
+    keyframes = [k for k in probe_keyframe_times(source_path) if start <= k <= end]
+    if len(keyframes) < 2:
+        # No complete GOP inside the range, so there is nothing to copy.
+        return False
+    copy_start, copy_end = keyframes[0], keyframes[-1]
+
+    started = time.perf_counter()
+    temp_dir = tempfile.mkdtemp(prefix="fiora_trim_")
+    try:
+        segments = []
+        if copy_start > start:
+            segments.append(_encode_range(source_path, start, copy_start, fps, os.path.join(temp_dir, "head.mp4")))
+
+        # Whole GOPs are copied. Counting packets rather than using -t keeps the cut exact even
+        # with B-frames, because a closed GOP's packets are exactly that GOP's frames.
+        middle_path = os.path.join(temp_dir, "middle.mp4")
+        run_ffmpeg(["-ss", f"{copy_start:.6f}", "-i", source_path, "-map", "0:v:0",
+                    "-frames:v", str(int(round((copy_end - copy_start) * fps))), "-c", "copy",
+                    "-avoid_negative_ts", "make_zero", middle_path])
+        segments.append(middle_path)
+
+        if end > copy_end:
+            segments.append(_encode_range(source_path, copy_end, end, fps, os.path.join(temp_dir, "tail.mp4")))
+
+        audio_path = None
+        if "audio" in streams:
+            audio_path = os.path.join(temp_dir, "audio.m4a")
+            # AAC can be cut with stream copy (to within one ~20ms packet); anything else is encoded.
+            audio_codec = ["-c:a", "copy"] if streams["audio"] == "aac" else ["-c:a", "aac"]
+            run_ffmpeg(["-ss", f"{start:.6f}", "-i", source_path, "-t", f"{end - start:.6f}",
+                        "-map", "0:a:0"] + audio_codec + [audio_path])
+
+        concat_copy(segments, output_path, audio_path, list_path=os.path.join(temp_dir, "segments.txt"))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print(f"Smart-rendered trim in {time.perf_counter() - started:.1f}s: "
+          f"copied {copy_end - copy_start:.2f}s, re-encoded {(copy_start - start) + (end - copy_end):.2f}s.")
+    return True
+
+
+def _encode_range(source_path, start, end, fps, output_path):
+    """Re-encodes the exact frames in [start, end) of the source."""
+    frame_count = int(round((end - start) * fps))
+    run_ffmpeg(["-ss", f"{start:.6f}", "-i", source_path, "-map", "0:v:0", "-frames:v", str(frame_count),
+                "-c:v", "libx264", "-preset", "medium", "-crf", "18", "-pix_fmt", "yuv420p", output_path])
+    return output_path
@@ -0,0 +1,108 @@
+import os
+import re
+import subprocess
+
+import numpy as np
+
+from ffmpeg_tools import ffmpeg_binary
+
+# Thumbnail height in pixels; the width follows the video's aspect ratio.
+THUMBNAIL_HEIGHT = 48
+# Thumbnails are kept at least this many source seconds apart.
+MIN_SPACING_SECONDS = 0.5
+# Longer videos get fewer thumbnails per second, which bounds the cached strip to a few MB.
+MAX_THUMBNAILS = 1200
+# A video with keyframes further apart than this is decoded in full instead (see ThumbnailStrip.build).
+MAX_KEYFRAME_GAP_SECONDS = 5.0
+
+_SHOWN = re.compile(r"pts_time:(-?[0-9.]+)\s.*?\bs:(\d+)x(\d+)")
+_DURATION = re.compile(r"Duration: (\d+):(\d+):([0-9.]+)")
+
+
+class ThumbnailStrip:
+    """
+    Small thumbnails of one video at known source times, for the timeline filmstrip. They are
+    decoded once, without effects; trimmed, sped-up and filtered states are all drawn from them.
+    """
+
+    def __init__(self, times, images):
+        # Sorted source times, and an (n, height, width, 3) uint8 array with one thumbnail per time.
+        self.times = np.asarray(times, dtype=np.float64)
+        self.images = images
+
+    @property
+    def width(self):
+        return self.images.shape[2]
+
+    @property
+    def height(self):
+        return self.images.shape[1]
+
+    @classmethod
+    def build(cls, path):
+        """
+        Decodes only the keyframes, which skips nearly all the decoding work. If the keyframes are
+        too far apart for a useful strip, every frame is decoded instead, with the loop filter
+        skipped since the frames are shrunk to thumbnails anyway.
+        """
+        times, images, duration = cls._decode(path, keyframes_only=True, spacing=MIN_SPACING_SECONDS)
+        ends = np.append(times[1:], max(duration, times[-1]))
+        if (ends - times).max() > MAX_KEYFRAME_GAP_SECONDS:
+            spacing = max(MIN_SPACING_SECONDS, duration / MAX_THUMBNAILS)
+            times, images, _duration = cls._decode(path, keyframes_only=False, spacing=spacing)
+        if len(times) > MAX_THUMBNAILS:
+            keep = np.unique(np.linspace(0, len(times) - 1, MAX_THUMBNAILS).round().astype(np.int64))
+            times, images = times[keep], images[keep]
+        return cls(times, np.ascontiguousarray(images))
+
+    @staticmethod
+    def _decode(path, keyframes_only, spacing):
+        """
+        Runs one ffmpeg decode that keeps a frame once it is `spacing` seconds after the last one kept.
+        Returns (times, images, duration); showinfo reports the time and size of each kept frame.
+        """
+        cmd = [ffmpeg_binary(), "-hide_banner", "-nostats"]
+        cmd += ["-skip_frame", "nokey"] if keyframes_only else ["-skip_loop_filter", "all"]
+        cmd += ["-i", path, "-map", "0:v:0",
+                "-vf", f"select='isnan(prev_selected_t)+gte(t-prev_selected_t\\,{spacing!r})',"
+                       f"scale=-2:{THUMBNAIL_HEIGHT},showinfo",
+                # Pass the kept frames through as they are, rather than duplicating them back to a constant rate.
+                "-vsync", "0", "-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        log = result.stderr.decode(errors="replace")
+        shown = _SHOWN.findall(log)
+        if result.returncode != 0 or not shown:
+            raise IOError(f"Could not decode thumbnails of {path}")
+        width, height = int(shown[0][1]), int(shown[0][2])
+        if len(result.stdout) != len(shown) * height * width * 3:
+            raise IOError(f"Unexpected thumbnail data from {path}")
+        images = np.frombuffer(result.stdout, dtype=np.uint8).reshape(len(shown), height, width, 3)
+        duration = _DURATION.search(log)
+        duration = int(duration[1]) * 3600 + int(duration[2]) * 60 + float(duration[3]) if duration else 0.0
+        return np.array([float(time) for time, _w, _h in shown]), images, duration
+
+    def save(self, cache_path):
+        partial_path = cache_path + ".part.npz"
+        np.savez(partial_path, times=self.times, images=self.images)
+        os.replace(partial_path, cache_path)
+
+    @classmethod
+    def load(cls, cache_path):
+        with np.load(cache_path) as data:
+            return cls(data["times"], data["images"])
+
+    def index_at(self, source_time):
+        """Returns the index of the last thumbnail at or before a source time (the first one before that)."""
+        return max(0, int(np.searchsorted(self.times, source_time + 0.00001, side="right")) - 1)
+
+    def image(self, index, process=None):
+        """
+        Returns thumbnail `index` with an effect function (EditDecisionList.frame_function) applied,
+        as an array that is safe to keep.
+        """
+        frame = self.images[index]
+        if process is None: return frame
+        # Imported here so the editor window can open before moviepy has loaded (frame_buffers imports its reader).
+        from frame_buffers import detach
+        # The effects write into a reused work buffer, which is copied out before the next thumbnail.
+        return detach(process(frame))
@@ -0,0 +1,48 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads for the export's frame effects. Half the cores by default, leaving the rest for x264.
+DEFAULT_EFFECT_THREADS = max(1, (os.cpu_count() or 1) // 2)
+# Tiles smaller than this cost more in hand-offs than they gain.
+MIN_TILE_ROWS = 32
+
+_runners = {}
+_runners_lock = threading.Lock()
+
+
+class TileRunner:
+    """
+    Runs a row-local function over horizontal tiles of a frame on a thread pool. The numpy work
+    in the effects releases the GIL, so the tiles really do run on separate cores, and every
+    tile writes its own rows of one shared output buffer, so nothing has to be stitched together.
+    """
+
+    def __init__(self, threads):
+        self.threads = threads
+        # The calling thread works on a tile too, so the pool needs one thread less.
+        self._executor = ThreadPoolExecutor(max(1, threads - 1), thread_name_prefix="fiora-effects")
+
+    def tiles(self, height):
+        """Splits `height` rows into at most one tile per thread, as evenly as possible."""
+        count = max(1, min(self.threads, height // MIN_TILE_ROWS))
+        bounds = [height * i // count for i in range(count + 1)]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def run(self, function, height):
+        """Calls function(top, bottom) for every tile and waits for all of them. The first tile runs on this thread."""
+        tiles = self.tiles(height)
+        futures = [self._executor.submit(function, top, bottom) for top, bottom in tiles[1:]]
+        function(*tiles[0])
+        for future in futures:
+            # Re-raises an effect's exception here.
+            future.result()
+
+
+def tile_runner(threads):
+    """Returns the process-wide TileRunner for a thread count, so rebuilding a clip does not start new threads."""
+    with _runners_lock:
+        runner = _runners.get(threads)
+        if runner is None:
+            runner = _runners[threads] = TileRunner(threads)
+        return runner
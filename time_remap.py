@@ -0,0 +1,169 @@
+import math
+import subprocess
+
+import numpy as np
+
+from ffmpeg_tools import ffmpeg_binary
+
+# Above this many frames between two wanted frames, the remapped reader restarts ffmpeg instead of reading on.
+MAX_SKIP_FRAMES = 100
+# Time-stretch window: ~46 ms at 44.1 kHz, long enough to resolve pitch, short enough to keep transients.
+STRETCH_FFT_SIZE = 2048
+# Output frames transformed at once; bounds the stretch's temporary arrays to a few MB.
+STRETCH_BLOCK_FRAMES = 256
+_EPSILON = 0.00001
+
+
+# --- Frame mapping ---
+
+def source_frame(index, speed):
+    """The frame of the edited range (counted from its first frame) shown at output frame `index`."""
+    return int(index * speed + _EPSILON)
+
+
+def _select_expression(first_source_frame, speed):
+    """
+    An ffmpeg select expression that keeps exactly the frames source_frame() maps to, when ffmpeg's
+    frame 0 is range frame `first_source_frame`: frame m is kept if the first output frame at or
+    after it maps to it.
+    """
+    m = f"(n+{first_source_frame})"
+    return f"lt(ceil(({m}-{_EPSILON})/{speed!r})*{speed!r}+{_EPSILON},{m}+1)"
+
+
+class RemappedVideoReader:
+    """
+    Reads the frames of a sped-up range in output order from a single ffmpeg process. A select
+    filter drops the frames that are not shown inside ffmpeg, before their RGB conversion and the
+    pipe, so a skipped frame costs only its decode and output frames are read back to back.
+    """
+
+    def __init__(self, reader, first_frame, speed):
+        # A (pooled) moviepy reader of the source, for its stream details and frame buffers.
+        self.reader = reader
+        # The source frame the edited range starts on.
+        self.first_frame = first_frame
+        self.speed = speed
+        # The output frame last read, or None before the first read.
+        self.index = None
+
+    def get_frame(self, index):
+        """Returns output frame `index`. Reading forward is sequential; going back restarts ffmpeg."""
+        reader = self.reader
+        if self.index is not None and index == self.index:
+            return reader.lastread
+        if self.index is None or index < self.index or index > self.index + MAX_SKIP_FRAMES:
+            self._restart(index)
+        else:
+            reader.skip_frames(index - self.index - 1)
+        self.index = index
+        return reader.read_frame()
+
+    def _restart(self, index):
+        """Starts ffmpeg at the source frame of output frame `index`, with an accurate input seek."""
+        reader = self.reader
+        reader.close()
+        offset = source_frame(index, self.speed)
+        cmd = [ffmpeg_binary()]
+        start = self.first_frame + offset
+        if start > 0:
+            # Rounded down to the microsecond, so the seek cannot land past the frame (see seek_index).
+            cmd += ["-ss", "%.06f" % (math.floor(start / reader.fps * 1e6) / 1e6)]
+        cmd += ["-i", reader.filename, "-loglevel", "error", "-f", "image2pipe",
+                "-vf", "select='%s',scale=%d:%d" % ((_select_expression(offset, self.speed),) + tuple(reader.size)),
+                # Pass the selected frames through as they are, rather than duplicating them back to a constant rate.
+                "-vsync", "0", "-sws_flags", reader.resize_algo,
+                "-pix_fmt", reader.pix_fmt, "-vcodec", "rawvideo", "-"]
+        reader.proc = subprocess.Popen(cmd, bufsize=reader.bufsize, stdin=subprocess.DEVNULL,
+                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        reader.pos = index
+
+
+def remapped_source_clip(source_clip, edits, speed):
+    """
+    Returns the edited range of `source_clip` (a pooled VideoFileClip) sped up by `speed` > 1, as a clip
+    that reads its frames through a RemappedVideoReader. The filters are not applied. Closing the source
+    clip stops the reader's ffmpeg.
+    """
+    # Imported here so worker processes do not import moviepy at module load.
+    from moviepy.video.VideoClip import VideoClip
+
+    fps = source_clip.fps
+    remapped = RemappedVideoReader(source_clip.reader, int(fps * edits.source_in + _EPSILON), speed)
+    # Built without a make_frame, so that VideoClip does not read a frame to find the size.
+    clip = VideoClip(duration=edits.duration(source_clip.duration) / speed)
+    clip.make_frame = lambda t: remapped.get_frame(int(fps * t + _EPSILON))
+    clip.size = source_clip.size
+    clip.fps = fps
+    return clip
+
+
+# --- Audio time-stretch ---
+
+def _lock_phases(magnitude, angle, phases):
+    """
+    Identity phase locking over (frames, bins, channels) arrays: every bin takes the running phase of
+    the nearest spectral peak, plus its own phase offset from that peak in the source frame.
+    """
+    bins = magnitude.shape[1]
+    peak = np.zeros(magnitude.shape, dtype=bool)
+    peak[:, 1:-1] = (magnitude[:, 1:-1] >= magnitude[:, :-2]) & (magnitude[:, 1:-1] > magnitude[:, 2:])
+    index = np.arange(bins)[None, :, None]
+    # The closest peak at or below each bin, and at or above it (-1 and `bins` where there is none).
+    below = np.maximum.accumulate(np.where(peak, index, -1), axis=1)
+    above = np.minimum.accumulate(np.where(peak, index, bins)[:, ::-1], axis=1)[:, ::-1]
+    use_below = (below >= 0) & ((index - below <= above - index) | (above >= bins))
+    nearest = np.where(use_below, below, np.where(above < bins, above, index))
+    return (np.take_along_axis(phases, nearest, axis=1) + angle
+            - np.take_along_axis(angle, nearest, axis=1))
+
+
+def stretch_audio(samples, speed, fft_size=STRETCH_FFT_SIZE):
+    """
+    Time-stretches (samples, channels) audio to len / speed samples without changing its pitch.
+
+    A phase vocoder: every output frame takes the magnitudes of the source around its mapped
+    position, and a phase that advances from the previous output frame by as much as the source's
+    phase advances over one hop at that position (measured from a second transform one hop earlier).
+    The bins around each spectral peak are then locked to the peak's phase, as they are in the source,
+    which keeps the partials coherent. All the frames of a block are transformed, locked and
+    overlap-added as arrays; only the running phase is carried from block to block.
+    """
+    if speed == 1.0: return samples
+    samples = np.asarray(samples, dtype=np.float32)
+    hop = fft_size // 4
+    channels = samples.shape[1]
+    output_length = int(round(len(samples) / speed))
+    frame_count = output_length // hop + 4
+    # Frame k is centred on output sample k * hop, and on source sample round(k * hop * speed).
+    centres = np.round(np.arange(frame_count) * hop * speed).astype(np.int64)
+    padding = fft_size
+    padded = np.zeros((max(len(samples), centres[-1]) + 2 * padding, channels), dtype=np.float32)
+    padded[padding:padding + len(samples)] = samples
+    starts = centres + padding - fft_size // 2
+
+    window = np.hanning(fft_size + 1)[:-1].astype(np.float32)[:, None]
+    offsets = np.arange(fft_size)
+    out = np.zeros(((frame_count + 3) * hop, channels), dtype=np.float32)
+    phase = np.zeros((fft_size // 2 + 1, channels))
+    for first in range(0, frame_count, STRETCH_BLOCK_FRAMES):
+        block = starts[first:first + STRETCH_BLOCK_FRAMES]
+        current = np.fft.rfft(padded[block[:, None] + offsets] * window, axis=1)
+        previous = np.fft.rfft(padded[block[:, None] - hop + offsets] * window, axis=1)
+        magnitude, angle = np.abs(current), np.angle(current)
+        advance = angle - np.angle(previous)
+        if first == 0:
+            # The first frame starts from the source's own phase.
+            advance[0] = angle[0]
+        phases = phase + np.cumsum(advance, axis=0)
+        phase = np.mod(phases[-1], 2 * np.pi)
+        phases = _lock_phases(magnitude, angle, phases)
+        frames = np.fft.irfft(magnitude * np.exp(1j * phases), n=fft_size, axis=1).astype(np.float32) * window
+        # Overlap-add: with a quarter-frame hop, each quarter of a frame lands on its own hop-sized slot.
+        count = len(block)
+        for quarter in range(4):
+            slots = out[(first + quarter) * hop:(first + quarter + count) * hop].reshape(count, hop, channels)
+            slots += frames[:, quarter * hop:(quarter + 1) * hop]
+    # A Hann window applied twice at a quarter-frame hop sums to 1.5.
+    out /= 1.5
+    return out[fft_size // 2:fft_size // 2 + output_length]
@@ -0,0 +1,110 @@
+import os
+import subprocess
+
+import numpy as np
+
+from ffmpeg_tools import ffmpeg_binary
+
+PEAK_SAMPLE_RATE = 44100
+# Samples summarised by one entry of the finest level (~5.8ms at 44.1 kHz).
+BASE_BLOCK_SIZE = 256
+# Samples decoded per read while building, a multiple of BASE_BLOCK_SIZE.
+_READ_BLOCKS = 4096
+
+
+class PeakIndex:
+    """
+    A min/max/RMS pyramid for one audio source. Level 0 summarises BASE_BLOCK_SIZE samples
+    per entry and every following level merges pairs of entries, like image mipmaps,
+    so any zoom level can be drawn from a level that is at most twice as detailed as needed.
+    """
+
+    def __init__(self, levels, sample_rate=PEAK_SAMPLE_RATE, block_size=BASE_BLOCK_SIZE):
+        # Each level is an (n, 3) float32 array of (min, max, rms) rows.
+        self.levels = levels
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+
+    @classmethod
+    def build(cls, path):
+        """Builds the index with a streaming decode, so memory use does not grow with the track length."""
+        cmd = [ffmpeg_binary(), "-loglevel", "error", "-i", path, "-vn",
+               "-f", "f32le", "-ac", "1", "-ar", str(PEAK_SAMPLE_RATE), "-"]
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        rows = []
+        leftover = np.empty(0, dtype=np.float32)
+        try:
+            while True:
+                data = process.stdout.read(BASE_BLOCK_SIZE * _READ_BLOCKS * 4)
+                if not data: break
+                samples = np.concatenate((leftover, np.frombuffer(data, dtype=np.float32)))
+                whole = len(samples) // BASE_BLOCK_SIZE * BASE_BLOCK_SIZE
+                rows.append(cls._summarise(samples[:whole].reshape(-1, BASE_BLOCK_SIZE)))
+                leftover = samples[whole:]
+        finally:
+            process.stdout.close()
+            if process.wait() != 0:
+                raise IOError(f"Could not decode audio from {path}")
+        if len(leftover):
+            rows.append(cls._summarise(leftover.reshape(1, -1)))
+
+        base = np.concatenate(rows) if rows else np.zeros((1, 3), dtype=np.float32)
+        levels = [base]
+        while len(levels[-1]) > 1:
+            levels.append(cls._merge_pairs(levels[-1]))
+        return cls(levels)
+
+    @staticmethod
+    def _summarise(blocks):
+        return np.stack((blocks.min(axis=1), blocks.max(axis=1),
+                         np.sqrt(np.mean(np.square(blocks), axis=1))), axis=1).astype(np.float32)
+
+    @staticmethod
+    def _merge_pairs(level):
+        if len(level) % 2:
+            level = np.concatenate((level, level[-1:]))
+        pairs = level.reshape(-1, 2, 3)
+        return np.stack((pairs[:, :, 0].min(axis=1), pairs[:, :, 1].max(axis=1),
+                         np.sqrt(np.mean(np.square(pairs[:, :, 2]), axis=1))), axis=1)
+
+    def save(self, cache_path):
+        partial_path = cache_path + ".part.npz"
+        np.savez(partial_path, sample_rate=self.sample_rate, block_size=self.block_size,
+                 **{f"level_{i}": level for i, level in enumerate(self.levels)})
+        os.replace(partial_path, cache_path)
+
+    @classmethod
+    def load(cls, cache_path):
+        with np.load(cache_path) as data:
+            count = sum(1 for name in data.files if name.startswith("level_"))
+            return cls([data[f"level_{i}"] for i in range(count)],
+                       int(data["sample_rate"]), int(data["block_size"]))
+
+    def columns(self, start, duration, pixel_count):
+        """
+        Returns (mins, maxs, rms) arrays with one value per pixel for source[start:start + duration],
+        taken from the coarsest level that still has at least one entry per pixel.
+        """
+        if pixel_count < 1 or duration <= 0:
+            return np.zeros(0), np.zeros(0), np.zeros(0)
+        seconds_per_pixel = duration / pixel_count
+        level_index = 0
+        while (level_index + 1 < len(self.levels) and
+               self.block_size * 2 ** (level_index + 1) / self.sample_rate <= seconds_per_pixel):
+            level_index += 1
+        level = self.levels[level_index]
+        entry_seconds = self.block_size * 2 ** level_index / self.sample_rate
+
+        # The first level entry that falls into each pixel column.
+        edges = ((start + np.arange(pixel_count) * seconds_per_pixel) / entry_seconds).astype(np.int64)
+        valid = edges < len(level)
+        mins, maxs, rms = np.zeros(pixel_count), np.zeros(pixel_count), np.zeros(pixel_count)
+        if valid.any():
+            starts = edges[valid]
+            # Stop the last column at the end of the range rather than at the end of the track.
+            stop = min(len(level), max(int(np.ceil((start + duration) / entry_seconds)), starts[-1] + 1))
+            window = level[:stop]
+            mins[valid] = np.minimum.reduceat(window[:, 0], starts)
+            maxs[valid] = np.maximum.reduceat(window[:, 1], starts)
+            rms[valid] = np.maximum.reduceat(window[:, 2], starts)
+        return mins, maxs, rms